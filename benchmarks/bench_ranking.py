@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import DataManager, HAS_NUMPY
+from synthetic import make_plants
+
+WEIGHTS = {"rating": 0.6, "o2": 0.2, "co2": 0.2}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def warm_columns(dm):
+    # One-time cost paid per load: numeric columns and the name order
+    if dm.columnar:
+        for name in ("rating", "o2", "co2", "name_rank"):
+            dm.current._array(name)
+    else:
+        dm.current._sort_order(False)
+
+
+def run(plants, columnar):
+    # Fresh manager per measurement so nothing is served from cached orders;
+    # column construction is timed separately from the ranking itself.
+    cases = {
+        "top_10": lambda dm: dm.get_top_10(),
+        "sorted_by_rating": lambda dm: dm.current._sort_order(True),
+        "weighted_top_100": lambda dm: dm.top_k(100, WEIGHTS),
+    }
+    results = {"build_columns": timed(lambda: warm_columns(DataManager.from_plants(plants, columnar=columnar)))}
+    for name, case in cases.items():
+        dm = DataManager.from_plants(plants, columnar=columnar)
+        warm_columns(dm)
+        results[name] = timed(lambda: case(dm))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pure-Python vs NumPy ranking benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    plants = make_plants(args.rows)
+    print(f"{args.rows} plants")
+    python_times = run(plants, columnar=False)
+    numpy_times = run(plants, columnar=True) if HAS_NUMPY else {}
+
+    print(f"{'case':<20}{'python (s)':>12}{'numpy (s)':>12}{'speedup':>10}")
+    for name, py_t in python_times.items():
+        np_t = numpy_times.get(name)
+        if np_t is None:
+            print(f"{name:<20}{py_t:>12.3f}{'n/a':>12}{'':>10}")
+        else:
+            print(f"{name:<20}{py_t:>12.3f}{np_t:>12.3f}{py_t / np_t:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from synthetic import write_catalogue
+
+SERVER = os.path.join(ROOT, "src", "server.py")
+
+# Requests cycled through by every client: paged searches and top-K as a
+# kiosk would send them, detail lookups, and one streamed listing
+PATHS = [
+    "/search?q=palm&mode=top&limit=50",
+    "/search?q=fern&limit=50",
+    "/search?q=a&mode=all&by_rating=1&limit=100",
+    "/top?k=10",
+    "/top?k=20&rating=0.5&o2=0.5",
+    "/plants/{id}",
+    "/plants/{id}/similar?k=5",
+    "/search?q=variegated&min_rating=3&limit=50",
+    "/search?q=pa&limit=2000",
+]
+
+
+async def fetch(reader, writer, path):
+    # One keep-alive GET; returns (status, body bytes)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            body += await reader.readexactly(size + 2)
+            del body[-2:]
+            if not size:
+                break
+        return status, bytes(body)
+    return status, await reader.readexactly(int(headers["content-length"]))
+
+
+async def client(connect, paths, deadline, latencies, errors):
+    reader, writer = await connect()
+    try:
+        for path in paths:
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            status, _ = await fetch(reader, writer, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append((path, status))
+    finally:
+        writer.close()
+
+
+async def run(connect, plant_ids, concurrency, duration):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+
+    def paths(seed):
+        ids = itertools.cycle(plant_ids[seed::concurrency] or plant_ids)
+        for path in itertools.cycle(PATHS[seed % len(PATHS):] + PATHS[:seed % len(PATHS)]):
+            yield path.format(id=next(ids))
+
+    await asyncio.gather(*(client(connect, paths(i), deadline, latencies, errors)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else 0.0,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+        if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for(connect, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return await connect()
+        except OSError:
+            if time.perf_counter() >= deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def measure(host, port, args):
+    connect = lambda: asyncio.open_connection(host, port)
+    reader, writer = await wait_for(connect)
+    _, body = await fetch(reader, writer, "/search?q=&limit=500")
+    writer.close()
+    plant_ids = [p["id"] for p in json.loads(body)["results"]]
+    return await run(connect, plant_ids, args.concurrency, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the headless query server (src/server.py)")
+    parser.add_argument("--url", help="host:port of a running server (default: start one on a synthetic catalogue)")
+    parser.add_argument("--size", type=int, default=100_000,
+                        help="synthetic catalogue size for the started server (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="concurrent keep-alive connections (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        result = asyncio.run(measure(host or "127.0.0.1", int(port), args))
+    else:
+        # A separate process, so the clients don't share its event loop
+        with tempfile.TemporaryDirectory() as workdir:
+            path = write_catalogue(os.path.join(workdir, f"plants_{args.size}.csv"), args.size)
+            port = free_port()
+            server = subprocess.Popen([sys.executable, SERVER, path, "--port", str(port)],
+                                      stderr=subprocess.DEVNULL)
+            try:
+                result = asyncio.run(measure("127.0.0.1", port, args))
+            finally:
+                server.terminate()
+                server.wait()
+    print(json.dumps(result, indent=2))
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
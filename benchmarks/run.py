@@ -0,0 +1,331 @@
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import history, snapshot
+from src.core import CatalogueSet, DataManager
+from src.recommend import Recommender
+from synthetic import write_catalogue
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Results are compared against this file when it exists. None is committed:
+# timings only compare on the same machine, so create it on the reference
+# setup with `python benchmarks/run.py --save-baseline` before relying on
+# the regression check.
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+QUERIES = ["a", "pa", "palm", "fern 12", "variegated"]
+
+
+def measure(fn, repeat, setup=None):
+    # Wall time of `fn` over `repeat` runs; `setup` runs untimed before each
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times), "runs": repeat}
+
+
+def bench_data(results, size, workdir):
+    path = write_catalogue(os.path.join(workdir, f"plants_{size}.csv"), size)
+    repeat = 3 if size <= 100_000 else 1
+
+    results[f"load_data[{size}]"] = measure(lambda: DataManager(path), repeat)
+    dirty_path = write_catalogue(os.path.join(workdir, f"plants_dirty_{size}.csv"), size, bad_fraction=0.5)
+    results[f"load_data_dirty[{size}]"] = measure(lambda: DataManager(dirty_path), repeat)
+    # Warm start: restoring the parsed catalogue and sort orders saved on exit
+    snap_path = os.path.join(workdir, f"plants_{size}.snap")
+    catalogues = CatalogueSet.load([path])
+    catalogues.get_all_sorted(True)
+    results[f"snapshot.save[{size}]"] = measure(
+        lambda: snapshot.save([path], catalogues, {}, path=snap_path), repeat)
+    results[f"snapshot.load[{size}]"] = measure(lambda: snapshot.load([path], path=snap_path), repeat)
+    dm = DataManager(path)
+
+    def cold():
+        # Drop derived state so each run pays the full query cost
+        dm._reset(dm.plants)
+
+    for q in QUERIES:
+        results[f"search[{size}][{q}]"] = measure(lambda: dm.search(q), repeat, cold)
+        results[f"search_all[{size}][{q}]"] = measure(lambda: dm.search_all(q), repeat, cold)
+    results[f"get_top_10[{size}]"] = measure(dm.get_top_10, repeat, cold)
+    results[f"get_all_sorted[{size}]"] = measure(dm.get_all_sorted, repeat, cold)
+    results[f"get_all_sorted_by_rating[{size}]"] = measure(
+        lambda: dm.get_all_sorted(by_rating=True), repeat, cold)
+
+    # Recommender: one build, then 100 "similar plants" lookups
+    results[f"recommender.build[{size}]"] = measure(lambda: Recommender(dm.plants), 1)
+    sample = dm.plants[::max(1, size // 100)][:100]
+    dm.similar(sample[0])
+    results[f"similar[{size}][x100]"] = measure(lambda: [dm.similar(p) for p in sample], repeat)
+
+
+def bench_qt(results, workdir, cards=1000):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication, QWidget
+        from PyQt5.QtCore import QRect
+    except ImportError:
+        print("PyQt5 not installed; skipping UI benchmarks", file=sys.stderr)
+        return
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from src.ui_shared import STYLES, FlowLayout
+    from src import views
+    from src.views import PlantCard, DetailModal, ListTab, GRID_RENDERERS
+
+    path = write_catalogue(os.path.join(workdir, f"plants_ui_{cards}.csv"), cards)
+    dm = DataManager(path)
+    plants = dm.plants
+
+    host = QWidget()
+    host.setStyleSheet(STYLES)
+
+    def make_cards():
+        for p in plants:
+            PlantCard(p).deleteLater()
+        app.processEvents()
+
+    results[f"qt.plant_card[{cards}]"] = measure(make_cards, 3)
+
+    layout_host = QWidget(host)
+    flow = FlowLayout(layout_host)
+    for p in plants:
+        flow.addWidget(PlantCard(p))
+    results[f"qt.flow_layout.doLayout[{cards}]"] = measure(
+        lambda: flow.doLayout(QRect(0, 0, 960, 0), False), 5)
+
+    host.resize(1000, 700)
+    host.show()
+    for strategy in GRID_RENDERERS:
+        tab = ListTab(dm, strategy=strategy)
+        tab.setParent(host)
+        tab.resize(host.size())
+        tab.show()
+        results[f"qt.populate_grid[{strategy}][{cards}]"] = measure(
+            lambda: (tab.populate_grid(plants), app.processEvents()), 3)
+        tab.hide()
+
+    # Scroll frames: one repaint per scrollbar step, with cards painted from
+    # their cached raster and live
+    bar_steps = range(0, 3000, 20)
+    for strategy in GRID_RENDERERS:
+        for raster in (True, False):
+            views.CARD_RASTER = raster
+            views._card_rasters.clear()
+            tab = ListTab(dm, strategy=strategy)
+            tab.setParent(host)
+            tab.resize(host.size())
+            tab.show()
+            app.processEvents()
+            bar = tab.scroll.verticalScrollBar()
+
+            def sweep():
+                for value in bar_steps:
+                    bar.setValue(value)
+                    host.repaint()
+                    app.processEvents()
+
+            sweep()
+            results[f"qt.scroll[{strategy}][{'raster' if raster else 'live'}][{len(bar_steps)}]"] = measure(sweep, 3)
+            tab.hide()
+            tab.deleteLater()
+    views.CARD_RASTER = True
+
+    # Click to open-animation start: a fresh dialog per click vs the shared one
+    start_geo = QRect(0, 0, 200, 180)
+
+    def open_new(plant):
+        modal = DetailModal(host)
+        modal.bind(plant, start_geo)
+        modal.show()
+        modal.hide()
+        modal.deleteLater()
+
+    shared = DetailModal(host)
+
+    def open_shared(plant):
+        shared.bind(plant, start_geo)
+        shared.show()
+        shared.hide()
+
+    sample = iter(plants * 2)
+    results["qt.detail_modal.new"] = measure(lambda: open_new(next(sample)), 20)
+    results["qt.detail_modal.rebind"] = measure(lambda: open_shared(next(sample)), 20)
+
+
+def bench_flow(results, workdir, cards=5000, one_by_one=False):
+    # Filling and clearing a visible FlowLayout in bulk, as the eager and lazy
+    # grids do; `one_by_one` also times per-widget addWidget/takeAt(0), which
+    # is quadratic and takes minutes at 5k cards
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication, QScrollArea, QWidget
+    except ImportError:
+        return
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from src.ui_shared import STYLES, FlowLayout, updates_suspended
+    from src.views import PlantCard
+
+    plants = DataManager(write_catalogue(os.path.join(workdir, f"plants_flow_{cards}.csv"), cards)).plants
+    scroll = QScrollArea()
+    scroll.setStyleSheet(STYLES)
+    scroll.setWidgetResizable(True)
+    content = QWidget()
+    flow = FlowLayout(content)
+    scroll.setWidget(content)
+    scroll.resize(1000, 700)
+    scroll.show()
+    app.processEvents()
+
+    def populate():
+        with updates_suspended(content):
+            flow.addWidgets([PlantCard(p, content) for p in plants])
+        app.processEvents()
+
+    def clear():
+        with updates_suspended(content):
+            flow.clear()
+        app.processEvents()
+
+    results[f"qt.flow_layout.populate[{cards}]"] = measure(populate, 1, clear)
+    results[f"qt.flow_layout.clear[{cards}]"] = measure(clear, 1, populate)
+
+    if one_by_one:
+        def populate_each():
+            for p in plants:
+                flow.addWidget(PlantCard(p))
+            app.processEvents()
+
+        def clear_each():
+            while flow.count():
+                widget = flow.takeAt(0).widget()
+                widget.setParent(None)
+                widget.deleteLater()
+            app.processEvents()
+
+        clear()
+        results[f"qt.flow_layout.populate_one_by_one[{cards}]"] = measure(populate_each, 1)
+        results[f"qt.flow_layout.clear_one_by_one[{cards}]"] = measure(clear_each, 1)
+    scroll.close()
+    scroll.deleteLater()
+
+
+def bench_history(results, workdir, events=100_000, plants=5000):
+    # Favorites/recently-viewed log: recording with batched fsyncs, replay of
+    # an uncompacted log on startup, and compaction
+    path = os.path.join(workdir, "history.log")
+    ids = [str(i % plants) for i in range(0, events * 7, 7)]
+
+    def record():
+        if os.path.exists(path):
+            os.remove(path)
+        h = history.History(path)
+        for i, plant_id in enumerate(ids):
+            h.record_view(plant_id)
+            if i % 50 == 0:
+                h.set_favorite(plant_id, i % 100 == 0)
+        h.close()
+
+    # Compaction held off so replay is timed on the full-length log
+    with mock.patch.object(history, "COMPACT_MIN_LINES", math.inf):
+        results[f"history.record[{events}]"] = measure(record, 1)
+        results[f"history.replay[{events}]"] = measure(lambda: history.History(path), 3)
+        uncompacted = history.History(path)
+    results[f"history.compact[{events}]"] = measure(uncompacted.compact, 1)
+    results[f"history.replay_compacted[{events}]"] = measure(lambda: history.History(path), 3)
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else 1.0
+        current["baseline_median_s"] = previous["median_s"]
+        current["ratio"] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataManager and Qt hot paths")
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated catalogue sizes (default: %(default)s)")
+    parser.add_argument("--no-qt", action="store_true", help="skip the Qt benchmarks")
+    parser.add_argument("--flow-cards", type=int, default=5000,
+                        help="cards in the FlowLayout bulk benchmark (default: %(default)s)")
+    parser.add_argument("--flow-one-by-one", action="store_true",
+                        help="also time per-widget FlowLayout insert/remove (slow: quadratic)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="baseline results to compare against (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="median slowdown ratio flagged as a regression (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(",") if s):
+            bench_data(results, size, workdir)
+        bench_history(results, workdir)
+        if not args.no_qt:
+            bench_qt(results, workdir)
+            bench_flow(results, workdir, args.flow_cards, args.flow_one_by_one)
+
+    regressions = []
+    baseline = None
+    if not args.save_baseline:
+        if os.path.exists(args.baseline):
+            baseline = args.baseline
+            with open(args.baseline, encoding="utf-8") as f:
+                regressions = compare(results, json.load(f)["results"], args.threshold)
+        else:
+            print(f"No baseline at {args.baseline}; regressions were NOT checked. "
+                  "Run with --save-baseline on the reference setup to create one.", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "baseline": baseline,
+        },
+        "results": results,
+        "regressions": [name for name, _ in regressions],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    for name, ratio in regressions:
+        print(f"REGRESSION {name}: {ratio:.2f}x baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
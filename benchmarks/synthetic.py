@@ -0,0 +1,55 @@
+import csv
+import random
+
+from src.core import Plant
+
+# Same header as data/plants_data_new.csv
+HEADER = ["Plant ID", "Plant Name", "Plant Scientific Name", "Plant O2 Release Data",
+          "Plant CO Absorb Data", "Short Description of the plant", "Recommendation Rating out of 5"]
+
+COMMON = ["Palm", "Fern", "Ivy", "Lily", "Fig", "Cactus", "Orchid", "Violet", "Pothos",
+          "Begonia", "Aloe", "Snake Plant", "Monstera", "Philodendron", "Calathea"]
+PREFIXES = ["Areca", "Boston", "English", "Peace", "Fiddle Leaf", "Golden", "Silver",
+            "Variegated", "Dwarf", "Giant", "Red", "Striped", "Heartleaf", "Moth", "Zebra"]
+GENERA = ["Dypsis", "Nephrolepis", "Hedera", "Spathiphyllum", "Ficus", "Epipremnum",
+          "Sansevieria", "Monstera", "Calathea", "Begonia", "Aloe", "Saintpaulia"]
+SPECIES = ["lutescens", "exaltata", "helix", "wallisii", "lyrata", "aureum",
+           "trifasciata", "deliciosa", "ornata", "rex", "vera", "ionantha"]
+DESCRIPTIONS = ["Graceful palm tree, brings tropical elegance.",
+                "Aroid plant, glossy green leaves.",
+                "Hardy succulent, thrives on neglect.",
+                "Trailing vine, ideal for shelves.",
+                "Air-purifying foliage for low light."]
+
+
+def make_rows(n, seed=42):
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        yield [
+            i,
+            f"{rng.choice(PREFIXES)} {rng.choice(COMMON)} {i}",
+            f"{rng.choice(GENERA)} {rng.choice(SPECIES)}",
+            f"{rng.uniform(0.2, 5.0):.2f}",
+            f"{rng.uniform(0.2, 3.5):.2f}",
+            rng.choice(DESCRIPTIONS),
+            f"{rng.uniform(1.0, 5.0):.1f}",
+        ]
+
+
+def make_plants(n, seed=42):
+    return [Plant(id=str(r[0]), name=r[1], scientific_name=r[2], o2_data=r[3],
+                  co2_data=r[4], description=r[5], rating=float(r[6]))
+            for r in make_rows(n, seed)]
+
+
+def write_catalogue(path, n, seed=42, bad_fraction=0.0):
+    # bad_fraction: share of rows given an unparseable rating (a dirty feed)
+    rows = make_rows(n, seed)
+    if bad_fraction:
+        rng = random.Random(seed)
+        rows = (r[:6] + ["n/a"] if rng.random() < bad_fraction else r for r in rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
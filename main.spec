@@ -1,11 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+# assets/plants.pack is generated, not committed; rebuild it from the images
+# in assets/ so the bundle always ships a current pack
+subprocess.check_call([sys.executable, '-m', 'src.assetpack'], cwd=SPECPATH)
 
 
 a = Analysis(
     ['src\\main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[(os.path.join(SPECPATH, 'assets', 'plants.pack'), 'assets')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,188 @@
+import argparse
+import logging
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Layout of a .pack file (all integers little-endian):
+#   header   MAGIC, version u16, entry count u32
+#   index    one INDEX_ENTRY per image variant
+#   data     encoded images, back to back
+# Every plant has its original image (max_side 0) plus pre-scaled variants,
+# so the detail view can decode a small image instead of the full asset.
+MAGIC = b"PLPK"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+# plant id, max side (0 = original), format, width, height, offset, length.
+# Ids are stored NUL-padded in a fixed field, so longer ones can't be packed.
+MAX_ID_BYTES = 32
+INDEX_ENTRY = struct.Struct(f"<{MAX_ID_BYTES}sH4sHHQQ")
+PACK_NAME = "plants.pack"
+DEFAULT_SIZES = (256, 512)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+Entry = namedtuple("Entry", "max_side fmt width height offset length")
+
+
+class AssetPackError(Exception):
+    pass
+
+
+class AssetPack:
+    # Read-only view of a .pack file. The file is mapped once; images are
+    # decoded straight from the mapping, nothing is read up front except the
+    # index.
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise AssetPackError(f"{path} is empty")
+        self.entries = {}
+        try:
+            self._read_index()
+        except (struct.error, AssetPackError):
+            self.close()
+            raise
+
+    def _read_index(self):
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise AssetPackError(f"{self.path} is not an asset pack")
+        if version != VERSION:
+            raise AssetPackError(f"{self.path} has unsupported version {version}")
+
+        size = len(self._map)
+        pos = HEADER.size
+        for _ in range(count):
+            raw_id, max_side, fmt, width, height, offset, length = INDEX_ENTRY.unpack_from(self._map, pos)
+            pos += INDEX_ENTRY.size
+            if offset + length > size:
+                raise AssetPackError(f"{self.path} is truncated")
+            entry = Entry(max_side, fmt.rstrip(b"\0").decode("ascii"), width, height, offset, length)
+            self.entries.setdefault(raw_id.rstrip(b"\0").decode("utf-8"), []).append(entry)
+        # Smallest variant first; the original (max_side 0) goes last
+        for variants in self.entries.values():
+            variants.sort(key=lambda e: e.max_side or 1 << 16)
+
+    def __contains__(self, plant_id):
+        return plant_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def variant(self, plant_id, width=0, height=0):
+        # Smallest stored image that still covers width x height once scaled
+        # to fit (aspect ratio kept); the original if none does
+        variants = self.entries.get(plant_id)
+        if not variants:
+            return None
+        original = variants[-1]
+        if width <= 0 or height <= 0:
+            return original
+        scale = min(width / original.width, height / original.height)
+        for entry in variants:
+            if entry.width >= original.width * scale and entry.height >= original.height * scale:
+                return entry
+        return original
+
+    def data(self, entry) -> memoryview:
+        return memoryview(self._map)[entry.offset:entry.offset + entry.length]
+
+    def image(self, plant_id, width=0, height=0):
+        from PyQt5.QtGui import QImage
+
+        entry = self.variant(plant_id, width, height)
+        if entry is None:
+            return None
+        with self.data(entry) as view:
+            img = QImage.fromData(view, entry.fmt.upper())
+        return None if img.isNull() else img
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def build_pack(asset_dir: str, out_path: str, sizes=DEFAULT_SIZES) -> int:
+    # Encodes every image in asset_dir (named <plant id>.<ext>) plus one
+    # down-scaled PNG per size into a single pack. Returns the plant count.
+    from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, Qt
+    from PyQt5.QtGui import QImage
+
+    items = []
+    for name in sorted(os.listdir(asset_dir)):
+        plant_id, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        raw_id = plant_id.encode("utf-8")
+        if len(raw_id) > MAX_ID_BYTES or raw_id.endswith(b"\0"):
+            # struct would cut it short, and the image would be found under
+            # the wrong id, or another plant's
+            raise AssetPackError(f"{name}: plant id is longer than {MAX_ID_BYTES} UTF-8 bytes")
+        with open(os.path.join(asset_dir, name), "rb") as f:
+            raw = f.read()
+        img = QImage.fromData(raw)
+        if img.isNull():
+            logger.warning("Skipping %s: not a readable image.", name)
+            continue
+
+        fmt = "png" if ext.lower() == ".png" else "jpg"
+        items.append((plant_id, 0, fmt, img.width(), img.height(), raw))
+        for side in sorted(set(sizes)):
+            if side >= max(img.width(), img.height()):
+                continue
+            scaled = img.scaled(side, side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            buf = QByteArray()
+            device = QBuffer(buf)
+            device.open(QIODevice.WriteOnly)
+            scaled.save(device, "PNG")
+            items.append((plant_id, side, "png", scaled.width(), scaled.height(), bytes(buf)))
+
+    tmp_path = f"{out_path}.part"
+    offset = HEADER.size + INDEX_ENTRY.size * len(items)
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(items)))
+        for plant_id, side, fmt, width, height, blob in items:
+            f.write(INDEX_ENTRY.pack(plant_id.encode("utf-8"), side, fmt.encode("ascii"),
+                                     width, height, offset, len(blob)))
+            offset += len(blob)
+        for item in items:
+            f.write(item[-1])
+    os.replace(tmp_path, out_path)
+
+    plants = len({item[0] for item in items})
+    logger.info("Packed %d plants (%d images) into %s.", plants, len(items), out_path)
+    return plants
+
+
+def main(argv=None):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Pack plant images into a memory-mappable asset file")
+    parser.add_argument("--assets", default=os.path.join(root, "assets"),
+                        help="directory of <plant id>.png/.jpg images (default: %(default)s)")
+    parser.add_argument("--output", help=f"pack file to write (default: <assets>/{PACK_NAME})")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated max sides of the pre-scaled variants (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    try:
+        build_pack(args.assets, args.output or os.path.join(args.assets, PACK_NAME), sizes)
+    except AssetPackError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,57 @@
 import csv
+import heapq
+import importlib.util
 import logging
-from dataclasses import dataclass
-from typing import List
+import math
+import os
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, fields
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from . import profiling
+
+# NumPy is optional (the pure-Python path is used without it) and is only
+# imported on first columnar use, keeping it off the startup path.
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default weights for `DataManager.top_k`: rank on rating alone
+DEFAULT_WEIGHTS = {"rating": 1.0}
+# Numeric columns that can be weighted, filtered and indexed
+COLUMNS = ("rating", "o2", "co2")
+
+# Catalogue size from which columnar mode is picked automatically; below it
+# the NumPy import costs more than it saves
+COLUMNAR_MIN_ROWS = 20000
+
+# Runs DataManager.reload(); threads are only started once a reload is queued
+_reloads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="catalogue-reload")
+# Builds the indexes for DataManager.warm_up, one catalogue at a time
+_warm_ups = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalogue-warm-up")
+# Longest a warm_up step waits on that thread before yielding
+WARM_UP_POLL_MS = 2
+# Plants per sorted run when that thread builds a sort order (see _sort_order)
+WARM_UP_SORT_RUN = 4096
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
 
 @dataclass
 class Plant:
@@ -19,56 +65,981 @@ class Plant:
 
     @property
     def search_text(self) -> str:
-        return f"{self.name.lower()} {self.scientific_name.lower()}"
+        return normalize_text(f"{self.name} {self.scientific_name}")
+
+
+def normalize_text(text: str) -> str:
+    # Canonical form for matching: accents stripped (NFKD, combining marks
+    # dropped), casefolded, whitespace collapsed. Queries and the per-plant
+    # keys go through the same function so they always agree.
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def parse_measure(data) -> float:
+    # O2/CO2 columns hold numbers ("3.83") in current data and words ("High")
+    # in the legacy CSV; non-numeric values never satisfy a numeric filter.
+    try:
+        return float(str(data).split()[0])
+    except (ValueError, IndexError):
+        return math.nan
+
+
+@dataclass(frozen=True)
+class PlantFilter:
+    min_rating: Optional[float] = None
+    max_rating: Optional[float] = None
+    min_o2: Optional[float] = None
+    max_o2: Optional[float] = None
+    min_co2: Optional[float] = None
+    max_co2: Optional[float] = None
+
+    def ranges(self):
+        # (column, low, high) for every column with at least one bound set
+        for column in ("rating", "o2", "co2"):
+            lo = getattr(self, f"min_{column}")
+            hi = getattr(self, f"max_{column}")
+            if lo is not None or hi is not None:
+                yield (column,
+                       -math.inf if lo is None else lo,
+                       math.inf if hi is None else hi)
+
+    def __bool__(self):
+        return any(getattr(self, f.name) is not None for f in fields(self))
+
+
+class ColumnIndex:
+    # Values of one numeric column sorted ascending, with the plant index of
+    # each value alongside, so a range predicate is two bisects and a slice.
+    # `ids` are the non-NaN indices already in that order, when the caller
+    # has sorted them (the columnar path does so with NumPy).
+    def __init__(self, values: Sequence[float], ids: Optional[Sequence[int]] = None):
+        if ids is None:
+            # Sorting indices by a float key is much faster than sorting pairs;
+            # the sort is stable, so equal values stay in index order
+            ids = sorted((i for i, v in enumerate(values) if not math.isnan(v)), key=values.__getitem__)
+        self.values = [values[i] for i in ids]
+        self.ids = array('l', ids)
+
+    def span(self, lo: float, hi: float):
+        return bisect_left(self.values, lo), bisect_right(self.values, hi)
+
+
+class QueryResult:
+    # Lazy handle over a query: matches are found on demand while paging, so
+    # only the requested page is materialized. `order` is a sequence of indices
+    # into `plants` (a precomputed sort permutation or a range) and `predicate`
+    # tests an index.
+    #
+    # With `on_complete`, matched indices are also collected (up to
+    # `collect_limit`) and handed over as a compact array once the scan has
+    # finished, which is how DataManager fills its result cache.
+    def __init__(self, plants: List[Plant], order: Sequence[int],
+                 predicate: Optional[Callable[[int], bool]] = None,
+                 on_complete: Optional[Callable[[array], None]] = None,
+                 collect_limit: int = 0):
+        self._plants = plants
+        self._order = order
+        self._predicate = predicate
+        self._count = None if predicate else len(order)
+        # Resume point of the last scan: (matches passed, position in order)
+        self._cursor = (0, 0)
+        self._on_complete = on_complete
+        self._collect_limit = collect_limit
+        self._ids = array('l') if (predicate and on_complete) else None
+        # Set by DataManager.query when query profiling is on
+        self.profile = None
+
+    def _scan(self, offset: int, limit: Optional[int]) -> List[Plant]:
+        started = time.perf_counter() if self.profile is not None else None
+        seen, pos = self._cursor
+        if offset < seen:
+            seen, pos = 0, 0
+
+        pred = self._predicate
+        order = self._order
+        plants = self._plants
+        ids = self._ids
+        page = []
+        end = len(order)
+        while pos < end and (limit is None or len(page) < limit):
+            i = order[pos]
+            pos += 1
+            if pred(i):
+                if ids is not None and pos > self._cursor[1]:
+                    ids.append(i)
+                if limit is not None and seen >= offset:
+                    page.append(plants[i])
+                seen += 1
+
+        self._cursor = (seen, pos)
+        if ids is not None and len(ids) > self._collect_limit:
+            # Too large to be worth caching; fall back to pure lazy scanning
+            self._ids = ids = None
+        if pos >= end:
+            self._count = seen
+            if ids is not None:
+                # Fully scanned: serve further pages straight from the id array
+                self._order, self._predicate, self._ids = ids, None, None
+                self._on_complete(ids)
+        if started is not None:
+            self.profile.add("scan", (time.perf_counter() - started) * 1000)
+        return page
+
+    def progress(self) -> Tuple[int, int]:
+        # (matches found, rows tested) so far; every match once the count is known
+        seen, pos = self._cursor
+        return (seen if self._count is None else self._count), pos
+
+    def detached(self) -> "QueryResult":
+        # Independent handle over the same matches for use on another thread:
+        # its own cursor, and it never writes back to the result cache
+        return QueryResult(self._plants, self._order, self._predicate)
+
+    def count(self) -> int:
+        # Scans to the end if no page has got there yet
+        if self._count is None:
+            self._scan(self._cursor[0], None)
+        return self._count
+
+    def known_count(self) -> Optional[int]:
+        # The count if it is known without scanning further, else None
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self) -> Iterator[Plant]:
+        offset = 0
+        while True:
+            batch = self.page(offset, 256)
+            if not batch:
+                return
+            yield from batch
+            offset += len(batch)
+
+    def page(self, offset: int, limit: int) -> List[Plant]:
+        if offset < 0 or limit <= 0:
+            return []
+        if self._predicate is None:
+            plants = self._plants
+            return [plants[i] for i in self._order[offset:offset + limit]]
+
+        ids = self._ids
+        if ids is not None and offset + limit <= len(ids):
+            plants = self._plants
+            return [plants[i] for i in ids[offset:offset + limit]]
+
+        # Sequential paging (lazy loading) continues from the previous page
+        # instead of rescanning from the start.
+        return self._scan(offset, limit)
+
+
+def _rating_order(plant: Plant):
+    return (-plant.rating, plant.name)
+
+
+def _name_order(plant: Plant):
+    return plant.name
+
+
+class MergedResult:
+    # Several QueryResults read as one, with the same paging interface. Each
+    # part must already be sorted on `key`; they are k-way merged lazily
+    # (heapq.merge), or read one after another when `key` is None. `limit`
+    # caps the merged length, as for the top-10 leaderboard. Plants merged so
+    # far are kept, so paging back does not restart the merge.
+    def __init__(self, results: List[QueryResult], key: Optional[Callable] = None,
+                 limit: Optional[int] = None):
+        self._results = results
+        self._key = key
+        self._limit = limit
+        streams = [iter(r) for r in results]
+        merged = heapq.merge(*streams, key=key) if key else chain(*streams)
+        self._merged = islice(merged, limit)
+        self._seen: List[Plant] = []
+        self._count = None
+        # The QueryProfile shared by the parts, when profiling is on
+        self.profile = None
+
+    def detached(self) -> "MergedResult":
+        return MergedResult([r.detached() for r in self._results], self._key, self._limit)
+
+    def count(self) -> int:
+        if self._count is None:
+            total = sum(r.count() for r in self._results)
+            self._count = total if self._limit is None else min(total, self._limit)
+        return self._count
+
+    def known_count(self) -> Optional[int]:
+        if self._count is None:
+            counts = [r.known_count() for r in self._results]
+            if None not in counts:
+                total = sum(counts)
+                self._count = total if self._limit is None else min(total, self._limit)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self) -> Iterator[Plant]:
+        offset = 0
+        while True:
+            batch = self.page(offset, 256)
+            if not batch:
+                return
+            yield from batch
+            offset += len(batch)
+
+    def page(self, offset: int, limit: int) -> List[Plant]:
+        if offset < 0 or limit <= 0:
+            return []
+        seen = self._seen
+        end = offset + limit
+        if len(seen) < end and self._merged is not None:
+            seen.extend(islice(self._merged, end - len(seen)))
+            if len(seen) < end:
+                self._merged = None
+                self._count = len(seen)
+        return seen[offset:end]
+
+
+class ResultCache:
+    # Bounded LRU of query results stored as compact index arrays. Shared by
+    # searches on any thread: lookups never wait, while insertions and
+    # clearing (which evict) are serialized. The OrderedDict's own order is
+    # not safe to change from two threads at once (keys compare in Python
+    # code, which can switch threads mid-operation), so a lookup only marks
+    # its entry as recently used when the lock is free.
+    def __init__(self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[array]:
+        ids = self._entries.get(key)
+        if ids is None:
+            self.misses += 1
+            return None
+        if self._lock.acquire(blocking=False):
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread since the lookup; `ids` is still valid
+                pass
+            finally:
+                self._lock.release()
+        self.hits += 1
+        return ids
+
+    def put(self, key, ids: array):
+        size = ids.itemsize * len(ids)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.itemsize * len(old)
+            self._entries[key] = ids
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.itemsize * len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def info(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+# Catalogue CSV columns: Plant field -> accepted header names. Headers are
+# resolved to column positions once per file, not per row.
+CSV_COLUMNS = {
+    "id": ("Plant ID",),
+    "name": ("Plant Name",),
+    "scientific_name": ("Plant Scientific Name",),
+    "o2_data": ("Plant O2 Release Data",),
+    "co2_data": ("Plant CO Absorb Data",),
+    "description": ("Short Description of Plant", "Short Description of the plant"),
+    "rating": ("Recommendation Rating out of 5",),
+}
+PLANT_FIELDS = tuple(f.name for f in fields(Plant))
+NO_DESCRIPTION = "No description available"
+
+
+def resolve_columns(header: Sequence[str]) -> Dict[str, int]:
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    columns = {}
+    for field_name, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in positions:
+                columns[field_name] = positions[name]
+                break
+    return columns
+
+
+class LoadReport:
+    # Outcome of one load: malformed rows are counted by error type and the
+    # first MAX_SAMPLES kept (line number, type, row), then logged once
+    MAX_SAMPLES = 5
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.loaded = 0
+        self.errors = Counter()
+        self.samples = []
+
+    def add_error(self, kind: str, line: int, row):
+        self.errors[kind] += 1
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append((line, kind, row))
+
+    @property
+    def skipped(self) -> int:
+        return sum(self.errors.values())
+
+    def summary(self) -> dict:
+        return {
+            "path": self.path,
+            "loaded": self.loaded,
+            "skipped": self.skipped,
+            "errors": dict(self.errors),
+            "samples": [{"line": line, "error": kind, "row": row} for line, kind, row in self.samples],
+        }
+
+    def log(self):
+        logger.info("Loaded %d plants.", self.loaded)
+        if not self.errors:
+            return
+        logger.warning("Skipped %d malformed rows in %s: %s", self.skipped, self.path,
+                       ", ".join(f"{n} {kind}" for kind, n in self.errors.most_common()))
+        for line, kind, row in self.samples:
+            logger.warning("  line %d (%s): %.200r", line, kind, row)
+
+
+class CatalogueVersion:
+    # One loaded version of a catalogue. The plants and search keys are never
+    # changed once published; everything derived from them (sort orders,
+    # column indexes, arrays, word lists, the recommender) is built on first
+    # use and memoized here. Each memo entry is a complete value stored with
+    # one assignment, so threads racing on the same one at worst build it twice.
+    def __init__(self, plants: List[Plant], keys: List[str], version: int, columnar: bool,
+                 sort_orders: Optional[Dict[bool, Sequence[int]]] = None):
+        self.plants = plants
+        self._keys = keys
+        self.version = version
+        self.columnar = columnar
+        self._tokens = None
+        self._sort_orders = dict(sort_orders or {})
+        self._ranks = {}
+        self._columns = {}
+        self._arrays = {}
+        self._by_id = None
+        self._recommender = None
+
+    def _id_index(self) -> Dict[str, int]:
+        # Position of each plant id; the first plant listing an id wins
+        index = self._by_id
+        if index is None:
+            index = {}
+            for i, p in enumerate(self.plants):
+                index.setdefault(p.id, i)
+            self._by_id = index
+        return index
+
+    def _values(self, name: str) -> List[float]:
+        if name == "rating":
+            return [p.rating for p in self.plants]
+        if name == "o2":
+            return [parse_measure(p.o2_data) for p in self.plants]
+        if name == "co2":
+            return [parse_measure(p.co2_data) for p in self.plants]
+        raise ValueError(f"Unknown column {name!r}; expected one of {', '.join(COLUMNS)}")
+
+    def _array(self, name: str):
+        # Columnar storage: "rating", "o2", "co2" as float64 (NaN when not
+        # numeric) and "name_rank", each plant's position in name order.
+        arr = self._arrays.get(name)
+        if arr is None:
+            np = _numpy()
+            if name == "name_rank":
+                arr = np.empty(len(self.plants), dtype=np.int64)
+                arr[np.asarray(self._sort_order(False))] = np.arange(len(self.plants))
+            else:
+                arr = np.array(self._values(name), dtype=np.float64)
+            self._arrays[name] = arr
+        return arr
+
+    def _sort_order(self, by_rating: bool, run: Optional[int] = None):
+        # Sort permutations are computed once per load and shared by all queries.
+        # With `run`, the Python sort is done in runs of that many plants that
+        # are then merged: slower overall, but a worker thread doing it gives
+        # up the GIL between runs instead of holding it for the whole sort.
+        order = self._sort_orders.get(by_rating)
+        if order is None:
+            plants = self.plants
+            if self.columnar and by_rating:
+                np = _numpy()
+                # lexsort treats the last key as primary
+                order = np.lexsort((self._array("name_rank"), -self._array("rating")))
+            else:
+                if by_rating:
+                    key = lambda i: (-plants[i].rating, plants[i].name)
+                else:
+                    key = lambda i: plants[i].name
+                n = len(plants)
+                if run and n > run:
+                    runs = [sorted(range(start, min(start + run, n)), key=key) for start in range(0, n, run)]
+                    order = array('l', heapq.merge(*runs, key=key))
+                else:
+                    order = array('l', sorted(range(n), key=key))
+            self._sort_orders[by_rating] = order
+        return order
+
+    def _rank(self, by_rating: bool):
+        # Inverse of the sort permutation: position of each plant in that order
+        rank = self._ranks.get(by_rating)
+        if rank is None:
+            order = self._sort_order(by_rating)
+            if self.columnar:
+                np = _numpy()
+                rank = np.empty(len(order), dtype=np.int64)
+                rank[order] = np.arange(len(order))
+            else:
+                rank = array('l', bytes(order.itemsize * len(order)))
+                for pos, i in enumerate(order):
+                    rank[i] = pos
+            self._ranks[by_rating] = rank
+        return rank
+
+    def _column(self, name: str) -> ColumnIndex:
+        index = self._columns.get(name)
+        if index is None:
+            if self.columnar:
+                np = _numpy()
+                arr = self._array(name)
+                # NaNs sort last; a stable sort keeps equal values in index order
+                ids = np.argsort(arr, kind="stable")[:len(arr) - np.count_nonzero(np.isnan(arr))]
+                index = ColumnIndex(arr.tolist(), ids.tolist())
+            else:
+                index = ColumnIndex(self._values(name))
+            self._columns[name] = index
+        return index
+
+    def column_peak(self, name: str) -> float:
+        # Largest magnitude in a numeric column, non-numeric values ignored
+        values = self._column(name).values
+        return max(abs(values[0]), abs(values[-1])) if values else 0.0
+
+    def _top_ids(self, k: int, weights: Optional[Dict[str, float]] = None,
+                 peaks: Optional[Dict[str, float]] = None):
+        # Indices of the k best plants by weighted score, ties broken by name.
+        # Each column is scaled by its maximum (or by `peaks`, to score on a
+        # scale shared with other catalogues) so weights are comparable;
+        # non-numeric values score 0.
+        n = len(self.plants)
+        k = min(k, n)
+        if k <= 0:
+            return []
+        weights = weights or DEFAULT_WEIGHTS
+        if weights == DEFAULT_WEIGHTS and k <= len(self._sort_orders.get(True, ())):
+            return self._sort_order(True)[:k]
+
+        if self.columnar:
+            np = _numpy()
+            score = np.zeros(n, dtype=np.float64)
+            for name, weight in weights.items():
+                col = np.nan_to_num(self._array(name), nan=0.0)
+                peak = peaks[name] if peaks else np.abs(col).max()
+                if peak:
+                    score += weight * (col / peak)
+            if k < n:
+                # Everything scoring at least the k-th best, so ties at the
+                # cut-off are still decided by name below
+                neg = -score
+                ids = np.flatnonzero(neg <= np.partition(neg, k - 1)[k - 1])
+            else:
+                ids = np.arange(n)
+            plants = self.plants
+            pairs = sorted(zip((-score[ids]).tolist(), ids.tolist()),
+                           key=lambda t: (t[0], plants[t[1]].name))
+            return [i for _, i in pairs[:k]]
+
+        score = [0.0] * n
+        for name, weight in weights.items():
+            col = [0.0 if math.isnan(v) else v for v in self._values(name)]
+            peak = peaks[name] if peaks else max(map(abs, col))
+            if peak:
+                score = [s + weight * (v / peak) for s, v in zip(score, col)]
+        plants = self.plants
+        return heapq.nsmallest(k, range(n), key=lambda i: (-score[i], plants[i].name))
+
+    def filter_ids(self, plant_filter: PlantFilter) -> Set[int]:
+        # Each range is resolved by bisect on its column index; the ranges are
+        # then intersected smallest-first, so the work is bounded by the most
+        # selective predicate rather than the catalogue size.
+        spans = []
+        for column, lo, hi in plant_filter.ranges():
+            index = self._column(column)
+            start, stop = index.span(lo, hi)
+            spans.append((stop - start, index.ids, start, stop))
+        spans.sort(key=lambda s: s[0])
+
+        _, ids, start, stop = spans[0]
+        result = set(ids[start:stop])
+        for _, ids, start, stop in spans[1:]:
+            if not result:
+                break
+            result.intersection_update(ids[start:stop])
+        return result
+
+    def _token_lists(self) -> List[Tuple[str, ...]]:
+        # Words of each search key, for word-start matching
+        if self._tokens is None:
+            self._tokens = [tuple(key.split()) for key in self._keys]
+        return self._tokens
+
+    def _matcher(self, q: str, word_start: bool) -> Callable[[int], bool]:
+        if not word_start:
+            keys = self._keys
+            return lambda i: q in keys[i]
+
+        # Every query word must start some word of the plant's key
+        tokens = self._token_lists()
+        words = q.split()
+        return lambda i: all(any(t.startswith(w) for t in tokens[i]) for w in words)
+
+    def _recommend(self):
+        # Built on first use; later versions get a patched copy (see _reset)
+        if self._recommender is None:
+            from .recommend import Recommender
+            self._recommender = Recommender(self.plants)
+        return self._recommender
 
 
 class DataManager:
-    def __init__(self, filepath: str):
+    # `columnar`: keep rating/O2/CO2 in NumPy arrays and rank with vectorized
+    # operations. Left as None, it is on when NumPy is importable and the
+    # catalogue has at least COLUMNAR_MIN_ROWS plants.
+    #
+    # The loaded data lives in `current`, a CatalogueVersion that each
+    # (re)load replaces as a whole: the new version is built on the loading
+    # thread and published with a single assignment. Readers take `current`
+    # once and use that version throughout, so searches need no locks and
+    # never see a half-built catalogue; results keep their version after a swap.
+    def __init__(self, filepath: Optional[str], columnar: Optional[bool] = None):
+        if columnar and not HAS_NUMPY:
+            logger.warning("NumPy is not installed; using the pure-Python ranking path.")
+        self._columnar_pref = columnar
         self.filepath = filepath
-        self.plants: List[Plant] = []
-        self.load_data()
+        self.current = CatalogueVersion([], [], 0, False)
+        # Cache keys carry the version, so stale results never match
+        self._cache = ResultCache()
+        self.load_report: Optional[LoadReport] = None
+        # Taken by writers only, so versions are published one at a time and in order
+        self._write_lock = threading.Lock()
+        if filepath is not None:
+            self.load_data()
+
+    @property
+    def plants(self) -> List[Plant]:
+        return self.current.plants
+
+    @property
+    def version(self) -> int:
+        return self.current.version
+
+    @property
+    def columnar(self) -> bool:
+        return self.current.columnar
+
+    @classmethod
+    def from_plants(cls, plants: List[Plant], columnar: Optional[bool] = None) -> "DataManager":
+        dm = cls(None, columnar=columnar)
+        dm._reset(plants)
+        return dm
+
+    @classmethod
+    def from_snapshot(cls, filepath: str, plants: List[Plant], keys: List[str],
+                      sort_orders: Dict[bool, Sequence[int]], columnar: Optional[bool] = None) -> "DataManager":
+        # Rebuilt from snapshot_state() output without parsing the CSV again
+        dm = cls(None, columnar=columnar)
+        dm.filepath = filepath
+        dm._reset(plants, keys, sort_orders)
+        return dm
+
+    def snapshot_state(self) -> dict:
+        # What from_snapshot needs; sort orders as int64 arrays whatever the mode
+        data = self.current
+        return {
+            "plants": data.plants,
+            "keys": data._keys,
+            "sort_orders": {by_rating: array('q', data._sort_order(by_rating)) for by_rating in (False, True)},
+        }
+
+    def _reset(self, plants: List[Plant], keys: Optional[List[str]] = None,
+               sort_orders: Optional[Dict[bool, Sequence[int]]] = None) -> CatalogueVersion:
+        # Normalized search key per plant, computed once here instead of per query
+        if keys is None:
+            keys = [normalize_text(f"{p.name} {p.scientific_name}") for p in plants]
+        if self._columnar_pref is None:
+            columnar = HAS_NUMPY and len(plants) >= COLUMNAR_MIN_ROWS
+        else:
+            columnar = bool(self._columnar_pref and HAS_NUMPY)
+        if columnar and sort_orders:
+            np = _numpy()
+            sort_orders = {k: np.asarray(order, dtype=np.int64) for k, order in sort_orders.items()}
+        with self._write_lock:
+            old = self.current
+            data = CatalogueVersion(plants, keys, old.version + 1, columnar, sort_orders)
+            if old._recommender is not None:
+                # Patched on a copy; readers of the old version keep theirs
+                data._recommender = old._recommender.updated(plants)
+            self.current = data
+            self._cache.clear()
+        return data
 
     def load_data(self):
-        self.plants = []
+        # Parses into a new version and publishes it once complete; safe to
+        # call off the GUI thread while other threads search
+        plants = []
+        report = LoadReport(self.filepath)
         try:
-            with open(self.filepath, mode='r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    try:
-                        desc = row.get('Short Description of Plant') or row.get(
-                            'Short Description of the plant') or "No description available"
-
-                        plant = Plant(
-                            id=str(row['Plant ID']),
-                            name=row['Plant Name'],
-                            scientific_name=row['Plant Scientific Name'],
-                            o2_data=row['Plant O2 Release Data'],
-                            co2_data=row['Plant CO Absorb Data'],
-                            description=desc,
-                            rating=float(row['Recommendation Rating out of 5'])
-                        )
-                        self.plants.append(plant)
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Skipping malformed row: {row} -> {e}")
-            logger.info(f"Loaded {len(self.plants)} plants.")
+            with open(self.filepath, mode='r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                columns = resolve_columns(next(reader, []))
+                missing = [name for name in PLANT_FIELDS if name not in columns and name != "description"]
+                if missing:
+                    report.add_error("missing column", 1, missing)
+                else:
+                    # Fetch all fields of a row with one C-level call
+                    getter = itemgetter(*(columns[name] for name in PLANT_FIELDS if name in columns))
+                    if "description" in columns:
+                        fields_of = getter
+                    else:
+                        def fields_of(row):
+                            plant_id, name, sci, o2, co2, rating = getter(row)
+                            return plant_id, name, sci, o2, co2, "", rating
+                    for line, row in enumerate(reader, start=2):
+                        if not row:
+                            continue
+                        try:
+                            plant_id, name, sci, o2, co2, desc, rating = fields_of(row)
+                            plants.append(Plant(plant_id, name, sci, o2, co2,
+                                                desc or NO_DESCRIPTION, float(rating)))
+                        except IndexError:
+                            report.add_error("missing fields", line, row)
+                        except ValueError:
+                            report.add_error("invalid rating", line, row)
         except FileNotFoundError:
-            logger.error(f"File not found: {self.filepath}")
+            logger.error("File not found: %s", self.filepath)
+        report.loaded = len(plants)
+        report.log()
+        self.load_report = report
+        return self._reset(plants)
+
+    def reload(self) -> Future:
+        # load_data on a background thread; the future resolves to the new version
+        return _reloads.submit(self.load_data)
+
+    def column_peak(self, name: str) -> float:
+        return self.current.column_peak(name)
+
+    def top_k(self, k: int = 10, weights: Optional[Dict[str, float]] = None,
+              peaks: Optional[Dict[str, float]] = None) -> List[Plant]:
+        # `weights` maps "rating", "o2" and "co2" to their share of the score
+        data = self.current
+        plants = data.plants
+        return [plants[i] for i in data._top_ids(k, weights, peaks)]
+
+    def filter_ids(self, plant_filter: PlantFilter) -> Set[int]:
+        return self.current.filter_ids(plant_filter)
+
+    def plant(self, plant_id: str) -> Optional[Plant]:
+        data = self.current
+        i = data._id_index().get(plant_id)
+        return None if i is None else data.plants[i]
+
+    def get_top_10(self) -> List[Plant]:
+        return self.top_k(10)
+
+    def get_all_sorted(self, by_rating: bool = False) -> List[Plant]:
+        return _collect(self.query("", by_rating=by_rating))
+
+    def _recommend(self):
+        return self.current._recommend()
+
+    def similar(self, plant: Plant, k: int = 5) -> List[Plant]:
+        # Plants most like `plant` by rating/O2/CO2 and shared words
+        return [p for _, p in self._recommend().similar(plant, k)]
+
+    def warm_up(self) -> Iterator[Tuple[int, int]]:
+        # Builds the lazily derived indexes of the current version on a
+        # worker thread; the version is immutable and each index is published
+        # with one assignment, so no lock is needed. Each step here only waits
+        # up to WARM_UP_POLL_MS and yields (done, total), so an idle-time
+        # caller's steps stay short. A reload abandons the indexes not built yet.
+        data = self.current
+        steps = [lambda: data._sort_order(False, WARM_UP_SORT_RUN),
+                 lambda: data._sort_order(True, WARM_UP_SORT_RUN), lambda: data._column("rating"), lambda: data._column("o2"),
+                 lambda: data._column("co2"), data._token_lists, data._id_index, data._recommend]
+        done = 0
+
+        def build():
+            nonlocal done
+            for step in steps:
+                if self.current is not data:
+                    return
+                step()
+                done += 1
+
+        job = _warm_ups.submit(build)
+        while True:
+            if self.current is not data:
+                return
+            if job.done():
+                break
+            wait([job], timeout=WARM_UP_POLL_MS / 1000)
+            yield done, len(steps)
+        job.result()
+        yield done, len(steps)
+
+    def query(self, query: str, mode: str = "all", by_rating: bool = False,
+              filters: Optional[PlantFilter] = None, word_start: bool = False,
+              profile: Optional[profiling.QueryProfile] = None) -> QueryResult:
+        # mode "top": an empty query means the rating leaderboard (as `search`);
+        # mode "all": an empty query means the whole catalogue (as `search_all`).
+        # word_start: match query words against word starts instead of substrings.
+        # With profiling on (or a `profile` passed in) the result carries a
+        # QueryProfile for the caller to finish once the results are used.
+        data = self.current
+        if profile is None:
+            if not profiling.ENABLED:
+                return self._query(data, query, mode, by_rating, filters, word_start)
+            profile = profiling.QueryProfile(query, mode, by_rating, filters, word_start)
+        with profile.phase("plan"):
+            result = self._query(data, query, mode, by_rating, filters, word_start, profile)
+        profile.attach(self.filepath or "<memory>", data.version, result)
+        return result
+
+    def _query(self, data: CatalogueVersion, query: str, mode: str, by_rating: bool,
+               filters: Optional[PlantFilter], word_start: bool,
+               profile: Optional[profiling.QueryProfile] = None) -> QueryResult:
+        plants = data.plants
+        q = normalize_text(query)
+        if not filters:
+            filters = None
+        if not q and filters is None:
+            if mode == "top":
+                return QueryResult(plants, data._top_ids(10))
+            return QueryResult(plants, data._sort_order(by_rating))
+
+        key = (data.version, mode, q, by_rating, filters, word_start)
+        ids = self._cache.get(key)
+        if ids is not None:
+            if profile is not None:
+                profile.cache_hits += 1
+            return QueryResult(plants, ids)
+
+        if filters is not None:
+            # Order the matching set by rank instead of walking the whole permutation
+            candidates = data.filter_ids(filters)
+            if q:
+                order = array('l', sorted(candidates, key=data._rank(True).__getitem__)
+                              if by_rating else sorted(candidates))
+            else:
+                sort_by_rating = by_rating or mode == "top"
+                order = array('l', sorted(candidates, key=data._rank(sort_by_rating).__getitem__))
+                if mode == "top":
+                    order = order[:10]
+                self._cache.put(key, order)
+                return QueryResult(plants, order)
+        else:
+            order = data._sort_order(True) if by_rating else range(len(plants))
+        return QueryResult(plants, order, data._matcher(q, word_start),
+                           on_complete=lambda ids: self._cache.put(key, ids),
+                           collect_limit=self._cache.max_bytes // array('l').itemsize)
+
+    def cache_info(self) -> dict:
+        return self._cache.info()
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def search(self, query: str, filters: Optional[PlantFilter] = None) -> List[Plant]:
+        return _collect(self.query(query, mode="top", filters=filters))
+
+    def search_all(self, query: str, filters: Optional[PlantFilter] = None) -> List[Plant]:
+        return _collect(self.query(query, mode="all", filters=filters))
+
+
+def _collect(results) -> List[Plant]:
+    plants = list(results)
+    profiling.finish(results.profile)
+    return plants
+
+
+def _measure(plant: Plant, name: str) -> float:
+    if name == "rating":
+        return plant.rating
+    if name == "o2":
+        return parse_measure(plant.o2_data)
+    if name == "co2":
+        return parse_measure(plant.co2_data)
+    raise ValueError(f"Unknown column {name!r}; expected one of {', '.join(COLUMNS)}")
+
+
+class CatalogueSet:
+    # Several catalogues queried as one. Each source is a DataManager with its
+    # own indexes and result cache; answers are merged from the per-source
+    # results, which already come back in a common order, instead of
+    # concatenating all plants and sorting again.
+    def __init__(self, sources: Sequence[Tuple[str, DataManager]]):
+        self.sources: Dict[str, DataManager] = dict(sources)
+
+    @classmethod
+    def load(cls, paths: Sequence[str], columnar: Optional[bool] = None,
+             max_workers: Optional[int] = None,
+             loader: Optional[Callable[[str], DataManager]] = None) -> "CatalogueSet":
+        # Sources are parsed in a thread pool so file reads overlap. `loader`
+        # replaces parsing the CSV (e.g. restoring from a snapshot).
+        names = []
+        for path in paths:
+            name = base = os.path.splitext(os.path.basename(path))[0]
+            n = 2
+            while name in names:
+                name = f"{base} ({n})"
+                n += 1
+            names.append(name)
+        loader = loader or (lambda path: DataManager(path, columnar=columnar))
+        if len(paths) == 1:
+            managers = [loader(paths[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), 8)) as pool:
+                managers = list(pool.map(loader, paths))
+        return cls(zip(names, managers))
+
+    def __len__(self):
+        return len(self.sources)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.sources)
+
+    def source(self, name: str) -> DataManager:
+        return self.sources[name]
+
+    def query(self, query: str, mode: str = "all", by_rating: bool = False,
+              filters: Optional[PlantFilter] = None, word_start: bool = False):
+        profile = None
+        if profiling.ENABLED and len(self.sources) > 1:
+            profile = profiling.QueryProfile(query, mode, by_rating, filters, word_start)
+        results = [dm.query(query, mode, by_rating, filters, word_start, profile)
+                   for dm in self.sources.values()]
+        if len(results) == 1:
+            return results[0]
+
+        # The order DataManager.query returns in; matches of a text query
+        # without by_rating stay in catalogue order, so sources are chained
+        q = normalize_text(query)
+        if by_rating or (mode == "top" and not q):
+            key = _rating_order
+        elif not q:
+            key = _name_order
+        else:
+            key = None
+        limit = 10 if mode == "top" and not q else None
+        merged = MergedResult(results, key, limit)
+        merged.profile = profile
+        return merged
+
+    def top_k(self, k: int = 10, weights: Optional[Dict[str, float]] = None) -> List[Plant]:
+        if k <= 0:
+            return []
+        if len(self.sources) == 1:
+            return next(iter(self.sources.values())).top_k(k, weights)
+
+        # Scale columns by their maxima over all sources so per-source scores
+        # are comparable, then merge each source's own top k
+        weights = weights or DEFAULT_WEIGHTS
+        peaks = {name: max(dm.column_peak(name) for dm in self.sources.values())
+                 for name in weights}
+
+        def key(plant):
+            score = 0.0
+            for name, weight in weights.items():
+                v = _measure(plant, name)
+                if peaks[name] and not math.isnan(v):
+                    score = score + weight * (v / peaks[name])
+            return (-score, plant.name)
+
+        merged = heapq.merge(*(dm.top_k(k, weights, peaks) for dm in self.sources.values()), key=key)
+        return list(islice(merged, k))
 
     def get_top_10(self) -> List[Plant]:
-        return sorted(self.plants, key=lambda p: (-p.rating, p.name))[:10]
+        return self.top_k(10)
 
     def get_all_sorted(self, by_rating: bool = False) -> List[Plant]:
-        key = (lambda p: (-p.rating, p.name)) if by_rating else (lambda p: p.name)
-        return sorted(self.plants, key=key)
-
-    def search(self, query: str) -> List[Plant]:
-        q = query.lower().strip()
-        if not q:
-            return self.get_top_10()
-        return [p for p in self.plants if q in p.search_text]
-
-    def search_all(self, query: str) -> List[Plant]:
-        q = query.lower().strip()
-        if not q:
-            return self.get_all_sorted()
-        return [p for p in self.plants if q in p.search_text]
\ No newline at end of file
+        return _collect(self.query("", by_rating=by_rating))
+
+    def warm_up(self) -> Iterator[Tuple[int, int]]:
+        # Every source's DataManager.warm_up, with progress over the whole set
+        managers = list(self.sources.values())
+        for i, dm in enumerate(managers):
+            for done, total in dm.warm_up():
+                yield i * total + done, len(managers) * total
+
+    def plant(self, plant_id: str) -> Optional[Plant]:
+        # From the first source that has it, as in the merged results
+        for dm in self.sources.values():
+            plant = dm.plant(plant_id)
+            if plant is not None:
+                return plant
+        return None
+
+    def similar(self, plant: Plant, k: int = 5) -> List[Plant]:
+        if k <= 0:
+            return []
+        scored = heapq.merge(*(dm._recommend().similar(plant, k) for dm in self.sources.values()),
+                             key=lambda pair: -pair[0])
+        return [p for _, p in islice(scored, k)]
+
+    def clear_cache(self):
+        for dm in self.sources.values():
+            dm.clear_cache()
+
+    def search(self, query: str, filters: Optional[PlantFilter] = None) -> List[Plant]:
+        return _collect(self.query(query, mode="top", filters=filters))
+
+    def search_all(self, query: str, filters: Optional[PlantFilter] = None) -> List[Plant]:
+        return _collect(self.query(query, mode="all", filters=filters))
+
+
+def catalogue_paths() -> List[str]:
+    # PLANTS_CATALOGUES (paths joined with os.pathsep) replaces the bundled
+    # catalogue with one or more regional ones
+    paths = [p for p in os.environ.get("PLANTS_CATALOGUES", "").split(os.pathsep) if p]
+    if paths:
+        return paths
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    data_path = os.path.join(data_dir, "plants_data_new.csv")
+    if not os.path.exists(data_path):
+        data_path = os.path.join(data_dir, "plants.csv")
+    return [data_path]
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import logging
+import os
+from typing import Callable, Optional, Union
+
+from .core import MergedResult, QueryResult
+
+logger = logging.getLogger(__name__)
+
+# Same columns as data/plants_data_new.csv, so exports load back in
+CSV_HEADER = ["Plant ID", "Plant Name", "Plant Scientific Name", "Plant O2 Release Data",
+              "Plant CO Absorb Data", "Short Description of the plant", "Recommendation Rating out of 5"]
+FORMATS = ("csv", "jsonl")
+
+
+def _csv_chunk(plants) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([p.id, p.name, p.scientific_name, p.o2_data, p.co2_data,
+                      p.description, p.rating] for p in plants)
+    return buf.getvalue()
+
+
+def plant_dict(p) -> dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "scientific_name": p.scientific_name,
+        "o2_data": p.o2_data,
+        "co2_data": p.co2_data,
+        "description": p.description,
+        "rating": p.rating,
+    }
+
+
+def _jsonl_chunk(plants) -> str:
+    return "".join(json.dumps(plant_dict(p), ensure_ascii=False) + "\n" for p in plants)
+
+
+def export_results(results: Union[QueryResult, MergedResult], path: str, fmt: str = "csv",
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None,
+                   chunk_size: int = 5000) -> Optional[int]:
+    # Streams `results` page by page, so only one chunk of rows is held at a
+    # time. Writes go to a temporary file that replaces `path` on success.
+    # Returns the number of rows written, or None if cancelled.
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    total = results.count()
+    tmp_path = f"{path}.part"
+    written = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            if fmt == "csv":
+                csv.writer(f).writerow(CSV_HEADER)
+            render = _csv_chunk if fmt == "csv" else _jsonl_chunk
+            while True:
+                if is_cancelled and is_cancelled():
+                    f.close()
+                    os.remove(tmp_path)
+                    logger.info("Export to %s cancelled after %d rows.", path, written)
+                    return None
+                chunk = results.page(written, chunk_size)
+                if not chunk:
+                    break
+                f.write(render(chunk))
+                written += len(chunk)
+                if progress:
+                    progress(written, total)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info("Exported %d plants to %s.", written, path)
+    return written
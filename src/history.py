@@ -0,0 +1,243 @@
+import logging
+import os
+from collections import Counter, OrderedDict
+from itertools import islice
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Favorites and recently viewed plants, by Plant ID. Every change is one
+# line appended to a log, so opening a plant costs a buffered write rather
+# than rewriting a file; lines are written and fsynced in batches (flush()),
+# and the log is rewritten compactly once it is mostly superseded records.
+#
+# Log lines, after a "PLHL <version>" header (ids escaped, see _escape):
+#   v <id>          viewed once
+#   c <n> <id>      viewed n times (written by compaction)
+#   f <id>          favorited
+#   u <id>          unfavorited
+# A line cut short by a crash has no newline; it is dropped on replay.
+HEADER = "PLHL 1\n"
+RECENT_SIZE = 50
+# Pending lines that force a flush without waiting for the caller's timer
+FLUSH_LINES = 256
+# Compact once the log holds this many times more lines than the state needs
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 1000
+
+
+def history_path() -> str:
+    # PLANTS_HISTORY_FILE moves the log; it is user data, so it lives
+    # under XDG_DATA_HOME rather than with the caches
+    path = os.environ.get("PLANTS_HISTORY_FILE")
+    if path:
+        return path
+    root = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(root, "plants", "history.log")
+
+
+def _escape(plant_id: str) -> str:
+    return plant_id.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return text.replace("\\\\", "\0").replace("\\n", "\n").replace("\\r", "\r").replace("\0", "\\")
+
+
+class History:
+    # In memory: view counts, favorites in the order they were added, and an
+    # LRU of the last `recent_size` plants viewed, so the Home sections are
+    # read in O(k). Listeners are called after every change.
+    def __init__(self, path: Optional[str] = None, recent_size: int = RECENT_SIZE):
+        self.path = path or history_path()
+        self.recent_size = recent_size
+        self.views = Counter()
+        self._favorites = OrderedDict()
+        self._recent = OrderedDict()
+        self._lines = 0
+        self._pending = []
+        self._file = None
+        self._listeners = []
+        self.replay()
+
+    def add_listener(self, fn: Callable[[], None]):
+        self._listeners.append(fn)
+
+    def _changed(self, line: str):
+        self._pending.append(line)
+        if len(self._pending) >= FLUSH_LINES:
+            self.flush()
+        for fn in self._listeners:
+            fn()
+
+    def _touch(self, plant_id: str):
+        recent = self._recent
+        if plant_id in recent:
+            recent.move_to_end(plant_id)
+        else:
+            recent[plant_id] = None
+            if len(recent) > self.recent_size:
+                recent.popitem(last=False)
+
+    def _apply(self, op: str, rest: str):
+        if op == "v":
+            plant_id = _unescape(rest)
+            self.views[plant_id] += 1
+            self._touch(plant_id)
+        elif op == "c":
+            count, _, plant_id = rest.partition(" ")
+            plant_id = _unescape(plant_id)
+            self.views[plant_id] += int(count)
+            self._touch(plant_id)
+        elif op == "f":
+            self._favorites[_unescape(rest)] = None
+        elif op == "u":
+            self._favorites.pop(_unescape(rest), None)
+        else:
+            raise ValueError(op)
+
+    def record_view(self, plant_id: str):
+        self.views[plant_id] += 1
+        self._touch(plant_id)
+        self._changed(f"v {_escape(plant_id)}\n")
+
+    def set_favorite(self, plant_id: str, favorite: bool = True):
+        if favorite == (plant_id in self._favorites):
+            return
+        if favorite:
+            self._favorites[plant_id] = None
+        else:
+            del self._favorites[plant_id]
+        self._changed(f"{'f' if favorite else 'u'} {_escape(plant_id)}\n")
+
+    def toggle_favorite(self, plant_id: str) -> bool:
+        favorite = plant_id not in self._favorites
+        self.set_favorite(plant_id, favorite)
+        return favorite
+
+    def is_favorite(self, plant_id: str) -> bool:
+        return plant_id in self._favorites
+
+    def favorites(self, k: Optional[int] = None) -> List[str]:
+        # Newest first
+        return list(islice(reversed(self._favorites), k))
+
+    def recent(self, k: Optional[int] = None) -> List[str]:
+        # Most recently viewed first
+        return list(islice(reversed(self._recent), k))
+
+    def most_viewed(self, k: int) -> List[str]:
+        return [plant_id for plant_id, _ in self.views.most_common(k)]
+
+    def replay(self):
+        # Rebuilds the in-memory state from the log: one read and a split,
+        # then a loop over the lines
+        try:
+            with open(self.path, "r", encoding="utf-8", newline="\n") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning("Could not read history %s: %s", self.path, e)
+            self._set_aside()
+            return
+        if not text:
+            return
+        if not text.startswith(HEADER):
+            logger.warning("Unrecognised history log %s; starting a new one.", self.path)
+            self._set_aside()
+            return
+
+        lines = text[len(HEADER):].split("\n")
+        # The last element is "" after a complete line, or a torn write
+        lines.pop()
+        bad = 0
+        for line in lines:
+            op, _, rest = line.partition(" ")
+            try:
+                self._apply(op, rest)
+            except ValueError:
+                bad += 1
+        self._lines = len(lines)
+        if bad:
+            logger.warning("Skipped %d unreadable lines in %s", bad, self.path)
+        if not text.endswith("\n"):
+            # Drop the torn line so the next append starts on a fresh one
+            with open(self.path, "r+b") as f:
+                f.truncate(len(text[:text.rfind("\n") + 1].encode("utf-8")))
+        if self._needs_compaction():
+            self.compact()
+
+    def _set_aside(self):
+        try:
+            os.replace(self.path, self.path + ".old")
+        except OSError:
+            pass
+
+    def _live_lines(self) -> int:
+        return len(self.views) + len(self._favorites)
+
+    def _needs_compaction(self) -> bool:
+        return self._lines >= COMPACT_MIN_LINES and self._lines > COMPACT_RATIO * self._live_lines()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(HEADER.encode("utf-8"))
+        return self._file
+
+    def flush(self):
+        # Writes the pending lines and fsyncs once for the whole batch
+        if not self._pending:
+            return
+        data = "".join(self._pending).encode("utf-8")
+        self._lines += len(self._pending)
+        self._pending = []
+        try:
+            f = self._open()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError as e:
+            logger.error("Could not write history to %s: %s", self.path, e)
+            return
+        if self._needs_compaction():
+            self.compact()
+
+    def compact(self):
+        # Rewrites the log as the current state: view counts (plants still in
+        # the recent list last, oldest first, so replay rebuilds the LRU) and
+        # favorites in the order they were added
+        self._pending = []
+        recent = self._recent
+        lines = [HEADER]
+        lines.extend(f"c {n} {_escape(plant_id)}\n" for plant_id, n in self.views.items()
+                     if plant_id not in recent)
+        lines.extend(f"c {self.views[plant_id]} {_escape(plant_id)}\n" for plant_id in recent)
+        lines.extend(f"f {_escape(plant_id)}\n" for plant_id in self._favorites)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write("".join(lines).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error("Could not compact history %s: %s", self.path, e)
+            return
+        logger.info("Compacted history from %d to %d lines.", self._lines, len(lines) - 1)
+        self._lines = len(lines) - 1
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
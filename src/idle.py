@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import logging
+import time
+
+from PyQt5.QtCore import QObject, QEvent, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from . import instrument
+
+logger = logging.getLogger(__name__)
+
+# Wait this long after the last input event before running background work,
+# then run it in slices of at most SLICE_MS so the event loop stays responsive
+IDLE_DELAY_MS = 400
+SLICE_MS = 8
+
+INPUT_EVENTS = frozenset((
+    QEvent.KeyPress, QEvent.KeyRelease,
+    QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick,
+    QEvent.MouseMove, QEvent.Wheel,
+    QEvent.TouchBegin, QEvent.TouchUpdate, QEvent.TouchEnd,
+))
+
+
+class IdleScheduler(QObject):
+    # Runs cooperative background tasks on the GUI thread while the user is
+    # idle. A task is an iterator: each next() does one small unit of work and
+    # may yield (done, total) progress, with total None while it is not yet
+    # known. Lower priorities run first; tasks of equal priority run in the
+    # order they were added.
+    #
+    # Input can only be delivered between slices (they run on the GUI
+    # thread), so steps should be small; a slice ends once it passes
+    # slice_ms and control goes back to the event loop. Any input event seen
+    # by the application filter then holds off the next slice until the user
+    # has been idle for idle_ms again.
+    #
+    # Progress is published as instrumentation: gauge "idle.<name>" holds
+    # "done/total" ("done/?" while the total is unknown, "done" once
+    # finished), stage "idle.<name>" the time of each step.
+    def __init__(self, parent=None, idle_ms=IDLE_DELAY_MS, slice_ms=SLICE_MS):
+        super().__init__(parent)
+        self.idle_ms = idle_ms
+        self.slice_ms = slice_ms
+        self._queue = []
+        self._order = itertools.count()
+        self._cancelled = set()
+        self._last_input = time.perf_counter()
+        self._filtering = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run_slice)
+
+    def add(self, name, task, priority=0):
+        self._cancelled.discard(name)
+        heapq.heappush(self._queue, (priority, next(self._order), name, iter(task)))
+        instrument.set_gauge(f"idle.{name}", "queued")
+        self._wake()
+
+    def cancel(self, name):
+        if any(entry[2] == name for entry in self._queue):
+            self._cancelled.add(name)
+
+    def pending(self):
+        return [name for _, _, name, _ in sorted(self._queue) if name not in self._cancelled]
+
+    def _wake(self):
+        if not self._filtering:
+            # Only watch events while there is work; the filter sees every
+            # event in the application
+            QApplication.instance().installEventFilter(self)
+            self._filtering = True
+        if not self._timer.isActive():
+            self._timer.start(self._delay())
+
+    def _delay(self):
+        idle_for = (time.perf_counter() - self._last_input) * 1000
+        return max(0, int(self.idle_ms - idle_for))
+
+    def eventFilter(self, obj, event):
+        if event.type() in INPUT_EVENTS:
+            self._last_input = time.perf_counter()
+        return False
+
+    def _run_slice(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        while self._queue:
+            if self._delay() > 0:
+                break
+            priority, order, name, task = self._queue[0]
+            if name in self._cancelled:
+                heapq.heappop(self._queue)
+                self._cancelled.discard(name)
+                instrument.set_gauge(f"idle.{name}", "cancelled")
+                continue
+
+            step_start = time.perf_counter()
+            try:
+                progress = next(task)
+            except StopIteration:
+                heapq.heappop(self._queue)
+                instrument.set_gauge(f"idle.{name}", "done")
+                progress = None
+            except Exception:
+                heapq.heappop(self._queue)
+                logger.exception("Idle task %s failed", name)
+                instrument.set_gauge(f"idle.{name}", "failed")
+                progress = None
+            now = time.perf_counter()
+            if instrument.ENABLED:
+                instrument.record(f"idle.{name}", (now - step_start) * 1000)
+            if progress is not None:
+                done, total = progress
+                instrument.set_gauge(f"idle.{name}", f"{done}/{'?' if total is None else total}")
+            if now >= deadline:
+                break
+
+        if self._queue:
+            self._timer.start(self._delay())
+        elif self._filtering:
+            QApplication.instance().removeEventFilter(self)
+            self._filtering = False
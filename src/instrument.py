@@ -0,0 +1,178 @@
+import atexit
+import functools
+import json
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Instrumentation is off unless PLANTS_INSTRUMENT is set (to anything but "0").
+# When off, `timed` hands back a shared no-op object and decorated functions
+# are returned unwrapped, so the hot paths pay nothing.
+ENABLED = os.environ.get("PLANTS_INSTRUMENT", "0") not in ("", "0")
+# The dump goes to PLANTS_INSTRUMENT_FILE, else to the cache dir
+DUMP_PATH = os.environ.get("PLANTS_INSTRUMENT_FILE")
+
+
+class Histogram:
+    # Millisecond timings in power-of-two buckets (bucket i holds < 2**i ms,
+    # starting at 1/64 ms), enough for percentiles without keeping samples.
+    BUCKETS = 24
+    BASE = 1 / 64
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.last = 0.0
+        self.buckets = [0] * self.BUCKETS
+
+    def record(self, ms: float):
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        index = 0 if ms <= self.BASE else min(int(math.log2(ms / self.BASE)) + 1, self.BUCKETS - 1)
+        self.buckets[index] += 1
+
+    def percentile(self, pct: float) -> float:
+        # Upper bound of the bucket holding the pct-th sample
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.BASE * 2 ** index, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "last_ms": round(self.last, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+        }
+
+
+_histograms = {}
+_gauges = {}
+
+
+def record(stage: str, ms: float):
+    hist = _histograms.get(stage)
+    if hist is None:
+        hist = _histograms[stage] = Histogram()
+    hist.record(ms)
+
+
+def set_gauge(name: str, value):
+    _gauges[name] = value
+
+
+def last(stage: str) -> float:
+    hist = _histograms.get(stage)
+    return hist.last if hist else 0.0
+
+
+def percentile(stage: str, pct: float) -> float:
+    hist = _histograms.get(stage)
+    return hist.percentile(pct) if hist else 0.0
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(stage, (time.perf_counter() - start) * 1000)
+        return wrapper
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, fn):
+        return fn
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(stage: str):
+    # Context manager or decorator:
+    #     with timed("search"): ...
+    #     @timed("flow_layout.do_layout")
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+
+def snapshot() -> dict:
+    return {
+        "stages": {name: hist.summary() for name, hist in sorted(_histograms.items())},
+        "gauges": dict(_gauges),
+    }
+
+
+def reset():
+    _histograms.clear()
+    _gauges.clear()
+
+
+def dump_path() -> str:
+    if DUMP_PATH:
+        return DUMP_PATH
+    from .snapshot import cache_dir
+    return os.path.join(cache_dir(), "instrumentation.json")
+
+
+def dump(path: str = None):
+    path = path or dump_path()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot(), f, indent=2)
+        logger.info("Instrumentation written to %s", path)
+    except OSError as e:
+        logger.error("Could not write instrumentation to %s: %s", path, e)
+
+
+if ENABLED:
+    atexit.register(dump)
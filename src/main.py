@@ -1,25 +1,41 @@
 import sys
 import os
+import time
+
+_START = time.perf_counter()
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QStackedWidget,
-                             QPushButton, QHBoxLayout, QFrame, QGraphicsDropShadowEffect)
-from PyQt5.QtCore import Qt
+                             QPushButton, QHBoxLayout, QFrame, QShortcut)
+from PyQt5.QtCore import QObject, QEvent, QTimer
+from PyQt5.QtGui import QColor, QPainter, QKeySequence
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.core import DataManager
-from src.ui_shared import STYLES
-from src.views import HomeTab, ListTab
+from src import instrument, profiling, snapshot
+from src.history import History
+from src.core import catalogue_paths
+from src.idle import IdleScheduler
+from src.ui_shared import STYLES, ShadowRenderer, InstrumentOverlay
+
+
+# Captures a cProfile of the current search (see MainWindow.profile_query)
+PROFILE_QUERY_SHORTCUT = "Ctrl+Shift+P"
+HISTORY_SYNC_MS = 1000
 
 
 class FloatingNavBar(QFrame):
+    shadow = ShadowRenderer(blur=14, offset=(0, 5), color=QColor(0, 0, 0, 160))
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedSize(220, 60)
+        left, top, right, bottom = self.shadow.margins()
+        self.setFixedSize(220 + left + right, 60 + top + bottom)
         self.setStyleSheet("""
             QFrame {
                 background-color: rgba(255, 255, 255, 200);
                 border-radius: 30px;
                 border: 1px solid rgba(255, 255, 255, 150);
+                margin: %dpx %dpx %dpx %dpx;
             }
             QPushButton {
                 background: transparent;
@@ -36,16 +52,10 @@ class FloatingNavBar(QFrame):
             QPushButton:hover:!checked {
                 background-color: rgba(0,0,0,10);
             }
-        """)
-
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(Qt.black)
-        shadow.setOffset(0, 5)
-        self.setGraphicsEffect(shadow)
+        """ % (top, right, bottom, left))
 
         layout = QHBoxLayout(self)
-        layout.setContentsMargins(10, 5, 10, 5)
+        layout.setContentsMargins(10 + left, 5 + top, 10 + right, 5 + bottom)
 
         self.btn_home = QPushButton("Home")
         self.btn_home.setCheckable(True)
@@ -58,28 +68,84 @@ class FloatingNavBar(QFrame):
         layout.addWidget(self.btn_home)
         layout.addWidget(self.btn_list)
 
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.shadow.paint(painter, self.rect(), 30)
+        painter.end()
+        super().paintEvent(event)
+
+
+class StartupProfiler(QObject):
+    # Records named checkpoints from process start and reports them once the
+    # main window has painted for the first time.
+    def __init__(self, on_done=None):
+        super().__init__()
+        self.marks = []
+        self.on_done = on_done
+        self._last = _START
+        self._painted = False
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last))
+        self._last = now
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self._painted:
+            self._painted = True
+            # Let the paint finish before taking the final checkpoint
+            QTimer.singleShot(0, self._finish)
+        return False
+
+    def _finish(self):
+        self.mark("first_paint")
+        if self.on_done:
+            self.on_done()
+
+    def report(self):
+        lines = [f"{name:<14}{elapsed * 1000:>9.1f} ms" for name, elapsed in self.marks]
+        lines.append(f"{'total':<14}{(self._last - _START) * 1000:>9.1f} ms")
+        return "\n".join(lines)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
         self.setWindowTitle("Indoor Plants Catalogue")
         self.resize(1000, 700)
 
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_path = os.path.join(base_dir, "data", "plants_data_new.csv")
-
-        if not os.path.exists(data_path):
-            data_path = os.path.join(base_dir, "data", "plants.csv")
+        # Views pull in most of the widget code; import them only once a window exists
+        from src.views import HomeTab, DETAIL_IMAGE_SIZE, prefetch_images
 
-        self.dm = DataManager(data_path)
+        if profiler:
+            profiler.mark("views_import")
+        # Sources unchanged since the last run come back from the warm-start
+        # snapshot instead of being parsed again (PLANTS_SNAPSHOT=0 disables it)
+        self.paths = catalogue_paths()
+        self.dm, session = snapshot.load(self.paths)
+        if profiler:
+            profiler.mark("data_load")
         self.setStyleSheet(STYLES)
 
+        # Favorites and recently viewed plants; changes are synced to disk in
+        # batches, HISTORY_SYNC_MS after the first unsynced one
+        self.history = History()
+        self._history_sync = QTimer(self)
+        self._history_sync.setSingleShot(True)
+        self._history_sync.setInterval(HISTORY_SYNC_MS)
+        self._history_sync.timeout.connect(self.history.flush)
+        self.history.add_listener(self._schedule_history_sync)
+        if profiler:
+            profiler.mark("history")
+
         self.stack = QStackedWidget()
-        self.home_tab = HomeTab(self.dm)
-        self.list_tab = ListTab(self.dm)
+        self.home_tab = HomeTab(self.dm, self.history)
+        # Built a few cards at a time while idle, or all at once on the first
+        # visit to the List tab (see _ensure_list_tab)
+        self.list_tab = None
+        self._list_tab_build = self._prebuild_list_tab()
 
         self.stack.addWidget(self.home_tab)
-        self.stack.addWidget(self.list_tab)
         self.setCentralWidget(self.stack)
 
         self.navbar = FloatingNavBar(self)
@@ -87,16 +153,84 @@ class MainWindow(QMainWindow):
         self.navbar.btn_home.clicked.connect(lambda: self.switch_tab(0))
         self.navbar.btn_list.clicked.connect(lambda: self.switch_tab(1))
 
+        # PLANTS_INSTRUMENT=1 shows live timings over the window
+        self.overlay = InstrumentOverlay(self) if instrument.ENABLED else None
+        QShortcut(QKeySequence(PROFILE_QUERY_SHORTCUT), self, self.profile_query)
+
+        if session.get("home"):
+            self.home_tab.restore_session(session["home"])
+        # Applied when the List tab is first built
+        self._list_session = session.get("list")
+        if session.get("tab") == 1:
+            self.switch_tab(1)
+
+        # Work nobody has asked for yet, done while the user is idle: the
+        # search/sort/filter indexes, the top plants' detail images and the
+        # List tab's first screen of cards
+        self.idle = IdleScheduler(self)
+        self.idle.add("catalogue", self.dm.warm_up(), priority=0)
+        self.idle.add("images", prefetch_images(self.dm.get_top_10(), DETAIL_IMAGE_SIZE), priority=1)
+        self.idle.add("list_tab", self._list_tab_build, priority=2)
+        if profiler:
+            profiler.mark("home_tab")
+
+    def _schedule_history_sync(self):
+        if not self._history_sync.isActive():
+            self._history_sync.start()
+
+    def _ensure_list_tab(self):
+        # Runs whatever the idle prebuild has not done yet; the scheduler then
+        # finds the task finished
+        for _ in self._list_tab_build:
+            pass
+        return self.list_tab
+
+    def _prebuild_list_tab(self):
+        # The empty tab first, then its search with the cards built a few per
+        # step, so no step keeps input waiting for long
+        from src.views import ListTab
+        tab = ListTab(self.dm, search=False)
+        self.stack.addWidget(tab)
+        if self._list_session:
+            tab.restore_session(self._list_session, search=False)
+        yield 0, 1
+        yield from tab.search_in_steps()
+        self.list_tab = tab
+        if self._list_session:
+            tab.restore_scroll(self._list_session)
+
     def switch_tab(self, index):
         if index == 0:
             self.stack.setCurrentWidget(self.home_tab)
             self.navbar.btn_home.setChecked(True)
             self.navbar.btn_list.setChecked(False)
         else:
-            self.stack.setCurrentWidget(self.list_tab)
+            self.stack.setCurrentWidget(self._ensure_list_tab())
             self.navbar.btn_list.setChecked(True)
             self.navbar.btn_home.setChecked(False)
 
+    def profile_query(self):
+        # Runs the visible tab's search again under cProfile, uncached, so
+        # the capture shows where a slow search spends its time
+        tab = self.stack.currentWidget()
+        self.dm.clear_cache()
+        path = profiling.capture(tab.perform_search)
+        tab.status_label.setText(f"{tab.status_label.text()}  Profile saved to {os.path.basename(path)}.")
+
+    def session_state(self) -> dict:
+        list_tab = self.list_tab
+        return {
+            "tab": 0 if self.stack.currentWidget() is self.home_tab else 1,
+            "home": self.home_tab.session_state(),
+            "list": list_tab.session_state() if list_tab else self._list_session,
+        }
+
+    def closeEvent(self, event):
+        self.history.close()
+        if snapshot.ENABLED:
+            snapshot.save(self.paths, self.dm, self.session_state())
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         nav_w = self.navbar.width()
         nav_h = self.navbar.height()
@@ -109,8 +243,25 @@ class MainWindow(QMainWindow):
         super().resizeEvent(event)
 
 
+def profile_startup():
+    # `python src/main.py --profile-startup`: print startup timings and exit
+    profiler = StartupProfiler()
+    profiler.mark("imports")
+    app = QApplication(sys.argv)
+    profiler.on_done = app.quit
+    profiler.mark("qapplication")
+    window = MainWindow(profiler)
+    window.installEventFilter(profiler)
+    window.show()
+    app.exec_()
+    print(profiler.report())
+
+
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+        sys.exit(0)
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,198 @@
+import cProfile
+import dataclasses
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from . import instrument
+
+logger = logging.getLogger(__name__)
+
+# Per-query profiling is off unless PLANTS_PROFILE_QUERIES is set (to anything
+# but "0"). When on, every query carries a QueryProfile that is finished by
+# whoever consumed the result, passed to the registered hooks, and written to
+# the slow-query log if it took at least PLANTS_SLOW_QUERY_MS. The log holds
+# one JSON object per line and is rotated at SLOW_LOG_BYTES; it is kept in
+# the cache dir unless PLANTS_SLOW_QUERY_LOG names another file.
+ENABLED = os.environ.get("PLANTS_PROFILE_QUERIES", "0") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("PLANTS_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("PLANTS_SLOW_QUERY_LOG")
+SLOW_LOG_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+# Finished profiles kept for inspection, newest last
+RECENT_PROFILES = 100
+# Functions listed when a capture is logged
+CAPTURE_TOP = 25
+
+_hooks = []
+_recent = deque(maxlen=RECENT_PROFILES)
+_slow_log = logging.getLogger(f"{__name__}.slow")
+_slow_log.propagate = False
+_slow_log.setLevel(logging.INFO)
+_slow_file = None
+
+
+class QueryProfile:
+    # Where one query's time went, in milliseconds per phase:
+    #   plan    cache lookup, filter ranges, ordering the matches (and any
+    #           sort order or index built on first use)
+    #   scan    the match loop, summed over however many pages it ran for
+    #   render  turning the results into widgets or JSON, if the caller times it
+    # A query over several catalogues has one profile shared by its sources;
+    # `versions` holds the data version each of them answered from.
+    def __init__(self, query, mode="all", by_rating=False, filters=None, word_start=False):
+        self.query = query
+        self.mode = mode
+        self.by_rating = by_rating
+        self.filters = filters
+        self.word_start = word_start
+        self.started = time.time()
+        self.versions = {}
+        self.phases = {}
+        self.cache_hits = 0
+        self.finished = False
+        self._results = []
+
+    def attach(self, source, version, result):
+        self.versions[source] = version
+        self._results.append(result)
+        result.profile = self
+
+    def add(self, phase, ms):
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    @contextmanager
+    def phase(self, name):
+        # Time of the block less any other phase timed inside it, as when a
+        # grid pulls result pages (a scan) while it renders
+        before = self.total_ms
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.add(name, elapsed - (self.total_ms - before))
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.phases.values())
+
+    @property
+    def matches(self) -> int:
+        # Matches found so far; the full count once every scan has finished
+        return sum(r.progress()[0] for r in self._results)
+
+    @property
+    def rows_scanned(self) -> int:
+        return sum(r.progress()[1] for r in self._results)
+
+    def as_dict(self) -> dict:
+        filters = self.filters
+        if dataclasses.is_dataclass(filters):
+            filters = {k: v for k, v in dataclasses.asdict(filters).items() if v is not None}
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "query": self.query,
+            "mode": self.mode,
+            "by_rating": self.by_rating,
+            "filters": filters or None,
+            "word_start": self.word_start,
+            "versions": self.versions,
+            "rows_scanned": self.rows_scanned,
+            "matches": self.matches,
+            "cache_hits": self.cache_hits,
+            "phases_ms": {name: round(ms, 3) for name, ms in self.phases.items()},
+            "total_ms": round(self.total_ms, 3),
+        }
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        _recent.append(self)
+        if instrument.ENABLED:
+            for name, ms in self.phases.items():
+                instrument.record(f"query.{name}", ms)
+        for hook in list(_hooks):
+            try:
+                hook(self)
+            except Exception:
+                logger.exception("Query profile hook %r failed", hook)
+        if self.total_ms >= SLOW_QUERY_MS:
+            _slow_handler()
+            _slow_log.info(json.dumps(self.as_dict(), ensure_ascii=False))
+
+
+def slow_query_log_path() -> str:
+    if SLOW_QUERY_LOG:
+        return os.path.abspath(SLOW_QUERY_LOG)
+    from .snapshot import cache_dir
+    return os.path.abspath(os.path.join(cache_dir(), "slow_queries.log"))
+
+
+def _slow_handler():
+    # Opened on the first slow query, so nothing is created until there is one
+    global _slow_file
+    path = slow_query_log_path()
+    if _slow_file is not None:
+        if _slow_file.baseFilename == path:
+            return
+        _slow_log.removeHandler(_slow_file)
+        _slow_file.close()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _slow_file = logging.handlers.RotatingFileHandler(path, maxBytes=SLOW_LOG_BYTES,
+                                                      backupCount=SLOW_LOG_BACKUPS, encoding="utf-8")
+    _slow_file.setFormatter(logging.Formatter("%(message)s"))
+    _slow_log.addHandler(_slow_file)
+
+
+def add_hook(fn):
+    # fn(profile) is called with every finished QueryProfile
+    _hooks.append(fn)
+
+
+def remove_hook(fn):
+    if fn in _hooks:
+        _hooks.remove(fn)
+
+
+def recent():
+    return list(_recent)
+
+
+def phase(profile, name):
+    # profile.phase(name), or nothing when the result was not profiled
+    return profile.phase(name) if profile is not None else nullcontext()
+
+
+def finish(profile):
+    if profile is not None:
+        profile.finish()
+
+
+def capture(fn, *args, path=None):
+    # Runs fn(*args) once under cProfile, with query profiling on, and saves
+    # the stats (for pstats or snakeviz) next to the slow-query log. The
+    # slowest functions by cumulative time are logged. Returns the path.
+    global ENABLED
+    if path is None:
+        folder = os.path.dirname(slow_query_log_path())
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, time.strftime("query-%Y%m%d-%H%M%S.prof"))
+    enabled, ENABLED = ENABLED, True
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(fn, *args)
+    finally:
+        ENABLED = enabled
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(CAPTURE_TOP)
+    logger.info("Query profile written to %s\n%s", path, out.getvalue())
+    return path
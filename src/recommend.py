@@ -0,0 +1,345 @@
+import copy
+import heapq
+import math
+import random
+import zlib
+from array import array
+from typing import List, Sequence, Tuple
+
+from .core import COLUMNAR_MIN_ROWS, HAS_NUMPY, Plant, _numpy, normalize_text, parse_measure
+
+# Similarity blends two signals, each in [0, 1]: closeness of the
+# (rating, O2, CO2) vector, scaled to the catalogue's ranges, and the MinHash
+# estimate of Jaccard overlap between name/description word sets.
+NUMERIC_WEIGHT = 0.5
+TEXT_WEIGHT = 0.5
+
+LEAF_SIZE = 16
+NUM_HASHES = 8
+BAND_ROWS = 2
+# Bounds on the text side of a query: LSH buckets of common words can hold
+# much of the catalogue, so only the first entries of each are looked at
+BUCKET_SCAN = 32
+TEXT_CANDIDATES = 64
+# Share of changed plants after which update() rebuilds instead of patching
+REBUILD_FRACTION = 0.1
+
+_PRIME = (1 << 31) - 1
+_rng = random.Random(1729)
+_HASH_PARAMS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(NUM_HASHES)]
+_EMPTY_SIGNATURE = (_PRIME,) * NUM_HASHES
+_MAX_DISTANCE = math.sqrt(3)
+
+
+class KDTree:
+    # Static 3-d tree stored implicitly: every subtree is a slice of the
+    # slot arrays whose middle slot holds its median on axis depth % 3; the
+    # slots before it hold values <= the median, the slots after it >= it.
+    # Points removed after the build keep their slot with id -1.
+    def __init__(self, axes: Sequence[Sequence[float]], ids: Sequence[int]):
+        axes = [array('d', a) for a in axes]
+        n = len(axes[0])
+        if HAS_NUMPY and n >= COLUMNAR_MIN_ROWS:
+            order = self._order_numpy(axes, n)
+        else:
+            order = self._order(axes, n)
+        self.xs, self.ys, self.zs = (array('d', (a[i] for i in order)) for a in axes)
+        self.ids = array('l', (ids[i] for i in order))
+
+    @staticmethod
+    def _order(axes, n):
+        order = list(range(n))
+        stack = [(0, n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            order[lo:hi] = sorted(order[lo:hi], key=axes[axis].__getitem__)
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, (axis + 1) % 3))
+            stack.append((mid + 1, hi, (axis + 1) % 3))
+        return order
+
+    @staticmethod
+    def _order_numpy(axes, n):
+        # Same layout; a partition around the middle is all a split needs
+        np = _numpy()
+        columns = [np.frombuffer(a, dtype=np.float64) for a in axes]
+        order = np.arange(n)
+        stack = [(0, n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            mid = (lo + hi) // 2
+            segment = order[lo:hi]
+            order[lo:hi] = segment[np.argpartition(columns[axis][segment], mid - lo)]
+            stack.append((lo, mid, (axis + 1) % 3))
+            stack.append((mid + 1, hi, (axis + 1) % 3))
+        return order.tolist()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def remapped(self, new_ids: Sequence[int]) -> "KDTree":
+        # Copy with point ids after a reload: new_ids[old id], -1 for removed
+        # points. The slot arrays are shared; neither tree changes them.
+        tree = copy.copy(self)
+        tree.ids = array('l', (new_ids[i] if i >= 0 else -1 for i in self.ids))
+        return tree
+
+    def nearest(self, point, k: int, skip=None) -> List[Tuple[float, int]]:
+        # (squared distance, id) of the k nearest points, closest first
+        px, py, pz = point
+        xs, ys, zs, ids = self.xs, self.ys, self.zs, self.ids
+        split_axes = (xs, ys, zs)
+        heap = []  # max-heap of (-squared distance, id)
+
+        def consider(s):
+            i = ids[s]
+            if i < 0 or (skip is not None and skip(i)):
+                return
+            dx = xs[s] - px
+            dy = ys[s] - py
+            dz = zs[s] - pz
+            d = dx * dx + dy * dy + dz * dz
+            if len(heap) < k:
+                heapq.heappush(heap, (-d, i))
+            elif d < -heap[0][0]:
+                heapq.heapreplace(heap, (-d, i))
+
+        def visit(lo, hi, axis):
+            if hi - lo <= LEAF_SIZE:
+                for s in range(lo, hi):
+                    i = ids[s]
+                    if i < 0 or (skip is not None and skip(i)):
+                        continue
+                    dx = xs[s] - px
+                    dy = ys[s] - py
+                    dz = zs[s] - pz
+                    d = dx * dx + dy * dy + dz * dz
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, i))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, i))
+                return
+            mid = (lo + hi) // 2
+            consider(mid)
+            diff = point[axis] - split_axes[axis][mid]
+            child = (axis + 1) % 3
+            if diff < 0:
+                visit(lo, mid, child)
+                far = (mid + 1, hi)
+            else:
+                visit(mid + 1, hi, child)
+                far = (lo, mid)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far[0], far[1], child)
+
+        if ids:
+            visit(0, len(ids), 0)
+        return sorted((-d, i) for d, i in heap)
+
+
+class Recommender:
+    # "Similar plants" index, built once per catalogue: a KD-tree over the
+    # normalized numeric features plus MinHash signatures of each plant's
+    # words, banded into LSH buckets. A query scores the numeric and text
+    # candidates together, so it touches a bounded number of plants.
+    def __init__(self, plants: List[Plant]):
+        self._token_hashes = {}
+        self.build(plants)
+
+    def build(self, plants: List[Plant]):
+        # A copy, so update() can diff against it even if the caller's list
+        # was changed in place
+        self.plants = plants = list(plants)
+        self._shared_signatures = {}
+        self._ranges = []
+        axes = []
+        for values in self._features(plants):
+            low, span, mean = self._fit(values)
+            self._ranges.append((low, span, mean))
+            axes.append([((mean if math.isnan(v) else v) - low) / span for v in values])
+        self._points = list(zip(*axes))
+        self.tree = KDTree(axes, range(len(plants)))
+        self._pending = []
+        self._stale = 0
+        self._index_text([self._signature(p) for p in plants])
+
+    def update(self, plants: List[Plant]):
+        # Reload: plants equal to one already indexed (same id and fields)
+        # keep their point and signature. New or changed plants go to a
+        # pending list scanned on each query, removed ones become tombstones
+        # in the tree; once those exceed REBUILD_FRACTION the index is rebuilt.
+        old_by_id = {}
+        for i, p in enumerate(self.plants):
+            old_by_id.setdefault(p.id, i)
+
+        new_ids = array('l', [-1]) * len(self.plants)
+        points = [None] * len(plants)
+        signatures = [None] * len(plants)
+        added = []
+        for j, p in enumerate(plants):
+            i = old_by_id.pop(p.id, None)
+            if i is not None and self.plants[i] == p:
+                new_ids[i] = j
+                points[j] = self._points[i]
+                signatures[j] = self._signatures[i]
+            else:
+                added.append(j)
+
+        stale = self._stale + len(added) + len(old_by_id)
+        if stale > REBUILD_FRACTION * max(len(plants), 1):
+            self.build(plants)
+            return
+
+        self.tree = self.tree.remapped(new_ids)
+        pending = [new_ids[i] for i in self._pending if new_ids[i] >= 0]
+        for j in added:
+            points[j] = self._point(plants[j])
+            signatures[j] = self._signature(plants[j])
+        self.plants = list(plants)
+        self._points = points
+        self._pending = pending + added
+        self._stale = stale
+        self._index_text(signatures)
+
+    def updated(self, plants: List[Plant]) -> "Recommender":
+        # update() applied to a copy, leaving this index untouched for
+        # threads still querying it
+        other = copy.copy(self)
+        other.update(plants)
+        return other
+
+    @staticmethod
+    def _fit(values):
+        # (low, span, mean) for scaling a feature into [0, 1]; non-numeric
+        # values sit at the mean
+        numeric = [v for v in values if not math.isnan(v)]
+        if not numeric:
+            return 0.0, 1.0, 0.0
+        low, high = min(numeric), max(numeric)
+        return low, (high - low) or 1.0, sum(numeric) / len(numeric)
+
+    @staticmethod
+    def _features(plants):
+        return ([p.rating for p in plants],
+                [parse_measure(p.o2_data) for p in plants],
+                [parse_measure(p.co2_data) for p in plants])
+
+    def _point(self, plant: Plant) -> Tuple[float, float, float]:
+        values = (plant.rating, parse_measure(plant.o2_data), parse_measure(plant.co2_data))
+        return tuple(((mean if math.isnan(v) else v) - low) / span
+                     for v, (low, span, mean) in zip(values, self._ranges))
+
+    def _words(self, text: str):
+        # MinHash vectors of the words in `text`; numbers and words under three
+        # letters say nothing about the plant and are left out
+        hashes = self._token_hashes
+        vectors = []
+        for token in set(normalize_text(text).split()):
+            if len(token) < 3 or token.isdigit():
+                continue
+            vector = hashes.get(token)
+            if vector is None:
+                x = zlib.crc32(token.encode("utf-8"))
+                vector = hashes[token] = tuple((a * x + b) % _PRIME for a, b in _HASH_PARAMS)
+            vectors.append(vector)
+        return vectors
+
+    @staticmethod
+    def _combine(vectors) -> Tuple[int, ...]:
+        if not vectors:
+            return _EMPTY_SIGNATURE
+        if len(vectors) == 1:
+            return vectors[0]
+        return tuple(map(min, *vectors))
+
+    def _signature(self, plant: Plant) -> Tuple[int, ...]:
+        # Scientific names and descriptions repeat across plants, so their
+        # part of the signature is kept per distinct pair
+        key = (plant.scientific_name, plant.description)
+        shared = self._shared_signatures.get(key)
+        if shared is None:
+            shared = self._shared_signatures[key] = self._combine(
+                self._words(plant.scientific_name) + self._words(plant.description))
+        vectors = self._words(plant.name)
+        if not vectors:
+            return shared
+        if shared is not _EMPTY_SIGNATURE:
+            vectors.append(shared)
+        return self._combine(vectors)
+
+    def _index_text(self, signatures):
+        # Plants with the same signature share one group; LSH buckets list
+        # the distinct signatures agreeing on one band
+        self._signatures = signatures
+        groups = {}
+        for i, sig in enumerate(signatures):
+            members = groups.get(sig)
+            if members is None:
+                groups[sig] = [i]
+            else:
+                members.append(i)
+        bands = [{} for _ in range(NUM_HASHES // BAND_ROWS)]
+        for sig in groups:
+            if sig is _EMPTY_SIGNATURE:
+                continue
+            for b, table in enumerate(bands):
+                key = sig[b * BAND_ROWS:(b + 1) * BAND_ROWS]
+                bucket = table.get(key)
+                if bucket is None:
+                    table[key] = [sig]
+                else:
+                    bucket.append(sig)
+        self._groups = groups
+        self._bands = bands
+
+    def _text_candidates(self, sig) -> List[int]:
+        if sig is _EMPTY_SIGNATURE:
+            return []
+        hits = {}
+        for b, table in enumerate(self._bands):
+            bucket = table.get(sig[b * BAND_ROWS:(b + 1) * BAND_ROWS], ())
+            for other in bucket[:BUCKET_SCAN]:
+                hits[other] = hits.get(other, 0) + 1
+        candidates = []
+        for other in sorted(hits, key=hits.__getitem__, reverse=True):
+            candidates.extend(self._groups[other])
+            if len(candidates) >= TEXT_CANDIDATES:
+                break
+        return candidates[:TEXT_CANDIDATES]
+
+    def similar(self, plant: Plant, k: int = 5) -> List[Tuple[float, Plant]]:
+        # (score, plant) of the k plants most like `plant`, best first. The
+        # plant itself is left out; it need not belong to this catalogue.
+        if k <= 0 or not self.plants:
+            return []
+        plants = self.plants
+        point = self._point(plant)
+        sig = self._signature(plant)
+        is_self = lambda i: plants[i] is plant
+
+        candidates = {i for _, i in self.tree.nearest(point, 3 * k, is_self)}
+        candidates.update(self._pending)
+        candidates.update(self._text_candidates(sig))
+
+        points = self._points
+        signatures = self._signatures
+        overlaps = {}
+        scored = []
+        for i in candidates:
+            if plants[i] is plant:
+                continue
+            other = signatures[i]
+            overlap = overlaps.get(other)
+            if overlap is None:
+                if sig is _EMPTY_SIGNATURE:
+                    overlap = 0.0
+                else:
+                    overlap = sum(map(int.__eq__, sig, other)) / NUM_HASHES
+                overlaps[other] = overlap
+            closeness = max(0.0, 1.0 - math.dist(point, points[i]) / _MAX_DISTANCE)
+            scored.append((-(NUMERIC_WEIGHT * closeness + TEXT_WEIGHT * overlap), plants[i].name, i))
+        return [(-neg, plants[i]) for neg, _, i in heapq.nsmallest(k, scored)]
@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import profiling
+from src.core import CatalogueSet, PlantFilter, catalogue_paths
+from src.export import plant_dict
+
+logger = logging.getLogger(__name__)
+
+# Headless query server: one process holds the catalogue and answers JSON
+# queries over HTTP (TCP or a Unix socket), so kiosks and tools share it.
+#
+#   GET /search?q=&mode=all|top&by_rating=0|1&offset=&limit=
+#               &min_rating=&max_rating=&min_o2=&max_o2=&min_co2=&max_co2=
+#   GET /top?k=10&rating=&o2=&co2=        (weights, default rating only)
+#   GET /plants/<id>                       one plant
+#   GET /plants/<id>/similar?k=5
+#   GET /health
+#
+# Searches without a limit, or with one above STREAM_ROWS, are streamed as
+# chunked JSON, STREAM_CHUNK rows at a time; everything else is rendered once
+# and kept in an LRU of encoded responses keyed by the catalogue versions.
+#
+# Routing, scans and encoding run on a pool of QUERY_WORKERS threads, so a
+# long search doesn't hold up the event loop and the other connections.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+STREAM_ROWS = 500
+STREAM_CHUNK = 500
+CACHE_ENTRIES = 512
+CACHE_BYTES = 16 * 1024 * 1024
+ENCODED_PLANTS = 200_000
+QUERY_WORKERS = int(os.environ.get("PLANTS_QUERY_WORKERS", "4"))
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    # LRU of encoded response bodies, bounded by count and total size
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes or self.max_entries <= 0:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self._entries[key] = body
+        self.bytes += len(body)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Stream:
+    # A result too large to render in one piece: `head` fields, then the
+    # plants of `results` from `offset` on, as {"...": ..., "results": [...]}
+    def __init__(self, head, results, offset, limit):
+        self.head = head
+        self.results = results
+        self.offset = offset
+        self.limit = limit
+
+
+def _number(params, name, default=None, cast=float):
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise HttpError(400, f"{name} must be a number")
+
+
+def _count(params, name, default):
+    value = _number(params, name, default, int)
+    if value is not None and value < 1:
+        raise HttpError(400, f"{name} must be at least 1")
+    return value
+
+
+def _flag(params, name):
+    return params.get(name, "0").lower() in ("1", "true", "yes")
+
+
+class QueryServer:
+    def __init__(self, catalogues: CatalogueSet, cache: ResponseCache = None, workers: int = QUERY_WORKERS):
+        self.catalogues = catalogues
+        self.cache = cache or ResponseCache()
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        self._by_id = None
+        self._by_id_versions = None
+        # Encoded JSON per plant, keyed by id() with the plant kept alongside
+        # so the id can't be reused while the entry exists
+        self._encoded = {}
+        self._encoded_versions = None
+
+    def versions(self):
+        return tuple(dm.version for dm in self.catalogues.sources.values())
+
+    def warm_up(self):
+        # Builds indexes and the recommender before the first request needs them
+        for _ in self.catalogues.warm_up():
+            pass
+        self._id_index()
+
+    def encode(self, plants) -> str:
+        versions = self.versions()
+        if self._encoded_versions != versions or len(self._encoded) > ENCODED_PLANTS:
+            self._encoded = {}
+            self._encoded_versions = versions
+        encoded = self._encoded
+        parts = []
+        for p in plants:
+            entry = encoded.get(id(p))
+            if entry is None:
+                entry = encoded[id(p)] = (p, json.dumps(plant_dict(p), ensure_ascii=False))
+            parts.append(entry[1])
+        return ", ".join(parts)
+
+    def _id_index(self):
+        # Id lookup table, rebuilt when any source reloads; the first source
+        # listing an id wins, as in the merged results
+        versions = self.versions()
+        if self._by_id_versions != versions:
+            by_id = {}
+            for dm in self.catalogues.sources.values():
+                for p in dm.plants:
+                    by_id.setdefault(p.id, p)
+            self._by_id, self._by_id_versions = by_id, versions
+        return self._by_id
+
+    def plant(self, plant_id):
+        plant = self._id_index().get(plant_id)
+        if plant is None:
+            raise HttpError(404, f"No plant with id {plant_id}")
+        return plant
+
+    def route(self, path, params):
+        # A JSON-able value, or a Stream
+        if path == "/search":
+            return self.search(params)
+        if path == "/top":
+            return self.top(params)
+        if path == "/health":
+            return {"plants": sum(len(dm.plants) for dm in self.catalogues.sources.values()),
+                    "sources": self.catalogues.names,
+                    "cache": {"entries": len(self.cache), "bytes": self.cache.bytes,
+                              "hits": self.cache.hits, "misses": self.cache.misses}}
+        parts = path.split("/")
+        if len(parts) in (3, 4) and parts[1] == "plants":
+            plant = self.plant(unquote(parts[2]))
+            if len(parts) == 3:
+                return plant_dict(plant)
+            if parts[3] == "similar":
+                k = _count(params, "k", 5)
+                return {"results": [plant_dict(p) for p in self.catalogues.similar(plant, k)]}
+        raise HttpError(404, f"No route for {path}")
+
+    def search(self, params):
+        mode = params.get("mode", "all")
+        if mode not in ("all", "top"):
+            raise HttpError(400, "mode must be 'all' or 'top'")
+        filters = PlantFilter(**{f"{bound}_{column}": _number(params, f"{bound}_{column}")
+                                 for bound in ("min", "max") for column in ("rating", "o2", "co2")})
+        results = self.catalogues.query(params.get("q", ""), mode=mode, by_rating=_flag(params, "by_rating"),
+                                        filters=filters)
+        offset = max(_number(params, "offset", 0, int), 0)
+        limit = _count(params, "limit", None)
+        head = {"total": results.count(), "offset": offset}
+        if limit is None or limit > STREAM_ROWS:
+            return Stream(head, results, offset, limit)
+        plants = results.page(offset, limit)
+        with profiling.phase(results.profile, "render"):
+            head["results"] = [plant_dict(p) for p in plants]
+        profiling.finish(results.profile)
+        return head
+
+    def top(self, params):
+        # Every parameter but k is a weight, so a misspelled column is an error
+        k = _count(params, "k", 10)
+        weights = {name: _number(params, name) for name in params if name != "k"}
+        weights = {name: w for name, w in weights.items() if w is not None} or None
+        try:
+            top = self.catalogues.top_k(k, weights)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        return {"results": [plant_dict(p) for p in top]}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, keep_alive = request
+                await self._respond(writer, method, target, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as e:
+            await self._send(writer, e.status, self._error_body(e), False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        connection = headers.get("connection", "")
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        return method, target, keep_alive
+
+    @staticmethod
+    def _error_body(error):
+        return json.dumps({"error": str(error)}).encode("utf-8")
+
+    async def _respond(self, writer, method, target, keep_alive):
+        if method != "GET":
+            await self._send(writer, 405, self._error_body(HttpError(405, "Only GET is supported")), keep_alive)
+            return
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+
+        key = (path, tuple(sorted(params.items())), self.versions())
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self._workers, self.route, path, params)
+            except HttpError as e:
+                await self._send(writer, e.status, self._error_body(e), keep_alive)
+                return
+            except Exception as e:
+                logger.exception("Query %s failed", target)
+                await self._send(writer, 500, self._error_body(e), keep_alive)
+                return
+            if isinstance(result, Stream):
+                await self._stream(writer, result, keep_alive)
+                return
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            if path != "/health":
+                self.cache.put(key, body)
+        await self._send(writer, 200, body, keep_alive)
+
+    @staticmethod
+    def _headers(status, keep_alive, extra):
+        return (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n{extra}"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+
+    async def _send(self, writer, status, body, keep_alive):
+        writer.write(self._headers(status, keep_alive, f"Content-Length: {len(body)}\r\n") + body)
+        await writer.drain()
+
+    async def _stream(self, writer, stream, keep_alive):
+        def chunk(data):
+            return b"%x\r\n%s\r\n" % (len(data), data)
+
+        head = json.dumps(stream.head, ensure_ascii=False)
+        writer.write(self._headers(200, keep_alive, "Transfer-Encoding: chunked\r\n")
+                     + chunk(f'{head[:-1]}, "results": ['.encode("utf-8")))
+        def rows(start, size):
+            plants = stream.results.page(start, size)
+            with profiling.phase(stream.results.profile, "render"):
+                return len(plants), self.encode(plants)
+
+        loop = asyncio.get_running_loop()
+        sent = 0
+        while stream.limit is None or sent < stream.limit:
+            size = STREAM_CHUNK if stream.limit is None else min(STREAM_CHUNK, stream.limit - sent)
+            count, encoded = await loop.run_in_executor(self._workers, rows, stream.offset + sent, size)
+            if not count:
+                break
+            writer.write(chunk(((", " if sent else "") + encoded).encode("utf-8")))
+            sent += count
+            # Let other connections run between chunks
+            await writer.drain()
+        writer.write(chunk(b"]}") + b"0\r\n\r\n")
+        await writer.drain()
+        profiling.finish(stream.results.profile)
+
+
+async def serve(server: QueryServer, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path)
+        logger.info("Serving %s", unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        logger.info("Serving http://%s:%d", host, listener.sockets[0].getsockname()[1])
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve catalogue queries as JSON over HTTP")
+    parser.add_argument("catalogues", nargs="*",
+                        help="catalogue CSVs (default: PLANTS_CATALOGUES or the bundled catalogue)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port (default: %(default)s)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on this Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = QueryServer(CatalogueSet.load(args.catalogues or catalogue_paths()))
+    server.warm_up()
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import gc
+import hashlib
+import json
+import logging
+import os
+import struct
+import zlib
+from array import array
+from typing import Optional, Sequence, Tuple
+
+from .core import CatalogueSet, DataManager, Plant
+
+logger = logging.getLogger(__name__)
+
+# Warm-start snapshot: the parsed catalogues plus their derived indexes, and
+# the UI session (query and scroll per tab), saved on exit and restored on the
+# next launch for every source CSV whose size and mtime are unchanged.
+#
+# File layout (integers little-endian):
+#   header   MAGIC, version u16, meta length u32, meta crc32 u32
+#   meta     UTF-8 JSON: sources (path, stamp, sections) and the session
+#   body     section blobs; each section records offset, length and crc32
+# Sections per source: "text" (id, name, scientific name, O2, CO2,
+# description and search key columns, NUL-separated UTF-8), "rating"
+# (float64) and "order.name" / "order.rating" (int64 sort permutations).
+MAGIC = b"PLSN"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+TEXT_FIELDS = ("id", "name", "scientific_name", "o2_data", "co2_data", "description")
+
+# PLANTS_SNAPSHOT=0 turns snapshots off; PLANTS_CACHE_DIR moves them
+ENABLED = os.environ.get("PLANTS_SNAPSHOT", "1") not in ("", "0")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def cache_dir() -> str:
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("PLANTS_CACHE_DIR") or os.path.join(root, "plants")
+
+
+def snapshot_path(paths: Sequence[str]) -> str:
+    # One snapshot per set of sources
+    key = hashlib.sha1("\n".join(os.path.abspath(p) for p in paths).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir(), f"{key[:16]}.snap")
+
+
+def _stamp(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _encode_source(dm: DataManager):
+    state = dm.snapshot_state()
+    plants = state["plants"]
+    columns = [[getattr(p, name) for p in plants] for name in TEXT_FIELDS]
+    columns.append(state["keys"])
+    text = "\0".join("\0".join(column) for column in columns)
+    if text.count("\0") != len(columns) * len(plants) - 1 and plants:
+        raise SnapshotError("catalogue text contains NUL characters")
+    return {
+        "text": text.encode("utf-8"),
+        "rating": array('d', (p.rating for p in plants)).tobytes(),
+        "order.name": state["sort_orders"][False].tobytes(),
+        "order.rating": state["sort_orders"][True].tobytes(),
+    }
+
+
+def save(paths: Sequence[str], catalogues: CatalogueSet, session: dict,
+         path: Optional[str] = None) -> bool:
+    path = path or snapshot_path(paths)
+    sources = []
+    blobs = []
+    offset = 0
+    for src, dm in zip(paths, catalogues.sources.values()):
+        try:
+            stamp = _stamp(src)
+            sections = _encode_source(dm)
+        except (OSError, SnapshotError) as e:
+            logger.info("Not snapshotting %s: %s", src, e)
+            continue
+        entry = {"path": os.path.abspath(src), "count": len(dm.plants), "sections": {}, **stamp}
+        for name, blob in sections.items():
+            entry["sections"][name] = [offset, len(blob), zlib.crc32(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+        sources.append(entry)
+
+    meta = json.dumps({"sources": sources, "session": session}).encode("utf-8")
+    tmp_path = f"{path}.part"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(meta), zlib.crc32(meta)))
+            f.write(meta)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write snapshot %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = f.read()
+        if len(self.data) < HEADER.size:
+            raise SnapshotError("truncated header")
+        magic, version, meta_len, meta_crc = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise SnapshotError("not a snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"unsupported version {version}")
+        meta = self.data[HEADER.size:HEADER.size + meta_len]
+        if len(meta) != meta_len or zlib.crc32(meta) != meta_crc:
+            raise SnapshotError("metadata checksum mismatch")
+        self.meta = json.loads(meta)
+        self.body = HEADER.size + meta_len
+        self.sources = {entry["path"]: entry for entry in self.meta["sources"]}
+
+    @property
+    def session(self) -> dict:
+        return self.meta.get("session") or {}
+
+    def _section(self, entry, name) -> memoryview:
+        offset, length, crc = entry["sections"][name]
+        start = self.body + offset
+        view = memoryview(self.data)[start:start + length]
+        if len(view) != length or zlib.crc32(view) != crc:
+            raise SnapshotError(f"{name} checksum mismatch")
+        return view
+
+    def restore(self, path: str, columnar: Optional[bool] = None) -> Optional[DataManager]:
+        # The source's DataManager, or None if the CSV changed since the save
+        entry = self.sources.get(os.path.abspath(path))
+        try:
+            if entry is None or {k: entry[k] for k in ("size", "mtime_ns")} != _stamp(path):
+                return None
+        except OSError:
+            return None
+
+        n = entry["count"]
+        columns = str(self._section(entry, "text"), "utf-8").split("\0") if n else []
+        if len(columns) != n * (len(TEXT_FIELDS) + 1):
+            raise SnapshotError("text column size mismatch")
+        ratings = array('d')
+        ratings.frombytes(self._section(entry, "rating"))
+        orders = {}
+        for by_rating, name in ((False, "order.name"), (True, "order.rating")):
+            orders[by_rating] = order = array('q')
+            order.frombytes(self._section(entry, name))
+        if len(ratings) != n or any(len(order) != n for order in orders.values()):
+            raise SnapshotError("column size mismatch")
+
+        fields = [columns[i * n:(i + 1) * n] for i in range(len(TEXT_FIELDS))]
+        # Collection passes over the growing heap dominate building this
+        # many objects at once; nothing here creates cycles
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            plants = list(map(Plant, *fields, ratings))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        keys = columns[len(TEXT_FIELDS) * n:]
+        return DataManager.from_snapshot(path, plants, keys, orders, columnar=columnar)
+
+
+def load(paths: Sequence[str], path: Optional[str] = None,
+         columnar: Optional[bool] = None) -> Tuple[CatalogueSet, dict]:
+    # Catalogues for `paths`, restored from the snapshot where it is still
+    # valid and parsed from CSV otherwise, plus the saved session
+    snapshot = None
+    if ENABLED:
+        snapshot_file = path or snapshot_path(paths)
+        try:
+            snapshot = Snapshot(snapshot_file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, SnapshotError) as e:
+            logger.warning("Ignoring snapshot %s: %s", snapshot_file, e)
+
+    def open_source(src):
+        if snapshot is not None:
+            try:
+                dm = snapshot.restore(src, columnar=columnar)
+            except (ValueError, KeyError, SnapshotError) as e:
+                logger.warning("Snapshot of %s is unusable: %s", src, e)
+                dm = None
+            if dm is not None:
+                logger.info("Restored %d plants from snapshot.", len(dm.plants))
+                return dm
+        return DataManager(src, columnar=columnar)
+
+    catalogues = CatalogueSet.load(paths, columnar=columnar, loader=open_source)
+    return catalogues, snapshot.session if snapshot is not None else {}
@@ -1,6 +1,12 @@
-from PyQt5.QtWidgets import (QLayout, QFrame, QGraphicsDropShadowEffect, QStyle)
-from PyQt5.QtCore import Qt, QRect, QSize, QPoint
-from PyQt5.QtGui import QColor
+import time
+from contextlib import contextmanager
+
+from PyQt5.QtWidgets import (QApplication, QLayout, QFrame, QLabel, QStyle, QGraphicsScene,
+                             QGraphicsPixmapItem, QGraphicsBlurEffect, QWidgetItem)
+from PyQt5.QtCore import Qt, QEvent, QRect, QRectF, QSize, QPoint, QTimer
+from PyQt5.QtGui import QColor, QImage, QPainter, QPainterPath, QPixmap
+
+from . import instrument
 
 STYLES = """
     QMainWindow {
@@ -28,6 +34,22 @@ STYLES = """
         border: 1px solid rgba(255, 255, 255, 150);
         background-color: rgba(0, 0, 0, 80);
     }
+    QDoubleSpinBox {
+        background-color: rgba(0, 0, 0, 50);
+        border: 1px solid rgba(255, 255, 255, 50);
+        border-radius: 8px;
+        padding: 4px 8px;
+        color: white;
+        font-size: 12px;
+    }
+    QComboBox {
+        background-color: rgba(0, 0, 0, 50);
+        border: 1px solid rgba(255, 255, 255, 50);
+        border-radius: 12px;
+        padding: 8px 16px;
+        color: white;
+        font-size: 14px;
+    }
     QScrollArea, QScrollArea > QWidget > QWidget {
         background: transparent;
         border: none;
@@ -47,16 +69,139 @@ STYLES = """
 """
 
 
+class ShadowRenderer:
+    # Drop shadow painted from a cached nine-patch instead of a per-widget
+    # QGraphicsDropShadowEffect. The blurred rounded rect is rendered once per
+    # (radius, blur, color) at the smallest size that holds its corners; any
+    # widget size is then covered by stretching the edge and centre slices.
+    _cache = {}
+
+    def __init__(self, blur=10, offset=(0, 4), color=QColor(0, 0, 0, 60)):
+        self.blur = blur
+        self.offset = offset
+        self.color = QColor(color)
+
+    def margins(self):
+        # Room (left, top, right, bottom) the shadow needs around the body
+        spread = self.blur
+        dx, dy = self.offset
+        return (max(spread - dx, 0), max(spread - dy, 0),
+                max(spread + dx, 0), max(spread + dy, 0))
+
+    def _patch(self, radius):
+        key = (radius, self.blur, self.color.rgba())
+        pix = self._cache.get(key)
+        if pix is None:
+            pix = self._cache[key] = self._render(radius)
+        return pix
+
+    def _render(self, radius):
+        # The blur fades out within `blur` pixels, so pad the shape by that much
+        spread = self.blur
+        corner = radius + 2 * spread
+        size = 2 * corner + 1
+
+        shape = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        shape.fill(Qt.transparent)
+        painter = QPainter(shape)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(QRectF(spread, spread, size - 2 * spread, size - 2 * spread), radius, radius)
+        painter.end()
+
+        # Blur once, offscreen, through a throwaway scene
+        scene = QGraphicsScene()
+        item = QGraphicsPixmapItem(QPixmap.fromImage(shape))
+        effect = QGraphicsBlurEffect()
+        effect.setBlurRadius(self.blur)
+        item.setGraphicsEffect(effect)
+        scene.addItem(item)
+
+        blurred = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        blurred.fill(Qt.transparent)
+        painter = QPainter(blurred)
+        scene.render(painter, QRectF(0, 0, size, size), QRectF(0, 0, size, size))
+        painter.end()
+        return QPixmap.fromImage(blurred), corner
+
+    @staticmethod
+    def _slices(length, corner, size):
+        # (target offset, target length, source offset, source length) along
+        # one axis. Targets shorter than two corners take the outer halves of
+        # the (symmetric) patch instead of stretching a middle slice.
+        if length >= 2 * corner:
+            return ((0, corner, 0, corner),
+                    (corner, length - 2 * corner, corner, size - 2 * corner),
+                    (length - corner, corner, size - corner, corner))
+        head = length // 2
+        tail = length - head
+        return ((0, head, 0, head), (head, tail, size - tail, tail))
+
+    def paint(self, painter, rect, radius):
+        # `rect` is the whole widget; the body sits inside it at `margins()`
+        # and is clipped out so translucent frames don't show the shadow.
+        pix, corner = self._patch(radius)
+        left, top, right, bottom = self.margins()
+        spread = self.blur
+        dx, dy = self.offset
+        body = rect.adjusted(left, top, -right, -bottom)
+        target = body.adjusted(-spread + dx, -spread + dy, spread + dx, spread + dy)
+
+        body_path = QPainterPath()
+        body_path.addRoundedRect(QRectF(body), radius, radius)
+        clip = QPainterPath()
+        clip.addRect(QRectF(rect))
+        painter.save()
+        painter.setClipPath(clip.subtracted(body_path))
+
+        size = pix.width()
+        for tx, w, sx, sw in self._slices(target.width(), corner, size):
+            for ty, h, sy, sh in self._slices(target.height(), corner, size):
+                painter.drawPixmap(QRect(target.x() + tx, target.y() + ty, w, h), pix, QRect(sx, sy, sw, sh))
+        painter.restore()
+
+
+DEFAULT_SHADOW = ShadowRenderer()
+
+# The glass body is inset by the shadow margins so the shadow is painted
+# inside the widget's own rect
+_left, _top, _right, _bottom = DEFAULT_SHADOW.margins()
+STYLES += f"""
+    .GlassFrame {{
+        margin: {_top}px {_right}px {_bottom}px {_left}px;
+    }}
+"""
+
+
 class GlassFrame(QFrame):
+    # Set `shadow` to None on an instance to skip the drop shadow
+    shadow = DEFAULT_SHADOW
+    radius = 16
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setProperty("class", "GlassFrame")
 
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(0, 0, 0, 60))
-        shadow.setOffset(0, 4)
-        self.setGraphicsEffect(shadow)
+    def paintEvent(self, event):
+        if self.shadow is not None:
+            painter = QPainter(self)
+            self.shadow.paint(painter, self.rect(), self.radius)
+            painter.end()
+        super().paintEvent(event)
+
+
+@contextmanager
+def updates_suspended(widget):
+    # Batch changes to `widget` and its children: no repaints in between, one
+    # update once the block ends
+    was_enabled = widget.updatesEnabled()
+    widget.setUpdatesEnabled(False)
+    try:
+        yield widget
+    finally:
+        if was_enabled:
+            widget.setUpdatesEnabled(True)
 
 
 class FlowLayout(QLayout):
@@ -65,11 +210,46 @@ class FlowLayout(QLayout):
         self._hSpace = hSpacing
         self._vSpace = vSpacing
         self._items = []
+        # heightForWidth results until the next invalidate()
+        self._heights = {}
         self.setContentsMargins(margin, margin, margin, margin)
 
     def addItem(self, item):
         self._items.append(item)
 
+    def addWidgets(self, widgets):
+        # Bulk addWidget. Showing a widget makes the layout look it up among
+        # all items and lay out again, so adding N widgets one by one costs
+        # O(N^2); here the layout ignores those events until every widget is
+        # in, then lays out once.
+        parent = self.parentWidget()
+        show = parent is not None and parent.isVisible()
+        self.setEnabled(False)
+        try:
+            for widget in widgets:
+                self.addChildWidget(widget)
+                self._items.append(QWidgetItem(widget))
+                if show:
+                    widget.show()
+        finally:
+            self.setEnabled(True)
+        self.invalidate()
+
+    def clear(self):
+        # Removes and deletes every widget. The items are dropped together
+        # first, so each removal no longer scans (or shifts) the item list.
+        items, self._items = self._items, []
+        self.invalidate()
+        for item in items:
+            widget = item.widget()
+            if widget is not None:
+                widget.hide()
+                widget.deleteLater()
+
+    def invalidate(self):
+        self._heights.clear()
+        super(FlowLayout, self).invalidate()
+
     def horizontalSpacing(self):
         if self._hSpace >= 0: return self._hSpace
         return self.smartSpacing(QStyle.PM_LayoutHorizontalSpacing)
@@ -98,7 +278,10 @@ class FlowLayout(QLayout):
         return True
 
     def heightForWidth(self, width):
-        return self.doLayout(QRect(0, 0, width, 0), True)
+        height = self._heights.get(width)
+        if height is None:
+            height = self._heights[width] = self.doLayout(QRect(0, 0, width, 0), True)
+        return height
 
     def setGeometry(self, rect):
         super(FlowLayout, self).setGeometry(rect)
@@ -113,6 +296,7 @@ class FlowLayout(QLayout):
             size = size.expandedTo(item.minimumSize())
         return size + QSize(2 * self.contentsMargins().top(), 2 * self.contentsMargins().top())
 
+    @instrument.timed("layout.flow")
     def doLayout(self, rect, testOnly):
         x = rect.x()
         y = rect.y()
@@ -120,20 +304,77 @@ class FlowLayout(QLayout):
         spacing = 10
 
         for item in self._items:
-            wid = item.widget()
+            hint = item.sizeHint()
             spaceX = spacing
             spaceY = spacing
-            nextX = x + item.sizeHint().width() + spaceX
+            nextX = x + hint.width() + spaceX
             if nextX - spaceX > rect.right() and lineHeight > 0:
                 x = rect.x()
                 y = y + lineHeight + spaceY
-                nextX = x + item.sizeHint().width() + spaceX
+                nextX = x + hint.width() + spaceX
                 lineHeight = 0
 
             if not testOnly:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
+                item.setGeometry(QRect(QPoint(x, y), hint))
 
             x = nextX
-            lineHeight = max(lineHeight, item.sizeHint().height())
+            lineHeight = max(lineHeight, hint.height())
+
+        return y + lineHeight - rect.y()
+
+
+class InstrumentOverlay(QLabel):
+    # Small always-on-top readout of the instrumentation counters. Frames are
+    # counted from the top-level window's UpdateRequest events, one per
+    # backing-store flush; the gap between two frames goes to the "frame"
+    # stage unless the window was simply idle in between.
+    IDLE_GAP_MS = 250
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: #7CFC00; font-family: monospace;"
+            " font-size: 11px; padding: 6px; border-radius: 6px;")
+        self._frames = 0
+        self._since = time.perf_counter()
+        self._last_frame = 0.0
+        window.installEventFilter(self)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.refresh()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.UpdateRequest:
+            self._frames += 1
+            now = time.perf_counter()
+            gap = (now - self._last_frame) * 1000
+            if gap < self.IDLE_GAP_MS:
+                instrument.record("frame", gap)
+            self._last_frame = now
+        return False
+
+    def refresh(self):
+        now = time.perf_counter()
+        fps = self._frames / (now - self._since)
+        self._frames = 0
+        self._since = now
+
+        widgets = len(QApplication.allWidgets())
+        instrument.set_gauge("fps", round(fps, 1))
+        instrument.set_gauge("widgets_alive", widgets)
 
-        return y + lineHeight - rect.y()
\ No newline at end of file
+        search_ms = max(instrument.last("search.home"), instrument.last("search.list"))
+        render_ms = max(instrument.last("render.grid"), instrument.last("render.leaderboard"))
+        frame_ms = instrument.percentile("frame", 95)
+        self.setText(f"FPS     {fps:6.1f}\n"
+                     f"frame95 {frame_ms:6.1f} ms\n"
+                     f"search  {search_ms:6.1f} ms\n"
+                     f"render  {render_ms:6.1f} ms\n"
+                     f"widgets {widgets:6d}")
+        self.adjustSize()
+        self.move(self.parent().width() - self.width() - 10, 10)
+        self.raise_()
@@ -1,16 +1,25 @@
+import logging
 import os
-from enum import global_enum
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QDialog, QPushButton, QScrollArea, QLineEdit, QFrame)
-from PyQt5.QtCore import (Qt, pyqtSignal, QTimer, QPropertyAnimation,
-                          QEasingCurve, QRect, QPoint, QParallelAnimationGroup)
-from PyQt5.QtGui import QCursor, QColor, QPixmap
+                             QDialog, QPushButton, QScrollArea, QLineEdit, QFrame,
+                             QDoubleSpinBox, QFileDialog, QComboBox, QScroller, QScrollerProperties)
+from PyQt5.QtCore import (Qt, pyqtSignal, QTimer, QPropertyAnimation, QEvent, QThread,
+                          QEasingCurve, QRect, QPoint, QSize, QParallelAnimationGroup)
+from PyQt5.QtGui import QCursor, QColor, QPixmap, QPainter, QRegion
 
-from .ui_shared import GlassFrame, FlowLayout
-from .core import Plant
+from . import instrument, profiling
+from .ui_shared import GlassFrame, FlowLayout, updates_suspended
+from .core import Plant, PlantFilter, QueryResult, MergedResult, CatalogueSet
+from .export import export_results
+from .assetpack import AssetPack, AssetPackError, PACK_NAME
 
+logger = logging.getLogger(__name__)
 
-def get_plant_image(plant_id):
+
+def _asset_dirs():
     current_file_dir = os.path.dirname(os.path.abspath(__file__))
 
     project_root = os.path.dirname(current_file_dir)
@@ -21,46 +30,82 @@ def get_plant_image(plant_id):
         os.path.join(os.getcwd(), 'assets'),
         'assets'
     ]
+    return [folder for folder in candidate_dirs if os.path.isdir(folder)]
 
+
+def get_plant_image(plant_id):
     extensions = ['.png', '.jpg', '.jpeg']
 
-    for folder in candidate_dirs:
-        if os.path.isdir(folder):
-            for ext in extensions:
-                full_path = os.path.join(folder, f"{plant_id}{ext}")
-                if os.path.exists(full_path):
-                    return full_path
+    for folder in _asset_dirs():
+        for ext in extensions:
+            full_path = os.path.join(folder, f"{plant_id}{ext}")
+            if os.path.exists(full_path):
+                return full_path
     return None
 
 
+_asset_pack = None
+
+
+def get_asset_pack():
+    # The packed assets (see assetpack.py), opened on first use; False once
+    # we know there is none, so the directories are only probed once
+    global _asset_pack
+    if _asset_pack is None:
+        _asset_pack = False
+        for folder in _asset_dirs():
+            path = os.path.join(folder, PACK_NAME)
+            if os.path.exists(path):
+                try:
+                    _asset_pack = AssetPack(path)
+                except (OSError, AssetPackError) as e:
+                    logger.warning("Ignoring asset pack %s: %s", path, e)
+                    continue
+                break
+    return _asset_pack or None
+
+
+def _set_style(widget, style):
+    # Re-polishing is the expensive part of a rebind; skip unchanged styles
+    if widget.styleSheet() != style:
+        widget.setStyleSheet(style)
+
+
+# Rank label styles, resolved once instead of per row
+RANK_STYLES = {
+    1: "font-size: 32px; font-weight: bold; color: #FFD700;",
+    2: "font-size: 32px; font-weight: bold; color: #E0E0E0;",
+    3: "font-size: 32px; font-weight: bold; color: #CD7F32;",
+}
+DEFAULT_RANK_STYLE = "font-size: 24px; font-weight: bold; color: rgba(255,255,255,0.5);"
+
+
 class RankedPlantRow(GlassFrame):
     clicked = pyqtSignal(object, object)
 
     def __init__(self, plant: Plant, rank: int):
         super().__init__()
-        self.plant = plant
-        self.rank = rank
-        self.setFixedHeight(100)
+        self.plant = None
+        self.rank = None
+        _, top, _, bottom = self.shadow.margins()
+        self.setFixedHeight(100 + top + bottom)
         self.setCursor(QCursor(Qt.PointingHandCursor))
 
         layout = QHBoxLayout(self)
         layout.setContentsMargins(20, 10, 20, 10)
         layout.setSpacing(20)
 
-        self.rank_label = QLabel(f"#{rank}")
-        rank_font_size = "32px" if rank <= 3 else "24px"
-        rank_color = self._get_rank_color(rank)
-        self.rank_label.setStyleSheet(f"font-size: {rank_font_size}; font-weight: bold; color: {rank_color};")
+        self.rank_label = QLabel()
         self.rank_label.setFixedWidth(60)
         self.rank_label.setAlignment(Qt.AlignCenter)
 
         name_layout = QVBoxLayout()
         name_layout.setSpacing(2)
 
-        self.name_label = QLabel(plant.name)
+        self.name_label = QLabel()
         self.name_label.setStyleSheet("font-size: 20px; font-weight: bold; color: white;")
 
-        self.sci_label = QLabel(plant.scientific_name)
+        self.sci_label = QLabel()
         self.sci_label.setStyleSheet("font-size: 14px; font-style: italic; color: #ddd;")
 
         name_layout.addStretch()
@@ -70,27 +115,18 @@ class RankedPlantRow(GlassFrame):
 
         tags_layout = QHBoxLayout()
 
-        o2_tag = QLabel("O₂")
-        o2_tag.setToolTip(f"O₂ Release: {plant.o2_data} ml/d")
-        o2_tag.setStyleSheet(self._get_tag_style(plant.o2_data, is_o2=True))
-        o2_tag.setFixedSize(30, 24)
-        o2_tag.setAlignment(Qt.AlignCenter)
+        self.o2_tag = QLabel("O₂")
+        self.o2_tag.setFixedSize(30, 24)
+        self.o2_tag.setAlignment(Qt.AlignCenter)
 
-        co2_tag = QLabel("CO₂")
-        co2_tag.setToolTip(f"CO₂ Absorption: {plant.co2_data} mg/d")
-        co2_tag.setStyleSheet(self._get_tag_style(plant.co2_data, is_o2=False))
-        co2_tag.setFixedSize(30, 24)
-        co2_tag.setAlignment(Qt.AlignCenter)
+        self.co2_tag = QLabel("CO₂")
+        self.co2_tag.setFixedSize(30, 24)
+        self.co2_tag.setAlignment(Qt.AlignCenter)
 
-        tags_layout.addWidget(o2_tag)
-        tags_layout.addWidget(co2_tag)
+        tags_layout.addWidget(self.o2_tag)
+        tags_layout.addWidget(self.co2_tag)
 
-        try:
-            stars = int(round(self.plant.rating))
-        except (ValueError, TypeError):
-            stars = 0
-        rating_text = "★" * stars + "☆" * (5 - stars)
-        self.rating_label = QLabel(rating_text)
+        self.rating_label = QLabel()
         self.rating_label.setStyleSheet("color: #FFD700; font-size: 18px;")
         self.rating_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
 
@@ -99,13 +135,34 @@ class RankedPlantRow(GlassFrame):
         layout.addLayout(tags_layout)
         layout.addWidget(self.rating_label)
 
-    def _get_rank_color(self, rank):
-        if rank == 1: return "#FFD700"
-        if rank == 2: return "#E0E0E0"
-        if rank == 3: return "#CD7F32"
-        return "rgba(255,255,255,0.5)"
+        self.bind(plant, rank)
 
-    def _get_tag_style(self, data, is_o2=True):
+    def bind(self, plant: Plant, rank: int):
+        # Rows are pooled by the Home leaderboard and rebound in place
+        if rank != self.rank:
+            self.rank = rank
+            self.rank_label.setText(f"#{rank}")
+            _set_style(self.rank_label, RANK_STYLES.get(rank, DEFAULT_RANK_STYLE))
+        if plant is self.plant:
+            return
+        self.plant = plant
+        self.name_label.setText(plant.name)
+        self.sci_label.setText(plant.scientific_name)
+
+        self.o2_tag.setToolTip(f"O₂ Release: {plant.o2_data} ml/d")
+        _set_style(self.o2_tag, self._get_tag_style(plant.o2_data, is_o2=True))
+        self.co2_tag.setToolTip(f"CO₂ Absorption: {plant.co2_data} mg/d")
+        _set_style(self.co2_tag, self._get_tag_style(plant.co2_data, is_o2=False))
+
+        try:
+            stars = int(round(plant.rating))
+        except (ValueError, TypeError):
+            stars = 0
+        self.rating_label.setText("★" * stars + "☆" * (5 - stars))
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _get_tag_style(data, is_o2=True):
         try:
             val = float(str(data).split()[0])
             c_best, c_good, c_mid, c_low, c_bad = ("#145A32", "#27AE60", "#F1C40F", "#E67E22", "#C0392B")
@@ -134,52 +191,66 @@ class RankedPlantRow(GlassFrame):
         super().leaveEvent(event)
 
 
+# PLANTS_CARD_RASTER=0 paints every card live instead of from a cached raster
+CARD_RASTER = os.environ.get("PLANTS_CARD_RASTER", "1") not in ("", "0")
+CARD_RASTER_CACHE_SIZE = 128
+# id(plant) -> (plant, raster); the plant is kept so its id can't be reused.
+# This is the only reference to a raster: cards look theirs up on every
+# paint, so evicting an entry frees it even while cards still show it.
+_card_rasters = OrderedDict()
+
+
 class PlantCard(GlassFrame):
+    # With `raster` on, a card that is not hovered paints a cached picture of
+    # itself instead of its frame and labels: the picture is taken after the
+    # first live paint and shared by every card bound to the same plant, so
+    # scrolling (and rebinding pooled cards) is a blit. Hovering goes back to
+    # the live widgets for the hover style and tooltips.
     clicked = pyqtSignal(object, object)
 
-    def __init__(self, plant: Plant):
-        super().__init__()
-        self.plant = plant
-        self.setFixedSize(198, 180)
+    def __init__(self, plant: Plant, parent=None, raster=None):
+        super().__init__(parent)
+        self.plant = None
+        self.raster = CARD_RASTER if raster is None else raster
+        self._rastered = False
+        self._hovered = False
+        self._grabbing = False
+        self._grab_pending = False
+        self._labels_for = None
+        left, top, right, bottom = self.shadow.margins()
+        self.setFixedSize(198 + left + right, 180 + top + bottom)
         self.setCursor(QCursor(Qt.PointingHandCursor))
 
-        # Disable shadow for performance with large datasets
-        self.setGraphicsEffect(None)
-
-        layout = QVBoxLayout(self)
+        # Everything drawn on top of the frame sits in `body`, hidden while
+        # the raster stands in for it
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(0, 0, 0, 0)
+        self.body = QWidget()
+        outer.addWidget(self.body)
+        layout = QVBoxLayout(self.body)
         layout.setContentsMargins(15, 15, 15, 15)
 
-        self.name_label = QLabel(plant.name)
+        self.name_label = QLabel()
         self.name_label.setStyleSheet("font-size: 18px; font-weight: bold; color: white;")
 
-        self.sci_label = QLabel(plant.scientific_name)
+        self.sci_label = QLabel()
         self.sci_label.setStyleSheet("font-size: 12px; font-style: italic; color: #ddd;")
 
-        try:
-            stars = int(round(self.plant.rating))
-        except (ValueError, TypeError):
-            stars = 0
-
-        rating_text = "★" * stars + "☆" * (5 - stars)
-        self.rating_label = QLabel(f"{rating_text} ({self.plant.rating})")
+        self.rating_label = QLabel()
         self.rating_label.setStyleSheet("color: #FFD700; font-size: 14px;")
 
         tags_layout = QHBoxLayout()
 
-        o2_tag = QLabel("O₂")
-        o2_tag.setToolTip(f"O₂ Release: {plant.o2_data} ml/day")
-        o2_tag.setStyleSheet(self._get_tag_style(plant.o2_data, is_o2=True))
-        o2_tag.setFixedSize(30, 20)
-        o2_tag.setAlignment(Qt.AlignCenter)
-        tags_layout.addWidget(o2_tag)
+        self.o2_tag = QLabel("O₂")
+        self.o2_tag.setFixedSize(30, 20)
+        self.o2_tag.setAlignment(Qt.AlignCenter)
+        tags_layout.addWidget(self.o2_tag)
 
         tags_layout.addSpacing(5)
-        co2_tag = QLabel("CO₂")
-        co2_tag.setToolTip(f"CO₂ Absorption: {plant.co2_data} mg/day")
-        co2_tag.setStyleSheet(self._get_tag_style(plant.co2_data, is_o2=False))
-        co2_tag.setFixedSize(30, 20)
-        co2_tag.setAlignment(Qt.AlignCenter)
-        tags_layout.addWidget(co2_tag)
+        self.co2_tag = QLabel("CO₂")
+        self.co2_tag.setFixedSize(30, 20)
+        self.co2_tag.setAlignment(Qt.AlignCenter)
+        tags_layout.addWidget(self.co2_tag)
 
         tags_layout.addStretch()
 
@@ -190,6 +261,105 @@ class PlantCard(GlassFrame):
         layout.addStretch()
         layout.addLayout(tags_layout)
 
+        self.bind(plant)
+
+    def bind(self, plant: Plant):
+        # Cards are reused by the virtualized grid, so everything shown is set here
+        if plant is self.plant:
+            return
+        self.plant = plant
+        self._show_raster(self.raster and not self._hovered and self._cached_raster() is not None)
+        self.update()
+
+    def _show_raster(self, rastered):
+        # Swaps the live frame and labels for the plant's cached raster, or
+        # back. Qt paints the stylesheet background ahead of paintEvent, so
+        # that is off while the raster (which has it already) is shown.
+        self._rastered = rastered
+        if not rastered:
+            self._bind_labels()
+        self.body.setVisible(not rastered)
+        self.setAttribute(Qt.WA_StyledBackground, not rastered)
+
+    def _bind_labels(self):
+        plant = self.plant
+        if plant is self._labels_for:
+            return
+        self._labels_for = plant
+        self.name_label.setText(plant.name)
+        self.sci_label.setText(plant.scientific_name)
+
+        try:
+            stars = int(round(plant.rating))
+        except (ValueError, TypeError):
+            stars = 0
+        rating_text = "★" * stars + "☆" * (5 - stars)
+        self.rating_label.setText(f"{rating_text} ({plant.rating})")
+
+        self.o2_tag.setToolTip(f"O₂ Release: {plant.o2_data} ml/day")
+        _set_style(self.o2_tag, self._get_tag_style(plant.o2_data, is_o2=True))
+        self.co2_tag.setToolTip(f"CO₂ Absorption: {plant.co2_data} mg/day")
+        _set_style(self.co2_tag, self._get_tag_style(plant.co2_data, is_o2=False))
+
+    def _cached_raster(self):
+        entry = _card_rasters.get(id(self.plant))
+        if entry is None:
+            return None
+        pix = entry[1]
+        # Rasters taken on another screen, or at another size, don't fit
+        if pix.devicePixelRatio() != self.devicePixelRatioF() or pix.size() / pix.devicePixelRatio() != self.size():
+            return None
+        _card_rasters.move_to_end(id(self.plant))
+        return pix
+
+    def _rasterize(self):
+        self._grab_pending = False
+        if self._rastered or self._hovered or not self.isVisible():
+            return
+        dpr = self.devicePixelRatioF()
+        pix = QPixmap(self.size() * dpr)
+        pix.setDevicePixelRatio(dpr)
+        pix.fill(Qt.transparent)
+        # Without the window background, so the raster stays translucent
+        self._grabbing = True
+        try:
+            self.render(pix, QPoint(), QRegion(), QWidget.DrawChildren)
+        finally:
+            self._grabbing = False
+        _card_rasters[id(self.plant)] = (self.plant, pix)
+        while len(_card_rasters) > CARD_RASTER_CACHE_SIZE:
+            _card_rasters.popitem(last=False)
+        self._show_raster(True)
+
+    def _raster_evicted(self):
+        if self._rastered and self._cached_raster() is None:
+            self._show_raster(False)
+            self.update()
+
+    @instrument.timed("paint.card")
+    def paintEvent(self, event):
+        if self._rastered:
+            pix = self._cached_raster()
+            if pix is not None:
+                painter = QPainter(self)
+                painter.drawPixmap(0, 0, pix)
+                painter.end()
+            else:
+                # Evicted since it was shown: back to the live widgets, which
+                # are rasterized again once painted
+                QTimer.singleShot(0, self._raster_evicted)
+            return
+        super().paintEvent(event)
+        if self.raster and not self._hovered and not self._grabbing and not self._grab_pending:
+            # Take the picture once this paint has been flushed
+            self._grab_pending = True
+            QTimer.singleShot(0, self._rasterize)
+
+    def resizeEvent(self, event):
+        if self._rastered:
+            self._show_raster(False)
+        super().resizeEvent(event)
+
     def _get_tag_style(self, data, is_o2=True):
         try:
             clean_str = str(data).split()[0]
@@ -218,28 +388,81 @@ class PlantCard(GlassFrame):
         self.clicked.emit(self.plant, self)
 
     def enterEvent(self, event):
+        self._hovered = True
+        if self._rastered:
+            self._show_raster(False)
         self.setStyleSheet(
             ".GlassFrame { background-color: rgba(255, 255, 255, 50); border: 1px solid rgba(255, 255, 255, 100); border-radius: 16px; }")
         super().enterEvent(event)
 
     def leaveEvent(self, event):
+        self._hovered = False
         self.setStyleSheet(
             ".GlassFrame { background-color: rgba(255, 255, 255, 30); border: 1px solid rgba(255, 255, 255, 60); border-radius: 16px; }")
+        if self.raster:
+            self._show_raster(self._cached_raster() is not None)
         super().leaveEvent(event)
 
 
+PIXMAP_CACHE_SIZE = 32
+_pixmap_cache = OrderedDict()
+
+
+def prefetch_images(plants, size):
+    # Idle-time task (see idle.IdleScheduler): decodes images ahead of the
+    # detail view, one per step, up to what the cache holds
+    plants = list(plants)[:PIXMAP_CACHE_SIZE]
+    for done, plant in enumerate(plants, start=1):
+        load_scaled_pixmap(plant.id, size)
+        yield done, len(plants)
+
+
+def load_scaled_pixmap(plant_id, size):
+    # Decoded and scaled images for recently opened plants
+    key = (plant_id, size.width(), size.height())
+    pix = _pixmap_cache.get(key)
+    if pix is not None:
+        _pixmap_cache.move_to_end(key)
+        return pix
+
+    pix = None
+    pack = get_asset_pack()
+    if pack is not None and plant_id in pack:
+        img = pack.image(plant_id, size.width(), size.height())
+        if img is not None:
+            pix = QPixmap.fromImage(img.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    else:
+        img_path = get_plant_image(plant_id)
+        if img_path:
+            raw = QPixmap(img_path)
+            if not raw.isNull():
+                pix = raw.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    _pixmap_cache[key] = pix
+    if len(_pixmap_cache) > PIXMAP_CACHE_SIZE:
+        _pixmap_cache.popitem(last=False)
+    return pix
+
+
+SIMILAR_COUNT = 3
+DETAIL_IMAGE_SIZE = QSize(390, 220)
+
+
 class DetailModal(QDialog):
-    def __init__(self, plant: Plant, parent=None, start_geometry=None):
+    # One instance per main window (see BaseTab.detail_view), rebound to the
+    # clicked plant on every open. Widgets and animations are built once.
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
-        self.start_geometry = start_geometry
+        self.start_geometry = None
+        self.opened_at = None
         self.target_width = 450
-        self.target_height = 600
+        self.target_height = 680
         self.resize(self.target_width, self.target_height)
 
         container = GlassFrame(self)
+        container.radius = 20
         layout_wrap = QVBoxLayout(self)
         layout_wrap.setContentsMargins(0, 0, 0, 0)
         layout_wrap.addWidget(container)
@@ -258,58 +481,161 @@ class DetailModal(QDialog):
             QPushButton:hover { color: #ff6b6b; }
         """)
 
+        # Favorite toggle; `history` is set by the opening tab and records
+        # every plant shown (see BaseTab.open_detail)
+        self.plant = None
+        self.history = None
+        self.fav_btn = QPushButton()
+        self.fav_btn.setCheckable(True)
+        self.fav_btn.setFixedHeight(30)
+        self.fav_btn.setCursor(QCursor(Qt.PointingHandCursor))
+        self.fav_btn.setStyleSheet("""
+            QPushButton { background: transparent; color: #ddd; font-size: 14px; border: none; }
+            QPushButton:checked { color: #FFD700; }
+            QPushButton:hover { color: white; }
+        """)
+        self.fav_btn.toggled.connect(self._on_favorite_toggled)
+
         header = QHBoxLayout()
+        header.addWidget(self.fav_btn)
         header.addStretch()
         header.addWidget(close_btn)
         layout.addLayout(header)
 
-        img_label = QLabel()
-        img_label.setFixedSize(390, 220)
-        img_label.setAlignment(Qt.AlignCenter)
-        img_label.setStyleSheet("background-color: rgba(0,0,0,0.3); border-radius: 10px;")
-
-        img_path = get_plant_image(plant.id)
-
-        if img_path:
-            pix = QPixmap(img_path)
-            if not pix.isNull():
-                scaled = pix.scaled(img_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                img_label.setPixmap(scaled)
+        self.img_label = QLabel()
+        self.img_label.setFixedSize(DETAIL_IMAGE_SIZE)
+        self.img_label.setAlignment(Qt.AlignCenter)
+        self.img_label.setStyleSheet("background-color: rgba(0,0,0,0.3); border-radius: 10px;")
 
-        layout.addWidget(img_label, alignment=Qt.AlignCenter)
+        layout.addWidget(self.img_label, alignment=Qt.AlignCenter)
         layout.addSpacing(15)
 
-        name = QLabel(plant.name)
-        name.setStyleSheet("font-size: 28px; font-weight: bold; color: white; margin-bottom: 5px;")
-        name.setWordWrap(True)
+        self.name_label = QLabel()
+        self.name_label.setStyleSheet("font-size: 28px; font-weight: bold; color: white; margin-bottom: 5px;")
+        self.name_label.setWordWrap(True)
 
-        sci = QLabel(plant.scientific_name)
-        sci.setStyleSheet("font-size: 16px; font-style: italic; color: #aaa; margin-bottom: 15px;")
+        self.sci_label = QLabel()
+        self.sci_label.setStyleSheet("font-size: 16px; font-style: italic; color: #aaa; margin-bottom: 15px;")
 
-        desc = QLabel(plant.description)
-        desc.setWordWrap(True)
-        desc.setStyleSheet("font-size: 14px; color: #ddd; line-height: 1.4;")
+        self.desc_label = QLabel()
+        self.desc_label.setWordWrap(True)
+        self.desc_label.setStyleSheet("font-size: 14px; color: #ddd; line-height: 1.4;")
 
+        # Stat labels inherit one stylesheet from the box instead of one each
         stats_box = QFrame()
-        stats_box.setStyleSheet("background-color: rgba(255,255,255,10); border-radius: 10px; padding: 10px;")
+        stats_box.setStyleSheet(
+            "QFrame { background-color: rgba(255,255,255,10); border-radius: 10px; padding: 10px; }"
+            " QLabel { background: transparent; padding: 0; color: #eee; font-size: 13px; }")
         stats_layout = QVBoxLayout(stats_box)
+        self.o2_stat = QLabel()
+        self.co2_stat = QLabel()
+        self.rating_stat = QLabel()
+        stats_layout.addWidget(self.o2_stat)
+        stats_layout.addWidget(self.co2_stat)
+        stats_layout.addWidget(self.rating_stat)
+
+        # "Similar plants" strip; `recommend(plant, k)` is set by the opening
+        # tab (see BaseTab.open_detail). Clicking a chip rebinds the modal.
+        self.recommend = None
+        similar_box = QWidget()
+        similar_box.setStyleSheet(
+            "QPushButton { background-color: rgba(255,255,255,15); color: white; font-size: 12px;"
+            " border: 1px solid rgba(255,255,255,40); border-radius: 8px; padding: 4px; }"
+            " QPushButton:hover { background-color: rgba(255,255,255,35); }")
+        similar_layout = QVBoxLayout(similar_box)
+        similar_layout.setContentsMargins(0, 0, 0, 0)
+        self.similar_title = QLabel("Similar plants")
+        self.similar_title.setStyleSheet("font-size: 13px; font-weight: bold; color: #aaa;")
+        similar_layout.addWidget(self.similar_title)
+        chips = QHBoxLayout()
+        self.similar_chips = []
+        for _ in range(SIMILAR_COUNT):
+            chip = QPushButton()
+            chip.setFixedHeight(44)
+            chip.setCursor(QCursor(Qt.PointingHandCursor))
+            chip.plant = None
+            chip.clicked.connect(lambda _, c=chip: self.bind(c.plant, self.start_geometry))
+            chips.addWidget(chip)
+            self.similar_chips.append(chip)
+        similar_layout.addLayout(chips)
 
-        def make_stat(label, value):
-            lbl = QLabel(f"<b>{label}:</b> {value}")
-            lbl.setStyleSheet("color: #eee; font-size: 13px;")
-            return lbl
-
-        stats_layout.addWidget(make_stat("O₂ Release", f"{plant.o2_data} ml/day"))
-        stats_layout.addWidget(make_stat("CO₂ Absorb", f"{plant.co2_data} mg/day"))
-        stats_layout.addWidget(make_stat("Rating", f"{plant.rating}/5"))
-
-        layout.addLayout(header)
-        layout.addWidget(name)
-        layout.addWidget(sci)
+        layout.addWidget(self.name_label)
+        layout.addWidget(self.sci_label)
         layout.addWidget(stats_box)
         layout.addSpacing(15)
-        layout.addWidget(desc)
+        layout.addWidget(self.desc_label)
         layout.addStretch()
+        layout.addWidget(similar_box)
+
+        self.open_geo = QPropertyAnimation(self, b"geometry")
+        self.open_geo.setDuration(350)
+        self.open_geo.setEasingCurve(QEasingCurve.OutExpo)
+        open_fade = QPropertyAnimation(self, b"windowOpacity")
+        open_fade.setDuration(250)
+        open_fade.setStartValue(0.0)
+        open_fade.setEndValue(1.0)
+        self.open_group = QParallelAnimationGroup(self)
+        self.open_group.addAnimation(self.open_geo)
+        self.open_group.addAnimation(open_fade)
+
+        self.close_geo = QPropertyAnimation(self, b"geometry")
+        self.close_geo.setDuration(250)
+        self.close_geo.setEasingCurve(QEasingCurve.InQuad)
+        close_fade = QPropertyAnimation(self, b"windowOpacity")
+        close_fade.setDuration(200)
+        close_fade.setStartValue(1.0)
+        close_fade.setEndValue(0.0)
+        self.close_group = QParallelAnimationGroup(self)
+        self.close_group.addAnimation(self.close_geo)
+        self.close_group.addAnimation(close_fade)
+        self.close_group.finished.connect(self.accept)
+
+    def bind(self, plant: Plant, start_geometry=None):
+        self.start_geometry = start_geometry
+        self.plant = plant
+        history = self.history
+        self.fav_btn.setVisible(history is not None)
+        if history is not None:
+            history.record_view(plant.id)
+            self.fav_btn.blockSignals(True)
+            self.fav_btn.setChecked(history.is_favorite(plant.id))
+            self.fav_btn.blockSignals(False)
+            self._update_favorite_text()
+
+        pix = load_scaled_pixmap(plant.id, self.img_label.size())
+        if pix is not None:
+            self.img_label.setPixmap(pix)
+        else:
+            self.img_label.clear()
+
+        self.name_label.setText(plant.name)
+        self.sci_label.setText(plant.scientific_name)
+        self.desc_label.setText(plant.description)
+        self.o2_stat.setText(f"<b>O₂ Release:</b> {plant.o2_data} ml/day")
+        self.co2_stat.setText(f"<b>CO₂ Absorb:</b> {plant.co2_data} mg/day")
+        self.rating_stat.setText(f"<b>Rating:</b> {plant.rating}/5")
+
+        with instrument.timed("detail.similar"):
+            similar = self.recommend(plant, SIMILAR_COUNT) if self.recommend else []
+        self.similar_title.setVisible(bool(similar))
+        for idx, chip in enumerate(self.similar_chips):
+            if idx < len(similar):
+                other = similar[idx]
+                chip.plant = other
+                name = chip.fontMetrics().elidedText(other.name, Qt.ElideRight, chip.width() - 12)
+                chip.setText(f"{name}\n★ {other.rating}")
+                chip.show()
+            else:
+                chip.plant = None
+                chip.hide()
+
+    def _on_favorite_toggled(self, checked):
+        if self.history is not None and self.plant is not None:
+            self.history.set_favorite(self.plant.id, checked)
+        self._update_favorite_text()
+
+    def _update_favorite_text(self):
+        self.fav_btn.setText("★ Favorite" if self.fav_btn.isChecked() else "☆ Add to favorites")
 
     def showEvent(self, event):
         if self.start_geometry:
@@ -322,51 +648,367 @@ class DetailModal(QDialog):
         end_y = (parent_rect.height() - self.target_height) // 2
         end_rect = QRect(end_x, end_y, self.target_width, self.target_height)
 
+        self.close_group.stop()
         self.setGeometry(self.start_geometry)
+        self.open_geo.setStartValue(self.start_geometry)
+        self.open_geo.setEndValue(end_rect)
+        self.open_group.start()
 
-        self.anim_group = QParallelAnimationGroup(self)
-
-        geo_anim = QPropertyAnimation(self, b"geometry")
-        geo_anim.setDuration(350)
-        geo_anim.setStartValue(self.start_geometry)
-        geo_anim.setEndValue(end_rect)
-        geo_anim.setEasingCurve(QEasingCurve.OutExpo)
-
-        op_anim = QPropertyAnimation(self, b"windowOpacity")
-        op_anim.setDuration(250)
-        op_anim.setStartValue(0.0)
-        op_anim.setEndValue(1.0)
-
-        self.anim_group.addAnimation(geo_anim)
-        self.anim_group.addAnimation(op_anim)
-        self.anim_group.start()
+        if self.opened_at is not None:
+            # Click-to-animation-start latency
+            instrument.record("detail.open", (time.perf_counter() - self.opened_at) * 1000)
+            self.opened_at = None
 
     def close_animated(self):
         if self.start_geometry:
-            self.anim_group = QParallelAnimationGroup(self)
-
-            geo_anim = QPropertyAnimation(self, b"geometry")
-            geo_anim.setDuration(250)
-            geo_anim.setStartValue(self.geometry())
-            geo_anim.setEndValue(self.start_geometry)
-            geo_anim.setEasingCurve(QEasingCurve.InQuad)
-
-            op_anim = QPropertyAnimation(self, b"windowOpacity")
-            op_anim.setDuration(200)
-            op_anim.setStartValue(1.0)
-            op_anim.setEndValue(0.0)
-
-            self.anim_group.addAnimation(geo_anim)
-            self.anim_group.addAnimation(op_anim)
-            self.anim_group.finished.connect(self.accept)
-            self.anim_group.start()
+            self.open_group.stop()
+            self.close_geo.setStartValue(self.geometry())
+            self.close_geo.setEndValue(self.start_geometry)
+            self.close_group.start()
         else:
             self.accept()
 
 
+def as_result(plants):
+    # Grids page through a QueryResult; plain lists are wrapped as one
+    if isinstance(plants, (QueryResult, MergedResult)):
+        return plants
+    return QueryResult(plants, range(len(plants)))
+
+
+# Cards built per step when a grid is filled at idle time (about 1 ms each)
+PREBUILD_CARDS = 4
+
+
+class GridRenderer:
+    # How ListTab turns a result set into PlantCards. Subclasses own the
+    # content widget's layout and any per-search state, which `show` resets.
+    # `loaded_count` is how many results have been read so far; the total is
+    # only reported once reading them has reached the end, since counting up
+    # front would scan the whole catalogue on every search.
+    def __init__(self, tab):
+        self.tab = tab
+        self.results = None
+        self.loaded_count = 0
+
+    def show(self, results):
+        raise NotImplementedError
+
+    def show_in_steps(self, results):
+        # `show` as an idle task (see ListTab.search_in_steps), yielding
+        # (done, total) between small units of work
+        self.show(results)
+        yield 1, 1
+
+    def on_scroll(self, value):
+        pass
+
+    def on_resize(self):
+        pass
+
+    def status_text(self):
+        total = self.results.known_count()
+        if total is None:
+            return f"Showing {self.loaded_count} plants. Scroll for more."
+        if self.loaded_count < total:
+            return f"Showing {self.loaded_count} of {total} plants. Scroll for more."
+        return f"Found {total} plants."
+
+    def _make_card(self, plant):
+        # Created inside the content widget: reparenting a finished card
+        # re-resolves the stylesheet for it and every child label
+        card = PlantCard(plant, self.tab.content_widget)
+        card.clicked.connect(self.tab.open_detail)
+        return card
+
+
+class EagerGrid(GridRenderer):
+    # One card per result, all built up front
+    def __init__(self, tab):
+        super().__init__(tab)
+        self.flow_layout = FlowLayout(tab.content_widget)
+
+    def show(self, results):
+        self.results = results
+        with updates_suspended(self.tab.content_widget):
+            self.flow_layout.clear()
+            self.flow_layout.addWidgets([self._make_card(p) for p in results])
+        self.loaded_count = self.flow_layout.count()
+        self.tab.content_widget.updateGeometry()
+
+    def show_in_steps(self, results):
+        self.results = results
+        self.loaded_count = 0
+        self.flow_layout.clear()
+        while True:
+            batch = results.page(self.loaded_count, PREBUILD_CARDS)
+            self.flow_layout.addWidgets([self._make_card(p) for p in batch])
+            self.loaded_count += len(batch)
+            if len(batch) < PREBUILD_CARDS:
+                break
+            yield self.loaded_count, results.known_count()
+        self.tab.content_widget.updateGeometry()
+
+
+class LazyGrid(EagerGrid):
+    # Cards built BATCH_SIZE at a time as the scroll nears the bottom
+    BATCH_SIZE = 30
+
+    def show(self, results):
+        # Reset per search so a new result set starts from its first batch
+        self.results = results
+        self.loaded_count = 0
+        with updates_suspended(self.tab.content_widget):
+            self.flow_layout.clear()
+            self.load_batch()
+
+    def show_in_steps(self, results):
+        self.results = results
+        self.loaded_count = 0
+        self.flow_layout.clear()
+        while self.loaded_count < self.BATCH_SIZE:
+            if not self.load_batch(min(PREBUILD_CARDS, self.BATCH_SIZE - self.loaded_count)):
+                break
+            yield self.loaded_count, self.BATCH_SIZE
+
+    def load_batch(self, size=None):
+        batch = self.results.page(self.loaded_count, size or self.BATCH_SIZE)
+        self.flow_layout.addWidgets([self._make_card(p) for p in batch])
+        self.loaded_count += len(batch)
+        self.tab.content_widget.updateGeometry()
+        return len(batch)
+
+    def on_scroll(self, value):
+        # Lazy Load: if we are near the bottom (200px buffer), load more
+        vbar = self.tab.scroll.verticalScrollBar()
+        total = self.results.known_count()
+        if value > vbar.maximum() - 200 and (total is None or self.loaded_count < total):
+            self.load_batch()
+            self.tab.status_label.setText(self.status_text())
+
+
+class VirtualGrid(GridRenderer):
+    # Only the rows in view (plus one above and below) have cards. Results are
+    # read a screen ahead of the view and kept (as references) in `loaded`;
+    # the content widget is sized for those, so the scrollbar grows as more
+    # are read. A fixed pool of cards is repositioned and rebound as the view
+    # scrolls.
+    SPACING = 10
+
+    def __init__(self, tab):
+        super().__init__(tab)
+        self.pool = []
+        self.loaded = []
+        self.first_index = -1
+        probe = PlantCard(Plant("", "", "", "", "", "", 0.0))
+        self.card_size = probe.size()
+        probe.deleteLater()
+
+    def _columns(self):
+        width = self.tab.scroll.viewport().width()
+        return max(1, (width + self.SPACING) // (self.card_size.width() + self.SPACING))
+
+    def _row_height(self):
+        return self.card_size.height() + self.SPACING
+
+    def show(self, results):
+        self.results = results
+        self.loaded = []
+        self.loaded_count = 0
+        self.first_index = -1
+        self.tab.content_widget.setMinimumHeight(0)
+        self.tab.scroll.verticalScrollBar().setValue(0)
+        self.on_resize()
+
+    def on_resize(self):
+        if self.results is None:
+            return
+        self.first_index = -1
+        self._update_visible()
+
+    def on_scroll(self, value):
+        self._update_visible()
+
+    def _update_visible(self):
+        cols = self._columns()
+        row_h = self._row_height()
+        top = self.tab.scroll.verticalScrollBar().value()
+        first_row = max(0, top // row_h - 1)
+        visible_rows = self.tab.scroll.viewport().height() // row_h + 3
+        first_index = first_row * cols
+        self._load_until(first_index + 2 * visible_rows * cols, cols)
+        if first_index == self.first_index and len(self.pool) >= visible_rows * cols:
+            return
+        self.first_index = first_index
+
+        plants = self.loaded[first_index:first_index + visible_rows * cols]
+        while len(self.pool) < len(plants):
+            card = self._make_card(plants[len(self.pool)])
+            card.setParent(self.tab.content_widget)
+            self.pool.append(card)
+
+        for offset, card in enumerate(self.pool):
+            if offset < len(plants):
+                row, col = divmod(first_index + offset, cols)
+                card.bind(plants[offset])
+                card.move(col * (self.card_size.width() + self.SPACING), row * row_h)
+                card.show()
+            else:
+                card.hide()
+
+    def _load_until(self, needed, cols):
+        # Pages are read in order, so the cursor never rescans
+        if len(self.loaded) < needed and self.results.known_count() != len(self.loaded):
+            self.loaded.extend(self.results.page(len(self.loaded), needed - len(self.loaded)))
+        rows = -(-len(self.loaded) // cols)
+        height = rows * self._row_height()
+        if len(self.loaded) != self.loaded_count or height != self.tab.content_widget.minimumHeight():
+            self.loaded_count = len(self.loaded)
+            self.tab.content_widget.setMinimumHeight(height)
+            self.tab.status_label.setText(self.status_text())
+
+
+class ExportWorker(QThread):
+    # Writes a result set to disk off the GUI thread (see export.export_results)
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(object)  # rows written, or None when cancelled
+    failed = pyqtSignal(str)
+
+    def __init__(self, results, path, fmt):
+        super().__init__()
+        self.results = results
+        self.path = path
+        self.fmt = fmt
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            written = export_results(self.results, self.path, self.fmt,
+                                     progress=self.progress.emit,
+                                     is_cancelled=lambda: self._cancelled)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(written)
+
+
+# PLANTS_KINETIC_MOUSE=1 makes mouse drags fling the grid too, not just touch
+KINETIC_MOUSE = os.environ.get("PLANTS_KINETIC_MOUSE", "0") not in ("", "0")
+
+
+def enable_kinetic_scrolling(scroll_area):
+    # Flick scrolling with momentum, moving by pixels rather than whole steps;
+    # no overshoot, which would repaint the area past the last row
+    viewport = scroll_area.viewport()
+    QScroller.grabGesture(viewport, QScroller.LeftMouseButtonGesture if KINETIC_MOUSE else QScroller.TouchGesture)
+    scroller = QScroller.scroller(viewport)
+    props = scroller.scrollerProperties()
+    props.setScrollMetric(QScrollerProperties.VerticalOvershootPolicy, QScrollerProperties.OvershootAlwaysOff)
+    props.setScrollMetric(QScrollerProperties.HorizontalOvershootPolicy, QScrollerProperties.OvershootAlwaysOff)
+    props.setScrollMetric(QScrollerProperties.FrameRate, QScrollerProperties.Fps60)
+    scroller.setScrollerProperties(props)
+    scroll_area.verticalScrollBar().setSingleStep(20)
+
+
+GRID_RENDERERS = {
+    "eager": EagerGrid,
+    "lazy": LazyGrid,
+    "virtualized": VirtualGrid,
+}
+
+# Which GridRenderer ListTab uses unless told otherwise
+RENDER_STRATEGY = os.environ.get("PLANTS_RENDER_STRATEGY", "virtualized")
+
+
+def grid_renderer(strategy=None):
+    # An unknown name (a typo in PLANTS_RENDER_STRATEGY) falls back to the default
+    strategy = strategy or RENDER_STRATEGY
+    if strategy not in GRID_RENDERERS:
+        logger.warning('Unknown render strategy %r; using "virtualized".', strategy)
+        strategy = "virtualized"
+    return GRID_RENDERERS[strategy]
+
+
+# Home search shows the best matches only; the Library tab has the full list
+HOME_RESULT_LIMIT = 50
+# Plants per Favorites / Recently viewed row on Home
+HOME_SECTION_SIZE = 6
+
+
+class PlantChipRow(QWidget):
+    # A titled row of plant chips for the Home history sections. The chips
+    # are built once and rebound; the row hides itself when empty.
+    def __init__(self, tab, title, size=HOME_SECTION_SIZE):
+        super().__init__()
+        self.setStyleSheet(
+            "QPushButton { background-color: rgba(255,255,255,20); color: white; font-size: 12px;"
+            " border: 1px solid rgba(255,255,255,40); border-radius: 8px; padding: 4px; }"
+            " QPushButton:hover { background-color: rgba(255,255,255,40); }")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 5)
+        label = QLabel(title)
+        label.setStyleSheet("font-size: 14px; font-weight: bold; color: #eee;")
+        layout.addWidget(label)
+        row = QHBoxLayout()
+        self.chips = []
+        for _ in range(size):
+            chip = QPushButton()
+            chip.setFixedSize(140, 44)
+            chip.setCursor(QCursor(Qt.PointingHandCursor))
+            chip.plant = None
+            chip.clicked.connect(lambda _, c=chip: tab.open_detail(c.plant, c))
+            row.addWidget(chip)
+            self.chips.append(chip)
+        row.addStretch()
+        layout.addLayout(row)
+        self.hide()
+
+    def show_plants(self, plants):
+        for chip, plant in zip(self.chips, plants):
+            if chip.plant is not plant:
+                chip.plant = plant
+                name = chip.fontMetrics().elidedText(plant.name, Qt.ElideRight, chip.width() - 12)
+                chip.setText(f"{name}\n★ {plant.rating}")
+            chip.show()
+        for chip in self.chips[len(plants):]:
+            chip.plant = None
+            chip.hide()
+        self.setVisible(bool(plants))
+
+
+class Leaderboard:
+    # HomeTab's rows. The pool only grows to the longest list shown so far
+    # (at most HOME_RESULT_LIMIT); rows are rebound in place on every search
+    # and the surplus is hidden rather than deleted.
+    def __init__(self, tab, layout):
+        self.tab = tab
+        self.layout = layout
+        self.rows = []
+
+    def show(self, plants):
+        for idx, plant in enumerate(plants):
+            if idx < len(self.rows):
+                row = self.rows[idx]
+                row.bind(plant, idx + 1)
+            else:
+                row = RankedPlantRow(plant, rank=idx + 1)
+                row.clicked.connect(self.tab.open_detail)
+                self.layout.addWidget(row)
+                self.rows.append(row)
+            row.show()
+        for row in self.rows[len(plants):]:
+            row.hide()
+
+
 class BaseTab(QWidget):
     def __init__(self, data_manager):
         super().__init__()
+        # `dm` is what searches run against: the whole catalogue set, or the
+        # single source picked in the selector
+        self.catalogues = data_manager
         self.dm = data_manager
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(20, 20, 20, 80)
@@ -374,7 +1016,19 @@ class BaseTab(QWidget):
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search plants...")
         self.search_bar.textChanged.connect(self.on_search_changed)
-        self.layout.addWidget(self.search_bar)
+
+        self.source_box = None
+        if isinstance(data_manager, CatalogueSet) and len(data_manager) > 1:
+            search_row = QHBoxLayout()
+            search_row.addWidget(self.search_bar, stretch=1)
+            self.source_box = QComboBox()
+            self.source_box.addItem("All catalogues")
+            self.source_box.addItems(data_manager.names)
+            self.source_box.currentIndexChanged.connect(self.on_source_changed)
+            search_row.addWidget(self.source_box)
+            self.layout.addLayout(search_row)
+        else:
+            self.layout.addWidget(self.search_bar)
 
         self.status_label = QLabel("")
         self.status_label.setStyleSheet("color: #ddd; font-size: 12px; margin-left: 5px; font-style: italic;")
@@ -385,8 +1039,6 @@ class BaseTab(QWidget):
         self.content_widget = QWidget()
 
         # Don't set layout here - let subclasses do it
-        self.flow_layout = None
-
         self.scroll.setWidget(self.content_widget)
         self.layout.addWidget(self.scroll)
 
@@ -398,35 +1050,79 @@ class BaseTab(QWidget):
     def on_search_changed(self):
         self.search_timer.start()
 
+    def on_source_changed(self, index, search=True):
+        if index <= 0:
+            self.dm = self.catalogues
+        else:
+            self.dm = self.catalogues.source(self.source_box.itemText(index))
+        if search:
+            self.perform_search()
+
+    def session_state(self) -> dict:
+        # What restore_session needs to bring the tab back on the next launch
+        return {
+            "query": self.search_bar.text(),
+            "source": self.source_box.currentText() if self.source_box else None,
+            "scroll": self.scroll.verticalScrollBar().value(),
+        }
+
+    def restore_session(self, state, search=True):
+        # With `search` off only the fields are restored; the caller searches
+        # and then calls restore_scroll
+        widgets = [self.search_bar] + ([self.source_box] if self.source_box else [])
+        for widget in widgets:
+            widget.blockSignals(True)
+        try:
+            self.search_bar.setText(state.get("query", ""))
+            if self.source_box and state.get("source"):
+                self.source_box.setCurrentIndex(max(self.source_box.findText(state["source"]), 0))
+                self.on_source_changed(self.source_box.currentIndex(), search=False)
+            self._restore_fields(state)
+        finally:
+            for widget in widgets:
+                widget.blockSignals(False)
+        if search:
+            self.perform_search()
+            self.restore_scroll(state)
+
+    def restore_scroll(self, state):
+        # The scroll range is only known once the new results are laid out
+        scroll = state.get("scroll", 0)
+        QTimer.singleShot(0, lambda: self.scroll.verticalScrollBar().setValue(scroll))
+
+    def _restore_fields(self, state):
+        pass
+
     def perform_search(self):
         raise NotImplementedError
 
     def populate_grid(self, plants):
-        self._clear_layout()
-
-        for p in plants:
-            card = PlantCard(p)
-            card.clicked.connect(self.open_detail)
-            self.flow_layout.addWidget(card)
-
-        self.content_widget.updateGeometry()
-        self.status_label.setText(f"Found {len(plants)} plants.")
+        raise NotImplementedError
 
-    def _clear_layout(self):
-        # To be overridden by subclasses
-        pass
+    def detail_view(self):
+        main_window = self.window()
+        modal = getattr(main_window, "detail_modal", None)
+        if modal is None:
+            modal = main_window.detail_modal = DetailModal(main_window)
+        return modal
 
     def open_detail(self, plant, card_widget):
+        opened_at = time.perf_counter() if instrument.ENABLED else None
         main_window = self.window()
         pos = card_widget.mapTo(main_window, QPoint(0, 0))
         start_geo = QRect(pos, card_widget.size())
-        dialog = DetailModal(plant, main_window, start_geometry=start_geo)
+        dialog = self.detail_view()
+        dialog.opened_at = opened_at
+        dialog.recommend = self.dm.similar
+        dialog.history = getattr(main_window, "history", None)
+        dialog.bind(plant, start_geometry=start_geo)
         dialog.exec_()
 
 
 class HomeTab(BaseTab):
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, history=None):
         super().__init__(data_manager)
+        self.history = history
 
         self.setObjectName("HomeTab")
         self.setAttribute(Qt.WA_StyledBackground, True)
@@ -444,62 +1140,206 @@ class HomeTab(BaseTab):
         self.list_layout.setAlignment(Qt.AlignTop)
         self.list_layout.setSpacing(10)
 
-        QTimer.singleShot(100, self.perform_search)
+        # Favorites and Recently viewed sit above the leaderboard while the
+        # search is empty
+        self.favorites_row = PlantChipRow(self, "Favorites")
+        self.recent_row = PlantChipRow(self, "Recently viewed")
+        self.list_layout.addWidget(self.favorites_row)
+        self.list_layout.addWidget(self.recent_row)
+        self.leaderboard = Leaderboard(self, self.list_layout)
+        if history is not None:
+            history.add_listener(self.refresh_history)
+
+        self.perform_search()
+
+    def _history_plants(self, plant_ids):
+        # Ids of plants no longer in any catalogue are skipped
+        plants = (self.catalogues.plant(plant_id) for plant_id in plant_ids)
+        return [p for p in plants if p is not None][:HOME_SECTION_SIZE]
+
+    def refresh_history(self):
+        # O(k): reads the first few ids of each list and looks them up
+        history = self.history
+        if history is None or self.search_bar.text():
+            self.favorites_row.hide()
+            self.recent_row.hide()
+            return
+        # A few extra ids make up for plants that can't be found
+        k = HOME_SECTION_SIZE * 2
+        self.favorites_row.show_plants(self._history_plants(history.favorites(k)))
+        self.recent_row.show_plants(self._history_plants(history.recent(k)))
 
     def perform_search(self):
         text = self.search_bar.text()
+        with instrument.timed("search.home"):
+            results = self.dm.query(text, mode="top")
+            # One extra tells whether there are more without counting them all
+            shown = results.page(0, HOME_RESULT_LIMIT + 1)
+        total = results.known_count()
         if not text:
-            results = self.dm.get_top_10()
             self.status_label.setText("Top 10 Leaderboard")
+        elif len(shown) <= HOME_RESULT_LIMIT:
+            self.status_label.setText(f"Found {len(shown)} matches.")
+        elif total is not None:
+            self.status_label.setText(f"Found {total} matches, showing the first {HOME_RESULT_LIMIT}.")
         else:
-            results = self.dm.search(text)
-            self.status_label.setText(f"Found {len(results)} matches.")
+            self.status_label.setText(f"Showing the first {HOME_RESULT_LIMIT} matches.")
+        shown = shown[:HOME_RESULT_LIMIT]
 
-        self.populate_leaderboard(results)
+        with profiling.phase(results.profile, "render"):
+            self.populate_leaderboard(shown)
+        profiling.finish(results.profile)
+        self.refresh_history()
 
+    @instrument.timed("render.leaderboard")
     def populate_leaderboard(self, plants):
-        self._clear_layout()
-
-        for idx, p in enumerate(plants):
-            row = RankedPlantRow(p, rank=idx + 1)
-            row.clicked.connect(self.open_detail)
-            self.list_layout.addWidget(row)
-
+        self.leaderboard.show(plants)
         self.content_widget.updateGeometry()
 
     def populate_grid(self, plants):
         self.populate_leaderboard(plants)
 
-    def _clear_layout(self):
-        # Clear the list layout
-        while self.list_layout.count():
-            item = self.list_layout.takeAt(0)
-            if item.widget():
-                widget = item.widget()
-                widget.setParent(None)
-                widget.deleteLater()
-
 
 class ListTab(BaseTab):
-    def __init__(self, data_manager):
+    # With `search` off the grid stays empty until perform_search or
+    # search_in_steps fills it
+    def __init__(self, data_manager, strategy=None, search=True):
         super().__init__(data_manager)
 
-        # Create flow layout for ListTab
-        self.flow_layout = FlowLayout(self.content_widget)
+        self.renderer = grid_renderer(strategy)(self)
+        self.scroll.verticalScrollBar().valueChanged.connect(self.renderer.on_scroll)
+        self.scroll.viewport().installEventFilter(self)
+        enable_kinetic_scrolling(self.scroll)
 
         self.search_bar.setPlaceholderText("Search library...")
-        QTimer.singleShot(100, self.perform_search)
+
+        # Threshold filters; 0 means "Any" and leaves the column unfiltered
+        filter_row = QHBoxLayout()
+        filter_row.setSpacing(10)
+        self.min_rating = self._make_filter(filter_row, "Rating ≥", 5.0, 0.5)
+        self.min_o2 = self._make_filter(filter_row, "O₂ ≥", 10.0, 0.1)
+        self.min_co2 = self._make_filter(filter_row, "CO₂ ≥", 10.0, 0.1)
+        filter_row.addStretch()
+
+        # Exports the current result set; doubles as Cancel while running
+        self.results = None
+        self.export_worker = None
+        self.export_btn = QPushButton("Export…")
+        self.export_btn.setStyleSheet("""
+            QPushButton { background-color: rgba(0, 0, 0, 50); color: white; font-size: 12px;
+                          border: 1px solid rgba(255, 255, 255, 50); border-radius: 8px; padding: 4px 12px; }
+            QPushButton:hover { background-color: rgba(0, 0, 0, 80); }
+        """)
+        self.export_btn.clicked.connect(self.start_export)
+        filter_row.addWidget(self.export_btn)
+        self.layout.insertLayout(1, filter_row)
+
+        if search:
+            self.perform_search()
+
+    def _make_filter(self, row, label, maximum, step):
+        lbl = QLabel(label)
+        lbl.setStyleSheet("color: #ddd; font-size: 12px;")
+
+        box = QDoubleSpinBox()
+        box.setRange(0.0, maximum)
+        box.setSingleStep(step)
+        box.setDecimals(1)
+        box.setSpecialValueText("Any")
+        box.setFixedWidth(80)
+        box.valueChanged.connect(self.on_search_changed)
+
+        row.addWidget(lbl)
+        row.addWidget(box)
+        return box
+
+    def current_filter(self):
+        def bound(box):
+            return box.value() or None
+
+        return PlantFilter(min_rating=bound(self.min_rating),
+                           min_o2=bound(self.min_o2),
+                           min_co2=bound(self.min_co2))
+
+    def session_state(self) -> dict:
+        state = super().session_state()
+        state["filters"] = [box.value() for box in self._filter_boxes()]
+        return state
+
+    def _restore_fields(self, state):
+        for box, value in zip(self._filter_boxes(), state.get("filters", ())):
+            box.blockSignals(True)
+            box.setValue(value)
+            box.blockSignals(False)
+
+    def _filter_boxes(self):
+        return (self.min_rating, self.min_o2, self.min_co2)
+
+    def eventFilter(self, obj, event):
+        if obj is self.scroll.viewport() and event.type() == QEvent.Resize:
+            self.renderer.on_resize()
+        return False
 
     def perform_search(self):
         text = self.search_bar.text()
-        results = self.dm.search_all(text)
-        self.populate_grid(results)
-
-    def _clear_layout(self):
-        # Clear the flow layout
-        while self.flow_layout.count():
-            item = self.flow_layout.takeAt(0)
-            if item.widget():
-                widget = item.widget()
-                widget.setParent(None)
-                widget.deleteLater()
\ No newline at end of file
+        with instrument.timed("search.list"):
+            results = self.dm.query(text, mode="all", filters=self.current_filter())
+        self.results = results
+        with profiling.phase(results.profile, "render"):
+            self.populate_grid(results)
+        profiling.finish(results.profile)
+
+    def search_in_steps(self):
+        # perform_search as an idle task: the cards are built a few per step
+        results = self.dm.query(self.search_bar.text(), mode="all", filters=self.current_filter())
+        self.results = results
+        yield from self.renderer.show_in_steps(as_result(results))
+        self.status_label.setText(self.renderer.status_text())
+        profiling.finish(results.profile)
+
+    def start_export(self):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            return
+        if self.results is None:
+            return
+
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export plants", "plants.csv", "CSV (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        fmt = "jsonl" if path.endswith(".jsonl") or selected.startswith("JSON") else "csv"
+
+        worker = ExportWorker(self.results.detached(), path, fmt)
+        worker.progress.connect(self._on_export_progress)
+        worker.done.connect(self._on_export_done)
+        worker.failed.connect(self._on_export_failed)
+        worker.finished.connect(worker.deleteLater)
+        self.export_worker = worker
+        self.export_btn.setText("Cancel export")
+        worker.start()
+
+    def _on_export_progress(self, written, total):
+        percent = written * 100 // total if total else 100
+        self.status_label.setText(f"Exporting… {percent}% ({written} of {total} plants)")
+
+    def _on_export_done(self, written):
+        path = self.export_worker.path
+        self._end_export()
+        if written is None:
+            self.status_label.setText("Export cancelled.")
+        else:
+            self.status_label.setText(f"Exported {written} plants to {os.path.basename(path)}.")
+
+    def _on_export_failed(self, message):
+        self._end_export()
+        self.status_label.setText(f"Export failed: {message}")
+
+    def _end_export(self):
+        self.export_worker = None
+        self.export_btn.setText("Export…")
+
+    @instrument.timed("render.grid")
+    def populate_grid(self, plants):
+        self.renderer.show(as_result(plants))
+        self.status_label.setText(self.renderer.status_text())
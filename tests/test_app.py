@@ -1,10 +1,22 @@
 import unittest
+import importlib.util
+import json
+import math
 import os
+import random
 import sys
+import tempfile
+import time
+from unittest import mock
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.core import DataManager
+from src import history, instrument, profiling, snapshot
+from src.export import export_results
+from src.recommend import KDTree, Recommender
+from src.core import Plant, DataManager, CatalogueSet, PlantFilter, HAS_NUMPY, normalize_text
+
+HAS_QT = importlib.util.find_spec("PyQt5") is not None
 
 class TestDataManager(unittest.TestCase):
     def setUp(self):
@@ -26,6 +38,26 @@ class TestDataManager(unittest.TestCase):
         self.assertEqual(dm.plants[0].name, "Alpha Plant")
         self.assertEqual(dm.plants[1].rating, 3.5)
 
+    def test_load_report(self):
+        with open(self.test_csv, "a") as f:
+            f.write("5,Bad Plant,Bad sci,Low,Low,Desc,n/a\n")
+            f.write("6,Short Plant\n")
+            f.write("\n")
+            f.write("7,Eta Plant,Eta sci,Low,Low,,2.0\n")
+        dm = DataManager(self.test_csv)
+        self.assertEqual(len(dm.plants), 5)
+        self.assertEqual(dm.plants[-1].description, "No description available")
+        report = dm.load_report.summary()
+        self.assertEqual(report["loaded"], 5)
+        self.assertEqual(report["errors"], {"invalid rating": 1, "missing fields": 1})
+        self.assertEqual([s["line"] for s in report["samples"]], [6, 7])
+
+        with open(self.test_csv, "w") as f:
+            f.write("Plant ID,Plant Name\n1,Alpha Plant\n")
+        dm = DataManager(self.test_csv)
+        self.assertEqual(dm.plants, [])
+        self.assertEqual(dm.load_report.errors["missing column"], 1)
+
     def test_top_10_sorting(self):
         dm = DataManager(self.test_csv)
         top = dm.get_top_10()
@@ -40,5 +72,865 @@ class TestDataManager(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].name, "Beta Plant")
 
+    def test_query_paging(self):
+        dm = DataManager(self.test_csv)
+        result = dm.query("", mode="all")
+        self.assertEqual(result.count(), 4)
+        self.assertEqual([p.name for p in result.page(0, 2)], ["Alpha Plant", "Beta Plant"])
+        self.assertEqual([p.name for p in result.page(2, 2)], ["Gamma Plant", "Zeta Plant"])
+        self.assertEqual(result.page(4, 2), [])
+
+    def test_query_lazy_matches(self):
+        dm = DataManager(self.test_csv)
+        result = dm.query("a plant", mode="all")
+        self.assertEqual([p.name for p in result.page(0, 1)], ["Alpha Plant"])
+        self.assertEqual([p.name for p in result.page(1, 2)], ["Beta Plant", "Gamma Plant"])
+        self.assertEqual(result.count(), 4)
+        self.assertEqual([p.name for p in result.page(0, 1)], ["Alpha Plant"])
+        self.assertEqual(len(dm.query("zeta").page(0, 30)), 1)
+
+    def test_query_cache(self):
+        dm = DataManager(self.test_csv)
+        first = dm.search_all("plant")
+        self.assertEqual(dm.cache_info()["misses"], 1)
+        second = dm.search_all("  PLANT ")
+        self.assertEqual(dm.cache_info()["hits"], 1)
+        self.assertEqual(first, second)
+        self.assertGreater(dm.cache_info()["bytes"], 0)
+
+        dm.load_data()
+        self.assertEqual(dm.cache_info()["entries"], 0)
+        self.assertEqual(dm.search_all("plant"), first)
+        self.assertEqual(dm.cache_info()["misses"], 2)
+
+    def test_filters(self):
+        with open(self.test_csv, "a") as f:
+            f.write("5,Delta Palm,Delta sci,3.2,2.4,Desc,4.5\n")
+            f.write("6,Omega Palm,Omega sci,1.1,2.9,Desc,3.0\n")
+        dm = DataManager(self.test_csv)
+
+        results = dm.search_all("", filters=PlantFilter(min_rating=4, min_co2=2.1))
+        self.assertEqual([p.name for p in results], ["Delta Palm"])
+
+        results = dm.search_all("palm", filters=PlantFilter(min_co2=2.1))
+        self.assertEqual([p.name for p in results], ["Delta Palm", "Omega Palm"])
+
+        results = dm.search_all("", filters=PlantFilter(min_rating=4.5))
+        self.assertEqual([p.name for p in results], ["Alpha Plant", "Delta Palm", "Zeta Plant"])
+
+        top = dm.search("", filters=PlantFilter(max_rating=4.5))
+        self.assertEqual([p.name for p in top], ["Delta Palm", "Gamma Plant", "Beta Plant", "Omega Palm"])
+
+        self.assertEqual(dm.search_all("", filters=PlantFilter(min_o2=10)), [])
+
+    def test_weighted_top_k(self):
+        dm = DataManager(self.test_csv, columnar=False)
+        self.assertEqual([p.name for p in dm.top_k(2)], ["Alpha Plant", "Zeta Plant"])
+        self.assertEqual(dm.top_k(10), dm.get_top_10())
+        # Once the rating order is built, a negative k must not slice from the end
+        dm.get_all_sorted(by_rating=True)
+        self.assertEqual(dm.top_k(-1), [])
+        with self.assertRaises(ValueError):
+            dm.top_k(3, {"ratting": 1.0})
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy not installed")
+    def test_columnar_matches_python(self):
+        python_dm = DataManager(self.test_csv, columnar=False)
+        numpy_dm = DataManager(self.test_csv, columnar=True)
+        self.assertTrue(numpy_dm.columnar)
+        self.assertEqual(numpy_dm.get_top_10(), python_dm.get_top_10())
+        self.assertEqual(numpy_dm.get_all_sorted(by_rating=True), python_dm.get_all_sorted(by_rating=True))
+        weights = {"rating": 0.5, "co2": 0.5}
+        self.assertEqual(numpy_dm.top_k(3, weights), python_dm.top_k(3, weights))
+
+    def test_normalized_search(self):
+        with open(self.test_csv, "a", encoding="utf-8") as f:
+            f.write("5,Usambara Violet,Saintpaulia  Ionántha,Mid,Mid,Desc,4.0\n")
+        dm = DataManager(self.test_csv)
+        self.assertEqual(normalize_text("  Saintpaulia\tIONÁNTHA "), "saintpaulia ionantha")
+        self.assertEqual([p.name for p in dm.search_all("ionantha")], ["Usambara Violet"])
+        self.assertEqual([p.name for p in dm.search_all("IONÁNTHA")], ["Usambara Violet"])
+        self.assertEqual([p.name for p in dm.search_all("saintpaulia ion")], ["Usambara Violet"])
+
+    def test_word_start_search(self):
+        dm = DataManager(self.test_csv)
+        self.assertEqual(len(dm.search_all("eta")), 2)
+        self.assertEqual(list(dm.query("eta", word_start=True)), [])
+        self.assertEqual([p.name for p in dm.query("pl be", word_start=True)], ["Beta Plant"])
+
+    def test_export(self):
+        dm = DataManager(self.test_csv)
+        out = "test_export"
+        try:
+            progress = []
+            written = export_results(dm.query("plant"), out + ".csv", "csv",
+                                     progress=lambda n, total: progress.append((n, total)), chunk_size=3)
+            self.assertEqual(written, 4)
+            self.assertEqual(progress, [(3, 4), (4, 4)])
+            self.assertEqual([p.name for p in DataManager(out + ".csv").plants],
+                             [p.name for p in dm.plants])
+
+            self.assertEqual(export_results(dm.query("a"), out + ".jsonl", "jsonl"), 4)
+            with open(out + ".jsonl", encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual(rows[1]["name"], "Beta Plant")
+            self.assertEqual(rows[1]["rating"], 3.5)
+
+            self.assertIsNone(export_results(dm.query(""), out + ".cancel", "csv", is_cancelled=lambda: True))
+            self.assertFalse(os.path.exists(out + ".cancel"))
+            self.assertFalse(os.path.exists(out + ".cancel.part"))
+        finally:
+            for ext in (".csv", ".jsonl"):
+                if os.path.exists(out + ext):
+                    os.remove(out + ext)
+
+    def test_catalogue_set(self):
+        other_csv = "test_plants_south.csv"
+        with open(other_csv, "w") as f:
+            f.write("Plant ID,Plant Name,Plant Scientific Name,Plant O2 Release Data,Plant CO Absorb Data,Short Description of Plant,Recommendation Rating out of 5\n")
+            f.write("11,Delta Plant,Delta sci,4.0,1.0,Desc,4.5\n")
+            f.write("12,Epsilon Plant,Epsilon sci,1.0,3.0,Desc,2.0\n")
+        try:
+            cs = CatalogueSet.load([self.test_csv, other_csv])
+            self.assertEqual(cs.names, ["test_plants", "test_plants_south"])
+            whole = DataManager.from_plants(cs.source("test_plants").plants + cs.source("test_plants_south").plants)
+
+            for q, mode, by_rating, filters in [("", "top", False, None), ("", "all", False, None),
+                                                ("", "all", True, None), ("plant", "all", False, None),
+                                                ("plant", "all", True, None),
+                                                ("", "all", False, PlantFilter(min_rating=4.0))]:
+                self.assertEqual([p.id for p in cs.query(q, mode, by_rating, filters)],
+                                 [p.id for p in whole.query(q, mode, by_rating, filters)])
+            self.assertEqual([p.name for p in cs.get_top_10()][:3], ["Alpha Plant", "Zeta Plant", "Delta Plant"])
+
+            result = cs.query("", by_rating=True)
+            self.assertEqual(len(result), 6)
+            self.assertEqual([p.id for p in result.page(2, 2)], ["11", "3"])
+            self.assertEqual([p.id for p in result.page(0, 1)], ["1"])
+            self.assertEqual(len(list(result.detached())), 6)
+
+            weights = {"rating": 0.5, "o2": 0.5}
+            self.assertEqual([p.id for p in cs.top_k(3, weights)], [p.id for p in whole.top_k(3, weights)])
+            self.assertEqual(cs.top_k(-5), [])
+            with self.assertRaises(ValueError):
+                cs.top_k(3, {"o3": 1.0})
+        finally:
+            os.remove(other_csv)
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "plants.snap")
+            session = {"tab": 1, "home": {"query": "alp", "scroll": 0}}
+            original = CatalogueSet.load([self.test_csv])
+            original.source("test_plants").get_all_sorted(True)
+            self.assertTrue(snapshot.save([self.test_csv], original, session, path=path))
+
+            restored, restored_session = snapshot.load([self.test_csv], path=path)
+            self.assertEqual(restored_session, session)
+            dm = restored.source("test_plants")
+            self.assertIsNone(dm.load_report)
+            self.assertEqual(dm.plants, original.source("test_plants").plants)
+            for by_rating in (False, True):
+                self.assertEqual([p.id for p in dm.get_all_sorted(by_rating)],
+                                 [p.id for p in original.get_all_sorted(by_rating)])
+            self.assertEqual([p.id for p in dm.search("plant")], ["1", "2", "3", "4"])
+
+            # A damaged snapshot is ignored and the CSV parsed instead
+            with open(path, "r+b") as f:
+                f.seek(-3, os.SEEK_END)
+                f.write(b"\xff\xff\xff")
+            with self.assertLogs("src.snapshot", "WARNING"):
+                restored, _ = snapshot.load([self.test_csv], path=path)
+            self.assertEqual(len(restored.source("test_plants").plants), 4)
+            self.assertIsNotNone(restored.source("test_plants").load_report)
+
+            # So is the snapshot of a CSV edited since
+            snapshot.save([self.test_csv], original, session, path=path)
+            with open(self.test_csv, "a") as f:
+                f.write("5,Eta Plant,Eta sci,Mid,Mid,Desc,1.0\n")
+            restored, _ = snapshot.load([self.test_csv], path=path)
+            self.assertEqual(len(restored.source("test_plants").plants), 5)
+
+    def test_query_server(self):
+        import asyncio
+        import http.client
+        import threading
+        from src import server as query_server
+
+        srv = query_server.QueryServer(CatalogueSet.load([self.test_csv]))
+        loop = asyncio.new_event_loop()
+        listener = loop.run_until_complete(asyncio.start_server(srv.handle, "127.0.0.1", 0))
+        port = listener.sockets[0].getsockname()[1]
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        def get(path):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                return response.status, json.loads(response.read())
+            finally:
+                conn.close()
+
+        try:
+            status, body = get("/search?q=plant&by_rating=1&limit=2")
+            self.assertEqual((status, body["total"]), (200, 4))
+            self.assertEqual([p["id"] for p in body["results"]], ["1", "4"])
+            self.assertEqual(get("/search?q=plant&by_rating=1&limit=2"), (status, body))
+            self.assertEqual(srv.cache.hits, 1)
+
+            with mock.patch.object(query_server, "STREAM_CHUNK", 3):
+                status, body = get("/search?offset=1")
+            self.assertEqual([p["id"] for p in body["results"]], ["2", "3", "4"])
+            self.assertEqual(get("/search?min_rating=4.5")[1]["total"], 2)
+            self.assertEqual([p["id"] for p in get("/top?k=2")[1]["results"]], ["1", "4"])
+            self.assertEqual(get("/plants/3")[1]["name"], "Gamma Plant")
+            self.assertEqual(len(get("/plants/3/similar?k=2")[1]["results"]), 2)
+            self.assertEqual(get("/plants/99")[0], 404)
+            self.assertEqual(get("/search?limit=x")[0], 400)
+            self.assertEqual(get("/top?k=-5")[0], 400)
+            self.assertEqual(get("/top?k=0")[0], 400)
+            self.assertEqual(get("/top?o3=1")[0], 400)
+            self.assertEqual(get("/plants/3/similar?k=-1")[0], 400)
+            self.assertEqual(get("/search?limit=0")[0], 400)
+            self.assertEqual(get("/search?limit=-3")[0], 400)
+
+            # A slow search runs off the event loop, so other requests are answered meanwhile
+            def slow_search(params):
+                time.sleep(0.5)
+                return {"results": []}
+
+            with mock.patch.object(srv, "search", side_effect=slow_search):
+                slow = threading.Thread(target=get, args=("/search?q=slow",))
+                slow.start()
+                time.sleep(0.05)
+                started = time.perf_counter()
+                self.assertEqual(get("/health")[0], 200)
+                self.assertLess(time.perf_counter() - started, 0.3)
+                slow.join()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            listener.close()
+            # Connections are closed client-side; let their handlers finish.
+            # gather() with no tasks would make its future on another loop.
+            pending = asyncio.all_tasks(loop)
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending))
+            loop.close()
+
+    def test_query_profile(self):
+        seen = []
+        profiling.add_hook(seen.append)
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(profiling, "ENABLED", True), \
+                mock.patch.object(profiling, "SLOW_QUERY_MS", 0.0), \
+                mock.patch.object(profiling, "SLOW_QUERY_LOG", os.path.join(tmp, "slow.log")):
+            try:
+                dm = DataManager(self.test_csv)
+                self.assertEqual(len(dm.search_all("plant")), 4)
+                self.assertEqual(len(dm.search_all("plant", PlantFilter(min_rating=4))), 3)
+
+                results = dm.query("alpha")
+                results.page(0, 1)
+                self.assertFalse(results.profile.finished)
+                profiling.finish(results.profile)
+
+                south = os.path.join(tmp, "south.csv")
+                with open(self.test_csv) as src, open(south, "w") as dst:
+                    dst.write(src.read())
+                cs = CatalogueSet([("a", DataManager(self.test_csv)), ("b", DataManager(south))])
+                self.assertEqual(len(cs.search_all("beta")), 2)
+            finally:
+                profiling.remove_hook(seen.append)
+                if profiling._slow_file is not None:
+                    profiling._slow_file.close()
+
+            first, filtered, partial, merged = seen
+            self.assertEqual((first.rows_scanned, first.matches), (4, 4))
+            self.assertEqual(first.versions, {self.test_csv: 1})
+            self.assertEqual(set(first.phases), {"plan", "scan"})
+            self.assertEqual(filtered.matches, 3)
+            self.assertEqual(filtered.as_dict()["filters"], {"min_rating": 4})
+            # Only the rows the page needed were tested
+            self.assertEqual((partial.rows_scanned, partial.matches), (1, 1))
+            self.assertEqual((merged.rows_scanned, merged.matches, len(merged.versions)), (8, 2, 2))
+
+            with open(os.path.join(tmp, "slow.log")) as f:
+                logged = [json.loads(line) for line in f]
+            self.assertEqual([entry["query"] for entry in logged], ["plant", "plant", "alpha", "beta"])
+            self.assertIn("scan", logged[0]["phases_ms"])
+
+            prof = profiling.capture(dm.search_all, "gamma", path=os.path.join(tmp, "q.prof"))
+            self.assertTrue(os.path.getsize(prof) > 0)
+
+    def test_warm_up(self):
+        cs = CatalogueSet.load([self.test_csv])
+        progress = list(cs.warm_up())
+        self.assertEqual(progress[-1][0], progress[-1][1])
+        dm = cs.source("test_plants")
+        self.assertEqual(set(dm.current._sort_orders), {False, True})
+        self.assertIsNotNone(dm.current._tokens)
+        self.assertIsNotNone(dm.current._recommender)
+
+        # A reload abandons the rest of the warm-up
+        steps = dm.warm_up()
+        next(steps)
+        dm.load_data()
+        self.assertEqual(list(steps), [])
+
+    def test_reloads_during_searches(self):
+        import threading
+
+        # Plant ids carry their generation and generations alternate in size,
+        # so a result mixing two versions, or a half-built one, shows up
+        def generation(g):
+            return [Plant(f"{g}:{i}", f"Fern {i}", "Sci", str(i % 7), "1.0", "Desc", float(i % 5))
+                    for i in range(150 if g % 2 else 100)]
+
+        def size(g):
+            return 150 if g % 2 else 100
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Odd generations come from this file through reload(), even ones from _reset
+            path = os.path.join(tmp, "plants.csv")
+            with open(path, "w") as f:
+                f.write(open(self.test_csv).readline())
+                for p in generation(1):
+                    f.write(f"{p.id},{p.name},{p.scientific_name},{p.o2_data},{p.co2_data},{p.description},{p.rating}\n")
+            dm = DataManager(path)
+            dm.similar(dm.plants[0])
+
+            stop = threading.Event()
+            errors = []
+            rounds = []
+
+            def check(what, plants, expected):
+                gens = {p.id.split(":")[0] for p in plants}
+                if len(gens) != 1 or len(plants) != expected(int(gens.pop())):
+                    errors.append((what, len(plants), sorted({p.id.split(":")[0] for p in plants})))
+
+            def reader():
+                last_version = 0
+                n = 0
+                try:
+                    while not stop.is_set():
+                        if dm.version < last_version:
+                            errors.append(("version went back", last_version, dm.version))
+                        last_version = dm.version
+                        check("search_all", dm.search_all("fern"), size)
+                        ranked = dm.query("fern", by_rating=True)
+                        first = ranked.page(0, 20)
+                        check("paged", first + ranked.page(20, 1000), size)
+                        if [p.rating for p in first] != sorted((p.rating for p in first), reverse=True):
+                            errors.append(("order", [p.id for p in first]))
+                        check("filter", dm.search_all("", PlantFilter(min_rating=3)), lambda g: size(g) * 2 // 5)
+                        check("top_k", dm.top_k(10, {"rating": 1, "o2": 1}), lambda g: 10)
+                        check("similar", dm.similar(dm.plants[3], 3), lambda g: 3)
+                        n += 1
+                except Exception as e:
+                    errors.append(("raised", repr(e)))
+                rounds.append(n)
+
+            switch = sys.getswitchinterval()
+            sys.setswitchinterval(1e-5)
+            threads = [threading.Thread(target=reader) for _ in range(4)]
+            try:
+                for thread in threads:
+                    thread.start()
+                for g in range(2, 42):
+                    if g % 2:
+                        self.assertEqual(len(dm.reload().result().plants), 150)
+                    else:
+                        dm._reset(generation(g))
+                    time.sleep(0.002)
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+                sys.setswitchinterval(switch)
+
+            self.assertEqual(errors, [])
+            self.assertTrue(all(rounds), rounds)
+            self.assertEqual(dm.version, 41)
+
+
+class TestRecommender(unittest.TestCase):
+    def make_plants(self, n, seed=7):
+        rng = random.Random(seed)
+        words = ["palm", "fern", "ivy", "lily", "orchid", "cactus", "trailing", "glossy", "hardy"]
+        return [Plant(str(i), f"{rng.choice(words).title()} {i}", f"{rng.choice(words)} sci",
+                      f"{rng.uniform(0, 5):.2f}", f"{rng.uniform(0, 3):.2f}",
+                      " ".join(rng.sample(words, 3)), round(rng.uniform(1, 5), 1))
+                for i in range(n)]
+
+    def test_kdtree_matches_brute_force(self):
+        rng = random.Random(3)
+        points = [(rng.random(), rng.random(), rng.random()) for _ in range(500)]
+        tree = KDTree(list(zip(*points)), range(len(points)))
+        for _ in range(20):
+            q = (rng.random(), rng.random(), rng.random())
+            expected = sorted(range(len(points)), key=lambda i: math.dist(q, points[i]))[:7]
+            self.assertEqual([i for _, i in tree.nearest(q, 7)], expected)
+
+    def test_similar(self):
+        plants = self.make_plants(300)
+        rec = Recommender(plants)
+        target = plants[10]
+        twin = Plant("twin", target.name, target.scientific_name, target.o2_data,
+                     target.co2_data, target.description, target.rating)
+        plants.append(twin)
+        rec.update(plants)
+        self.assertEqual(rec._pending, [300])
+
+        similar = [p for _, p in rec.similar(target, 5)]
+        self.assertEqual(len(similar), 5)
+        self.assertNotIn(target, similar)
+        self.assertIs(similar[0], twin)
+
+        # Removing a plant leaves a tombstone instead of rebuilding
+        del plants[0]
+        rec.update(plants)
+        self.assertEqual(rec._pending, [299])
+        self.assertNotIn(-1, [i for _, i in rec.tree.nearest((0.5, 0.5, 0.5), 300)])
+        self.assertIs(rec.similar(target, 1)[0][1], twin)
+
+    def test_data_manager_similar(self):
+        plants = self.make_plants(50)
+        dm = DataManager.from_plants(plants)
+        self.assertEqual(len(dm.similar(plants[0], 3)), 3)
+        dm._reset(plants[:45])
+        self.assertTrue(all(p in plants[:45] for p in dm.similar(plants[0], 10)))
+
+
+class TestHistory(unittest.TestCase):
+    def test_log_replay_and_compaction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.log")
+            h = history.History(path, recent_size=3)
+            changes = []
+            h.add_listener(lambda: changes.append(1))
+            for plant_id in ["1", "2", "1", "3", "4", "weird\nid"]:
+                h.record_view(plant_id)
+            h.set_favorite("2")
+            h.set_favorite("3")
+            h.toggle_favorite("2")
+            self.assertEqual(len(changes), 9)
+            # Nothing reaches the disk until a flush
+            self.assertFalse(os.path.exists(path))
+            h.flush()
+            h.close()
+
+            self.assertEqual(h.recent(), ["weird\nid", "4", "3"])
+            self.assertEqual(h.recent(2), ["weird\nid", "4"])
+            self.assertEqual(h.favorites(), ["3"])
+            self.assertEqual(h.most_viewed(1), ["1"])
+
+            # A crash mid-write leaves a torn last line, which replay drops
+            with open(path, "a") as f:
+                f.write("f 4")
+            again = history.History(path, recent_size=3)
+            self.assertEqual((again.recent(), again.favorites(), again.views), (h.recent(), h.favorites(), h.views))
+            again.record_view("2")
+            again.close()
+            self.assertEqual(history.History(path, recent_size=3).recent(), ["2", "weird\nid", "4"])
+
+            # Compaction rewrites the log as the current state
+            with mock.patch.object(history, "COMPACT_MIN_LINES", 10):
+                busy = history.History(path, recent_size=3)
+                for _ in range(20):
+                    busy.record_view("1")
+                busy.flush()
+                busy.close()
+            with open(path) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], history.HEADER.strip())
+            self.assertEqual(len(lines), 1 + len(busy.views) + 1)
+            restored = history.History(path, recent_size=3)
+            self.assertEqual((restored.recent(), restored.favorites(), restored.views),
+                             (busy.recent(), busy.favorites(), busy.views))
+            self.assertEqual(restored.views["1"], 22)
+
+            # An unreadable log is set aside rather than appended to
+            with open(path, "w") as f:
+                f.write("something else\n")
+            self.assertEqual(history.History(path).recent(), [])
+            self.assertTrue(os.path.exists(path + ".old"))
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.reset()
+
+    def test_histogram(self):
+        hist = instrument.Histogram()
+        for ms in (0.5, 1.0, 2.0, 100.0):
+            hist.record(ms)
+        summary = hist.summary()
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["max_ms"], 100.0)
+        self.assertEqual(summary["last_ms"], 100.0)
+        self.assertLessEqual(hist.percentile(50), 2.0)
+
+    def test_timer_records_stage(self):
+        @instrument._Timer("stage.fn")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        with instrument._Timer("stage.block"):
+            pass
+        stages = instrument.snapshot()["stages"]
+        self.assertEqual(stages["stage.fn"]["count"], 1)
+        self.assertEqual(stages["stage.block"]["count"], 1)
+
+    def test_output_defaults_to_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {"PLANTS_CACHE_DIR": os.path.join(tmp, "cache")}), \
+                mock.patch.object(instrument, "DUMP_PATH", None), \
+                mock.patch.object(profiling, "SLOW_QUERY_LOG", None):
+            instrument.dump()
+            self.assertTrue(os.path.exists(os.path.join(tmp, "cache", "instrumentation.json")))
+            self.assertEqual(profiling.slow_query_log_path(), os.path.join(tmp, "cache", "slow_queries.log"))
+
+
+@unittest.skipUnless(HAS_QT, "PyQt5 not installed")
+class TestAssetPack(unittest.TestCase):
+    def test_pack_roundtrip(self):
+        from PyQt5.QtGui import QImage, QColor
+        from src.assetpack import AssetPack, AssetPackError, build_pack
+
+        with tempfile.TemporaryDirectory() as workdir:
+            for plant_id, (w, h) in (("1", (600, 300)), ("2", (100, 100))):
+                img = QImage(w, h, QImage.Format_ARGB32)
+                img.fill(QColor(0, 128, 0))
+                img.save(os.path.join(workdir, f"{plant_id}.png"))
+            with open(os.path.join(workdir, "notes.txt"), "w") as f:
+                f.write("not an image")
+
+            path = os.path.join(workdir, "plants.pack")
+            self.assertEqual(build_pack(workdir, path, sizes=(128, 256)), 2)
+
+            pack = AssetPack(path)
+            try:
+                self.assertEqual([e.max_side for e in pack.entries["1"]], [128, 256, 0])
+                self.assertEqual([e.max_side for e in pack.entries["2"]], [0])
+                self.assertEqual(pack.variant("1", 100, 100).max_side, 128)
+                self.assertEqual(pack.variant("1", 400, 200).max_side, 0)
+                self.assertEqual(pack.variant("1").max_side, 0)
+                self.assertIsNone(pack.variant("3"))
+
+                img = pack.image("1", 200, 100)
+                self.assertEqual((img.width(), img.height()), (256, 128))
+                self.assertEqual(img.pixelColor(10, 10).green(), 128)
+            finally:
+                pack.close()
+
+            with open(path, "r+b") as f:
+                f.write(b"XXXX")
+            with self.assertRaises(AssetPackError):
+                AssetPack(path)
+
+            # Ids that don't fit the index are refused rather than truncated
+            QImage(10, 10, QImage.Format_ARGB32).save(os.path.join(workdir, "x" * 33 + ".png"))
+            with self.assertRaises(AssetPackError):
+                build_pack(workdir, path)
+
+
+@unittest.skipUnless(HAS_QT, "PyQt5 not installed")
+class TestIdleScheduler(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication([])
+
+    def run_until_idle(self, scheduler, timeout=2.0):
+        deadline = time.perf_counter() + timeout
+        while scheduler.pending() and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def test_priority_and_progress(self):
+        from src.idle import IdleScheduler
+
+        ran = []
+
+        def task(name, steps):
+            for i in range(1, steps + 1):
+                ran.append(name)
+                yield i, steps
+
+        scheduler = IdleScheduler(idle_ms=0, slice_ms=0)
+        scheduler.add("later", task("later", 2), priority=2)
+        scheduler.add("first", task("first", 3), priority=0)
+        scheduler.add("dropped", task("dropped", 1), priority=1)
+        scheduler.cancel("dropped")
+        self.run_until_idle(scheduler)
+        self.assertEqual(ran, ["first"] * 3 + ["later"] * 2)
+        self.assertEqual(instrument.snapshot()["gauges"]["idle.first"], "done")
+        self.assertEqual(instrument.snapshot()["gauges"]["idle.dropped"], "cancelled")
+
+    def test_input_defers_work(self):
+        from PyQt5.QtCore import QEvent, QObject, Qt
+        from PyQt5.QtGui import QKeyEvent
+        from src.idle import IdleScheduler
+
+        ran = []
+
+        def task():
+            ran.append(1)
+            yield
+
+        scheduler = IdleScheduler(idle_ms=200, slice_ms=0)
+        scheduler.add("task", task())
+        self.app.sendEvent(QObject(), QKeyEvent(QEvent.KeyPress, Qt.Key_A, Qt.NoModifier))
+        self.app.processEvents()
+        self.assertEqual(ran, [])
+        self.run_until_idle(scheduler)
+        self.assertEqual(ran, [1])
+
+
+@unittest.skipUnless(HAS_QT, "PyQt5 not installed")
+class TestFlowLayout(unittest.TestCase):
+    def test_bulk_add_and_clear(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication, QWidget
+        from src.ui_shared import FlowLayout, updates_suspended
+
+        app = QApplication.instance() or QApplication([])
+        host = QWidget()
+        flow = FlowLayout(host)
+        host.resize(250, 400)
+        host.show()
+        widgets = [QWidget(host) for _ in range(4)]
+        for widget in widgets:
+            widget.setFixedSize(100, 50)
+        with updates_suspended(host):
+            flow.addWidgets(widgets)
+            self.assertFalse(host.updatesEnabled())
+        self.assertTrue(host.updatesEnabled())
+        app.processEvents()
+
+        self.assertEqual(flow.count(), 4)
+        self.assertTrue(all(widget.isVisible() for widget in widgets))
+        self.assertEqual([(w.x(), w.y()) for w in widgets], [(0, 0), (110, 0), (0, 60), (110, 60)])
+        self.assertEqual(flow.heightForWidth(250), 110)
+
+        flow.clear()
+        self.assertEqual(flow.count(), 0)
+        self.assertFalse(any(widget.isVisible() for widget in widgets))
+        host.close()
+
+
+@unittest.skipUnless(HAS_QT, "PyQt5 not installed")
+class TestCardRaster(unittest.TestCase):
+    def test_raster_and_hover(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtCore import QEvent
+        from PyQt5.QtWidgets import QApplication, QWidget
+        from src.ui_shared import STYLES
+        from src.views import PlantCard, _card_rasters
+
+        app = QApplication.instance() or QApplication([])
+        plants = [Plant(str(i), f"Plant {i}", "Sci", "High", "Low", "Desc", 4.0) for i in range(2)]
+        host = QWidget()
+        host.setStyleSheet(STYLES)
+        card = PlantCard(plants[0], host, raster=True)
+        host.show()
+        for _ in range(3):
+            app.processEvents()
+        self.assertTrue(card._rastered)
+        self.assertFalse(card.body.isVisible())
+        self.assertIs(_card_rasters[id(plants[0])][0], plants[0])
+
+        # Hover paints live, leaving goes back to the cached raster
+        card.enterEvent(QEvent(QEvent.Enter))
+        self.assertFalse(card._rastered)
+        self.assertTrue(card.body.isVisible())
+        card.leaveEvent(QEvent(QEvent.Leave))
+        self.assertTrue(card._rastered)
+
+        # Rebinding to a plant without a raster shows its labels until painted
+        card.bind(plants[1])
+        self.assertFalse(card._rastered)
+        self.assertEqual(card.name_label.text(), plants[1].name)
+        host.close()
+
+    def test_raster_cache_bounds_memory(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtGui import QPixmap
+        from PyQt5.QtWidgets import QApplication, QWidget
+        from src.views import CARD_RASTER_CACHE_SIZE, PlantCard, _card_rasters
+
+        app = QApplication.instance() or QApplication([])
+        _card_rasters.clear()
+        plants = [Plant(str(i), f"Plant {i}", "Sci", "High", "Low", "Desc", 4.0)
+                  for i in range(CARD_RASTER_CACHE_SIZE + 40)]
+        host = QWidget()
+        host.show()
+        cards = []
+        for plant in plants:
+            # Painted one at a time, then hidden, as cards scrolled past would be
+            card = PlantCard(plant, host, raster=True)
+            card.show()
+            for _ in range(3):
+                app.processEvents()
+            self.assertTrue(card._rastered)
+            card.hide()
+            cards.append(card)
+
+        # Cards hold no pixmaps of their own, so the LRU bounds the memory
+        self.assertEqual(len(_card_rasters), CARD_RASTER_CACHE_SIZE)
+        self.assertFalse(any(isinstance(v, QPixmap) for card in cards for v in vars(card).values()))
+
+        # An evicted card goes back to live painting and takes a new raster
+        first = cards[0]
+        self.assertNotIn(id(first.plant), _card_rasters)
+        first.show()
+        for _ in range(5):
+            app.processEvents()
+        self.assertTrue(first._rastered)
+        self.assertIn(id(first.plant), _card_rasters)
+        host.close()
+
+
+@unittest.skipUnless(HAS_QT, "PyQt5 not installed")
+class TestGridRenderers(unittest.TestCase):
+    def setUp(self):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication([])
+        fd, self.test_csv = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("Plant ID,Plant Name,Plant Scientific Name,Plant O2 Release Data,Plant CO Absorb Data,Short Description of Plant,Recommendation Rating out of 5\n")
+            for i in range(120):
+                kind = "Fern" if i < 80 else "Ivy"
+                f.write(f"{i},{kind} {i:03d},{kind} sci,High,Low,Desc,{1 + i % 5}.0\n")
+        self.dm = DataManager(self.test_csv)
+
+    def tearDown(self):
+        os.remove(self.test_csv)
+
+    def make_tab(self, strategy):
+        from src.views import ListTab
+        tab = ListTab(self.dm, strategy=strategy)
+        tab.resize(800, 600)
+        tab.show()
+        self.app.processEvents()
+        return tab
+
+    def search(self, tab, text):
+        tab.search_bar.setText(text)
+        tab.search_timer.stop()
+        tab.perform_search()
+        self.app.processEvents()
+
+    def test_unknown_strategy_falls_back(self):
+        from src.views import VirtualGrid, grid_renderer
+        with self.assertLogs("src.views", "WARNING"):
+            self.assertIs(grid_renderer("virtualised"), VirtualGrid)
+
+    def test_eager_builds_every_card(self):
+        tab = self.make_tab("eager")
+        self.assertEqual(tab.renderer.flow_layout.count(), 120)
+        self.assertEqual(tab.status_label.text(), "Found 120 plants.")
+        self.search(tab, "ivy")
+        self.assertEqual(tab.renderer.flow_layout.count(), 40)
+        tab.close()
+
+    def test_lazy_resets_on_search(self):
+        from src.views import LazyGrid
+        tab = self.make_tab("lazy")
+        renderer = tab.renderer
+        self.assertEqual(renderer.loaded_count, LazyGrid.BATCH_SIZE)
+        vbar = tab.scroll.verticalScrollBar()
+        vbar.setValue(vbar.maximum())
+        self.assertEqual(renderer.loaded_count, 2 * LazyGrid.BATCH_SIZE)
+
+        self.search(tab, "ivy")
+        self.assertEqual(renderer.loaded_count, LazyGrid.BATCH_SIZE)
+        self.assertEqual(renderer.flow_layout.count(), LazyGrid.BATCH_SIZE)
+        # Matches are only counted once the scan gets to the end
+        self.assertIsNone(renderer.results.known_count())
+        self.assertEqual(tab.status_label.text(), "Showing 30 plants. Scroll for more.")
+        vbar.setValue(0)
+        vbar.setValue(vbar.maximum())
+        self.assertEqual(renderer.loaded_count, 40)
+        self.assertEqual(tab.status_label.text(), "Found 40 plants.")
+        tab.close()
+
+    def test_virtualized_rebinds_pool_on_scroll(self):
+        tab = self.make_tab("virtualized")
+        renderer = tab.renderer
+        pool = list(renderer.pool)
+        self.assertLess(len(pool), 120)
+        self.assertEqual(renderer.first_index, 0)
+        first = pool[0].plant
+
+        vbar = tab.scroll.verticalScrollBar()
+        vbar.setValue(renderer._row_height() * 5)
+        self.assertGreater(renderer.first_index, 0)
+        self.assertEqual(renderer.pool, pool)
+        self.assertIsNot(pool[0].plant, first)
+        self.assertIs(pool[0].plant, renderer.results.page(renderer.first_index, 1)[0])
+        tab.close()
+
+    def test_virtualized_grows_with_loaded_rows(self):
+        tab = self.make_tab("virtualized")
+        renderer = tab.renderer
+        self.search(tab, "fern")
+        self.assertLess(renderer.loaded_count, 80)
+        self.assertIsNone(renderer.results.known_count())
+        self.assertEqual(tab.status_label.text(), f"Showing {renderer.loaded_count} plants. Scroll for more.")
+
+        # Each scroll to the bottom reads further and makes the content taller
+        vbar = tab.scroll.verticalScrollBar()
+        heights = [tab.content_widget.minimumHeight()]
+        while renderer.results.known_count() is None:
+            vbar.setValue(vbar.maximum())
+            self.app.processEvents()
+            heights.append(tab.content_widget.minimumHeight())
+        self.assertEqual(heights, sorted(heights))
+        self.assertGreater(heights[-1], heights[0])
+        self.assertEqual(renderer.loaded_count, 80)
+        self.assertEqual(tab.status_label.text(), "Found 80 plants.")
+        tab.close()
+
+    def test_search_in_steps(self):
+        from src.views import ListTab, PREBUILD_CARDS
+        tab = ListTab(self.dm, strategy="eager", search=False)
+        layout = tab.renderer.flow_layout
+        self.assertEqual(layout.count(), 0)
+        # A few cards per step, every result by the end
+        counts = [layout.count() for _ in tab.search_in_steps()]
+        self.assertEqual(counts[:2], [PREBUILD_CARDS, 2 * PREBUILD_CARDS])
+        self.assertEqual(counts[-1], 120)
+        self.assertEqual(tab.status_label.text(), "Found 120 plants.")
+
+        lazy = ListTab(self.dm, strategy="lazy", search=False)
+        list(lazy.search_in_steps())
+        self.assertEqual(lazy.renderer.loaded_count, lazy.renderer.BATCH_SIZE)
+        self.assertEqual(lazy.renderer.flow_layout.count(), lazy.renderer.BATCH_SIZE)
+
+    def test_leaderboard_reuses_rows(self):
+        from src.views import HOME_RESULT_LIMIT, HomeTab
+        tab = HomeTab(self.dm)
+        tab.show()
+        self.search(tab, "fern")
+        rows = list(tab.leaderboard.rows)
+        self.assertEqual(len(rows), HOME_RESULT_LIMIT)
+        self.assertEqual(tab.status_label.text(), f"Showing the first {HOME_RESULT_LIMIT} matches.")
+
+        # A shorter list rebinds the first rows and hides the rest
+        self.search(tab, "ivy")
+        self.assertEqual(tab.leaderboard.rows, rows)
+        self.assertEqual([row.isHidden() for row in rows], [False] * 40 + [True] * (HOME_RESULT_LIMIT - 40))
+        self.assertTrue(all(row.plant.name.startswith("Ivy") for row in rows[:40]))
+        # Rows are never removed from the layout (which also holds the two history rows)
+        self.assertEqual(tab.list_layout.count(), HOME_RESULT_LIMIT + 2)
+        tab.close()
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()